@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Caddy Manager Serialisierungs-Benchmark
+Vergleicht den bisherigen Antwortpfad (jsonable_encoder + JSONResponse bzw.
+response_model-Validierung) mit der direkten ORJSONResponse für große Payloads
+"""
+
+import time
+import statistics
+from datetime import datetime, timedelta
+from typing import List, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from server.api.models.caddy_config import RouteResponse
+
+REPEAT = 20
+
+
+# Farben für Terminal-Output
+class Colors:
+    GREEN = '\033[92m'
+    BLUE = '\033[94m'
+    RESET = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def make_history(count: int) -> List[dict]:
+    """Metrik-Historie im Legacy-Format (verschachtelte Dicts)"""
+    start = datetime.now() - timedelta(seconds=2 * count)
+    return [
+        {
+            "timestamp": (start + timedelta(seconds=2 * i)).isoformat(),
+            "cpu": {"percent": 12.5 + i % 50, "cores": 8},
+            "memory": {"percent": 41.2, "used": 6_800_000_000, "total": 16_000_000_000, "available": 9_200_000_000},
+            "disk": {"percent": 63.0, "used": 300_000_000_000, "total": 500_000_000_000, "free": 200_000_000_000},
+            "network": {"bytes_sent": 10_000 * i, "bytes_recv": 20_000 * i, "packets_sent": 10 * i, "packets_recv": 20 * i},
+            "services": {"docker": True, "caddy": "running"},
+            "requests": {"count": i, "per_second": 3.4, "avg_response_time": 1.27},
+        }
+        for i in range(count)
+    ]
+
+
+def make_containers(count: int) -> List[dict]:
+    """Container-Liste wie GET /api/monitoring/docker/containers"""
+    return [
+        {
+            "id": f"{i:012x}",
+            "name": f"service-{i}",
+            "image": "nginx:latest",
+            "status": "running" if i % 3 else "exited",
+            "created": "2025-01-01T00:00:00Z",
+            "ports": {"80/tcp": str(8000 + i)},
+        }
+        for i in range(count)
+    ]
+
+
+def make_routes(count: int) -> List[dict]:
+    """Caddy-Routes wie GET /api/caddy/routes"""
+    return [
+        {"domain": f"app{i}.example.com", "path": "/", "upstream": f"localhost:{3000 + i}"}
+        for i in range(count)
+    ]
+
+
+def measure(func: Callable[[], bytes]) -> float:
+    """Median-Laufzeit in Millisekunden"""
+    func()  # Aufwärmen
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def report(name: str, before: Callable[[], bytes], after: Callable[[], bytes]):
+    """Vorher/Nachher-Zeile ausgeben"""
+    size = len(after()) / 1024
+    old = measure(before)
+    new = measure(after)
+    print(f"{name:<32} {size:>9.0f} KB {old:>10.2f} ms {new:>10.2f} ms {Colors.GREEN}{old / new:>7.1f}x{Colors.RESET}")
+
+
+def main():
+    print(f"{Colors.BLUE}{Colors.BOLD}Serialisierung: vorher (JSONResponse) vs. nachher (ORJSONResponse){Colors.RESET}")
+    print(f"{'Payload':<32} {'Größe':>12} {'vorher':>13} {'nachher':>13} {'Faktor':>8}")
+
+    # Ohne response_model: FastAPI ruft jsonable_encoder auf, danach json.dumps
+    for count in (1_000, 10_000):
+        history = make_history(count)
+        report(
+            f"Metrik-Historie ({count})",
+            lambda: JSONResponse(jsonable_encoder(history)).body,
+            lambda: ORJSONResponse(history).body,
+        )
+
+    containers = make_containers(2_000)
+    report(
+        "Container-Liste (2000)",
+        lambda: JSONResponse(jsonable_encoder(containers)).body,
+        lambda: ORJSONResponse(containers).body,
+    )
+
+    # Mit response_model: Modelle bauen, erneut validieren, dann kodieren
+    routes = make_routes(2_000)
+    adapter = TypeAdapter(List[RouteResponse])
+    report(
+        "Caddy-Routes (2000)",
+        lambda: JSONResponse(jsonable_encoder(adapter.validate_python([RouteResponse(**r) for r in routes]))).body,
+        lambda: ORJSONResponse(routes).body,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,24 @@ from typing import Dict, Any, List, Optional
 from PySide6.QtCore import QObject, Signal
 import json
 from server.config.settings import settings
-
+from shared.utils.metrics import unflatten
+
+
+def accept_encoding() -> str:
+    """Accept-Encoding nach den installierten Decodern (httpx dekodiert br/zstd nur mit brotli/zstandard)"""
+    encodings = []
+    try:
+        import zstandard  # noqa: F401
+        encodings.append("zstd")
+    except ImportError:
+        pass
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        pass
+    encodings.append("gzip")
+    return ", ".join(encodings)
 
 
 class APIClient(QObject):
@@ -20,6 +37,10 @@ class APIClient(QObject):
     error_occurred = Signal(str)
     operation_completed = Signal(dict)
     install_progress = Signal(dict)
+    containers_updated = Signal(list)
+    docker_stream_state = Signal(bool)
+    metrics_stream_state = Signal(bool)
+    docker_bulk_progress = Signal(dict)
 
     def __init__(self, base_url: str = "http://localhost:8000"):
         super().__init__()
@@ -35,8 +56,28 @@ class APIClient(QObject):
             limits=httpx.Limits(
                 max_keepalive_connections=5,
                 max_connections=10
-            )
+            ),
+            headers={"Accept-Encoding": accept_encoding()}
         )
+        # ETag und Daten der letzten Antwort pro URL (für 304 Not Modified)
+        self._etags: Dict[str, tuple] = {}
+
+    async def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET mit If-None-Match; bei 304 kommen die zwischengespeicherten Daten zurück"""
+        key = str(httpx.URL(url, params=params))
+        cached = self._etags.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        response = await self.client.get(url, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        data = response.json()
+
+        etag = response.headers.get("etag")
+        if etag:
+            self._etags[key] = (etag, data)
+        return data
 
     async def check_connection(self) -> bool:
         """Prüft Verbindung zum Server"""
@@ -51,9 +92,7 @@ class APIClient(QObject):
     async def get_caddy_status(self) -> Dict[str, Any]:
         """Caddy Status abrufen"""
         try:
-            response = await self.client.get(f"{self.base_url}/api/caddy/status")
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(f"{self.base_url}/api/caddy/status")
             self.status_updated.emit(data)
             return data
         except httpx.TimeoutException:
@@ -171,9 +210,7 @@ class APIClient(QObject):
     async def get_routes(self) -> List[Dict[str, Any]]:
         """Routes abrufen"""
         try:
-            response = await self.client.get(f"{self.base_url}/api/caddy/routes")
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(f"{self.base_url}/api/caddy/routes")
             self.routes_updated.emit(data)
             return data
         except Exception as e:
@@ -231,45 +268,150 @@ class APIClient(QObject):
                 self.error_occurred.emit(f"Metriken-Fehler: {str(e)}")
             return {}
 
-    async def get_metrics_history(self) -> List[Dict[str, Any]]:
-        """Metrik-Historie abrufen"""
+    async def get_metrics_history(self, fields: Optional[List[str]] = None, since: Optional[float] = None,
+                                  until: Optional[float] = None, step: Optional[float] = None,
+                                  agg: str = "avg") -> Any:
+        """
+        Metrik-Historie abrufen.
+
+        Ohne Parameter kommt die Liste der neuesten Einträge zurück; mit
+        fields/step die spaltenbasierte Antwort (timestamps + fields).
+        """
+        params = {}
+        if since is not None:
+            params["from"] = since
+        if until is not None:
+            params["to"] = until
+        if fields:
+            params["fields"] = ",".join(fields)
+        if step is not None:
+            params["step"] = step
+        if fields or step is not None:
+            params["agg"] = agg
+            params["format"] = "columnar"
+
         try:
-            response = await self.client.get(f"{self.base_url}/api/monitoring/metrics/history")
+            response = await self.client.get(f"{self.base_url}/api/monitoring/metrics/history", params=params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             self.error_occurred.emit(f"Historie-Fehler: {str(e)}")
-            return []
-
-    async def start_metrics_stream(self, callback):
-        """WebSocket Metrik-Stream starten"""
+            return {} if params.get("format") else []
+
+    async def start_metrics_stream(self, fields: Optional[List[str]] = None):
+        """
+        WebSocket Metrik-Stream (Protokoll v2: Snapshot + Deltas), läuft bis zum Abbruch.
+
+        Der lokale Stand wird aus den Deltas fortgeschrieben und als
+        verschachteltes Dict wie bei GET /metrics ausgegeben. Binär-Frames
+        (msgpack) werden genutzt, wenn msgpack installiert ist. Ohne
+        Verbindung übernimmt das Polling; Abbrüche werden mit wachsender
+        Pause neu verbunden.
+        """
         import websockets
 
         try:
-            uri = f"ws://localhost:8044/api/monitoring/metrics/stream"
-            async with websockets.connect(uri) as websocket:
-                while True:
-                    message = await websocket.recv()
-                    data = json.loads(message)
-                    self.metrics_updated.emit(data)
-                    if callback:
-                        callback(data)
-        except Exception as e:
-            self.error_occurred.emit(f"Stream-Fehler: {str(e)}")
+            import msgpack
+        except ImportError:
+            msgpack = None
+
+        params = f"v=2&encoding={'msgpack' if msgpack else 'json'}"
+        if fields:
+            params += f"&fields={','.join(fields)}"
+
+        uri = f"{settings.api_websocket}/api/monitoring/metrics/stream?{params}"
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(uri) as websocket:
+                    backoff = 1
+                    state: Dict[str, Any] = {}
+                    while True:
+                        message = await websocket.recv()
+                        if isinstance(message, bytes):
+                            message = msgpack.unpackb(message, raw=False)
+                        else:
+                            message = json.loads(message)
+
+                        if message["type"] == "snapshot":
+                            state = dict(message["fields"])
+                            self.metrics_stream_state.emit(True)
+                        elif message["type"] == "delta":
+                            state.update(message["changed"])
+                            for name in message.get("removed", ()):
+                                state.pop(name, None)
+                        else:
+                            continue
+
+                        self.metrics_updated.emit(unflatten({"timestamp": message.get("ts"), **state}))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Kein Error-Dialog - Polling übernimmt, bis die Verbindung wieder steht
+                print(f"Metrik-Stream getrennt: {str(e)} (neuer Versuch in {backoff}s)")
+            finally:
+                self.metrics_stream_state.emit(False)
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
 
     # ============= Docker Management =============
 
     async def get_docker_containers(self) -> List[Dict[str, Any]]:
         """Docker Container abrufen"""
         try:
-            response = await self.client.get(f"{self.base_url}/api/monitoring/docker/containers")
-            response.raise_for_status()
-            return response.json()
+            return await self._get_json(f"{self.base_url}/api/monitoring/docker/containers")
         except Exception as e:
             # Docker-Fehler nicht als Error anzeigen (könnte einfach nicht installiert sein)
             print(f"Docker nicht verfügbar: {str(e)}")
             return []
 
+    async def start_docker_stream(self):
+        """
+        WebSocket Container-Stream (Snapshot + Änderungen), läuft bis zum Abbruch.
+
+        Live ist der Stream nur, solange der Server-Cache am Docker-Event-Stream
+        hängt (synced) - sonst und nach einem Verbindungsabbruch übernimmt das
+        Polling, bis ein neuer Snapshot mit synced=True kommt. Abbrüche werden
+        mit wachsender Pause neu verbunden.
+        """
+        import websockets
+
+        uri = f"{settings.api_websocket}/api/monitoring/docker/containers/stream"
+        backoff = 1
+        while True:
+            containers: Dict[str, Dict[str, Any]] = {}
+            try:
+                async with websockets.connect(uri) as websocket:
+                    backoff = 1
+                    while True:
+                        message = await websocket.recv()
+                        data = json.loads(message)
+
+                        if data.get("type") == "state":
+                            self.docker_stream_state.emit(bool(data.get("synced")))
+                            continue
+                        if data.get("type") == "snapshot":
+                            containers = {c["id"]: c for c in data.get("containers", [])}
+                            self.docker_stream_state.emit(bool(data.get("synced")))
+                        elif data.get("type") == "update":
+                            container = data["container"]
+                            containers[container["id"]] = container
+                        elif data.get("type") == "remove":
+                            containers.pop(data.get("id"), None)
+
+                        self.containers_updated.emit(list(containers.values()))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Kein Error-Dialog - Polling übernimmt, bis die Verbindung wieder steht
+                print(f"Docker-Stream getrennt: {str(e)} (neuer Versuch in {backoff}s)")
+            finally:
+                self.docker_stream_state.emit(False)
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
     async def control_docker_container(self, container_id: str, action: str) -> Dict[str, Any]:
         """Docker Container steuern"""
         try:
@@ -284,6 +426,36 @@ class APIClient(QObject):
             self.error_occurred.emit(f"Docker-Control-Fehler: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    async def bulk_control_docker_containers(self, action: str, container_ids: Optional[List[str]] = None,
+                                             label: Optional[str] = None) -> Dict[str, Any]:
+        """Mehrere Container parallel steuern (Fortschritt per WebSocket)"""
+        import websockets
+
+        try:
+            uri = f"{settings.api_websocket}/api/monitoring/docker/containers/bulk/progress"
+            async with websockets.connect(uri) as websocket:
+                await websocket.send(json.dumps({
+                    "action": action,
+                    "container_ids": container_ids,
+                    "label": label
+                }))
+                while True:
+                    message = await websocket.recv()
+                    data = json.loads(message)
+
+                    if "complete" in data:
+                        self.operation_completed.emit(data["result"])
+                        return data["result"]
+                    elif "error" in data:
+                        self.error_occurred.emit(f"Docker-Bulk-Fehler: {data['error']}")
+                        return {"success": False, "error": data["error"]}
+                    else:
+                        self.docker_bulk_progress.emit(data)
+
+        except Exception as e:
+            self.error_occurred.emit(f"Docker-Bulk-Fehler: {str(e)}")
+            return {"success": False, "error": str(e)}
+
     # ============= Backup/Restore - FIXED =============
 
     async def backup_config(self, name: Optional[str] = None) -> Dict[str, Any]:
@@ -362,9 +534,7 @@ class APIClient(QObject):
     async def get_backups(self) -> List[Dict[str, Any]]:
         """Backup-Liste abrufen"""
         try:
-            response = await self.client.get(f"{self.base_url}/api/caddy/backups")
-            response.raise_for_status()
-            return response.json()
+            return await self._get_json(f"{self.base_url}/api/caddy/backups")
         except Exception as e:
             self.error_occurred.emit(f"Backup-Liste-Fehler: {str(e)}")
             return []
@@ -219,6 +219,38 @@ class DashboardWidget(QWidget):
 
         layout.addWidget(metrics_group)
 
+        # Durchsatz (Netzwerk und Disk)
+        io_group = QGroupBox("Durchsatz")
+        io_layout = QHBoxLayout(io_group)
+
+        self.net_recv_metric = MetricDisplay("Netzwerk Empfang")
+        self.net_sent_metric = MetricDisplay("Netzwerk Senden")
+        self.disk_read_metric = MetricDisplay("Disk Lesen")
+        self.disk_write_metric = MetricDisplay("Disk Schreiben")
+
+        io_layout.addWidget(self.net_recv_metric)
+        io_layout.addWidget(self.net_sent_metric)
+        io_layout.addWidget(self.disk_read_metric)
+        io_layout.addWidget(self.disk_write_metric)
+
+        layout.addWidget(io_group)
+
+        # Ressourcen des Caddy-Prozesses
+        process_group = QGroupBox("Caddy-Prozess")
+        process_layout = QHBoxLayout(process_group)
+
+        self.caddy_cpu_metric = MetricDisplay("CPU")
+        self.caddy_rss_metric = MetricDisplay("Speicher (RSS)")
+        self.caddy_fds_metric = MetricDisplay("Dateien / Threads")
+        self.caddy_ctx_metric = MetricDisplay("Kontextwechsel")
+
+        process_layout.addWidget(self.caddy_cpu_metric)
+        process_layout.addWidget(self.caddy_rss_metric)
+        process_layout.addWidget(self.caddy_fds_metric)
+        process_layout.addWidget(self.caddy_ctx_metric)
+
+        layout.addWidget(process_group)
+
         # Stretch am Ende
         layout.addStretch()
 
@@ -261,10 +293,52 @@ class DashboardWidget(QWidget):
             response_time = metrics["requests"].get("avg_response_time", 0)
             self.response_metric.set_value(f"{response_time:.1f}", "ms")
 
+        if "network" in metrics:
+            rates = metrics["network"].get("rates") or {}
+            self.net_recv_metric.set_value(*self._format_rate(rates.get("bytes_recv_per_sec")))
+            self.net_sent_metric.set_value(*self._format_rate(rates.get("bytes_sent_per_sec")))
+
+        if "disk" in metrics:
+            io = metrics["disk"].get("io") or {}
+            self.disk_read_metric.set_value(*self._format_rate(io.get("read_bytes_per_sec"), io.get("read_iops")))
+            self.disk_write_metric.set_value(*self._format_rate(io.get("write_bytes_per_sec"), io.get("write_iops")))
+
+        if "caddy_process" in metrics:
+            self.update_caddy_process(metrics["caddy_process"] or {})
+
         if "services" in metrics:
             # Docker Status
             docker_running = metrics["services"].get("docker", False)
             self.docker_status.set_status("running" if docker_running else "stopped")
 
             # API ist immer running wenn wir Metriken bekommen
-            self.api_status.set_status("running")
\ No newline at end of file
+            self.api_status.set_status("running")
+
+    @staticmethod
+    def _format_rate(bytes_per_sec, iops=None) -> tuple:
+        """Bytes/s als (Wert, Einheit) formatieren, optional mit IOPS"""
+        if bytes_per_sec is None:
+            return "–", ""
+        value, unit = float(bytes_per_sec), "B/s"
+        for next_unit in ("KB/s", "MB/s", "GB/s"):
+            if value < 1024:
+                break
+            value, unit = value / 1024, next_unit
+        if iops is not None:
+            unit = f"{unit} · {iops:.0f} IOPS"
+        return f"{value:.1f}", unit
+
+    def update_caddy_process(self, process: dict):
+        """Ressourcen des Caddy-Prozesses anzeigen (– wenn kein Prozess läuft)"""
+        if process.get("rss") is None:
+            for metric in (self.caddy_cpu_metric, self.caddy_rss_metric,
+                           self.caddy_fds_metric, self.caddy_ctx_metric):
+                metric.set_value("–")
+            return
+
+        self.caddy_cpu_metric.set_value(f"{process.get('cpu_percent') or 0:.1f}", "%")
+        self.caddy_rss_metric.set_value(f"{process['rss'] / 1024 / 1024:.1f}", "MB")
+        self.caddy_fds_metric.set_value(f"{process.get('fds')} / {process.get('threads')}", "FDs / Threads")
+
+        ctx_switches = process.get("ctx_switches_per_sec")
+        self.caddy_ctx_metric.set_value(f"{ctx_switches:.0f}" if ctx_switches is not None else "–", "pro Sek")
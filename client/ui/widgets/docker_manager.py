@@ -80,6 +80,15 @@ class DockerManagerWidget(QWidget):
         self.auto_refresh_timer.timeout.connect(self.refresh_containers.emit)
         self.auto_refresh_timer.start(10000)  # Alle 10 Sekunden
 
+    def set_stream_active(self, active: bool):
+        """Live-Updates per WebSocket aktiv - Polling nur als Fallback"""
+        if active:
+            self.auto_refresh_timer.stop()
+        elif not self.auto_refresh_timer.isActive():
+            # Stand seit dem Ende der Live-Updates sofort nachladen
+            self.refresh_containers.emit()
+            self.auto_refresh_timer.start(10000)
+
     def update_containers(self, containers: list):
         """Container-Tabelle aktualisieren"""
         self.table.setRowCount(0)
@@ -113,6 +113,9 @@ class MainWindow(QMainWindow):
         self.api_client.metrics_updated.connect(self.dashboard.update_metrics)
         self.api_client.error_occurred.connect(self.show_error)
         self.api_client.operation_completed.connect(self.show_operation_result)
+        self.api_client.containers_updated.connect(self.docker_manager.update_containers)
+        self.api_client.docker_stream_state.connect(self.docker_manager.set_stream_active)
+        self.api_client.metrics_stream_state.connect(self.set_metrics_stream_active)
 
         # Dashboard Signals - mit Wrapper
         self.dashboard.install_caddy.connect(self.install_caddy_wrapper)
@@ -146,6 +149,8 @@ class MainWindow(QMainWindow):
         # Flags für laufende Updates
         self.status_updating = False
         self.metrics_updating = False
+        # Metrik-Stream verbunden - Polling nur als Fallback
+        self.metrics_streaming = False
 
     def safe_update_status(self):
         """Sicheres Status-Update ohne Überschneidungen"""
@@ -162,8 +167,17 @@ class MainWindow(QMainWindow):
         finally:
             self.status_updating = False
 
+    def set_metrics_stream_active(self, active: bool):
+        """Live-Metriken per WebSocket aktiv - Polling nur als Fallback"""
+        was_streaming, self.metrics_streaming = self.metrics_streaming, active
+        if was_streaming and not active:
+            # Stand seit dem Ende der Live-Updates sofort nachladen
+            self.safe_update_metrics()
+
     def safe_update_metrics(self):
-        """Sicheres Metriken-Update ohne Überschneidungen"""
+        """Sicheres Metriken-Update ohne Überschneidungen (entfällt bei aktivem Stream)"""
+        if self.metrics_streaming:
+            return
         if not self.metrics_updating:
             self.metrics_updating = True
             asyncio.create_task(self._update_metrics_async())
@@ -193,6 +207,10 @@ class MainWindow(QMainWindow):
             await self.load_routes()
             await self.update_metrics()
             await self.load_docker_containers()
+
+            # Container-Änderungen und Metriken live per WebSocket empfangen
+            self.docker_stream_task = asyncio.create_task(self.api_client.start_docker_stream())
+            self.metrics_stream_task = asyncio.create_task(self.api_client.start_metrics_stream())
         else:
             self.status_bar.showMessage("✗ Server nicht erreichbar")
             self.show_error("Konnte keine Verbindung zum Server herstellen")
@@ -549,6 +567,11 @@ class MainWindow(QMainWindow):
         self.status_timer.stop()
         self.metrics_timer.stop()
 
+        # Container- und Metrik-Stream beenden
+        for task in (getattr(self, "docker_stream_task", None), getattr(self, "metrics_stream_task", None)):
+            if task:
+                task.cancel()
+
         # API Client schließen
         asyncio.create_task(self.api_client.close())
 
@@ -0,0 +1,276 @@
+"""
+ASGI-Middleware für Request-Tracking und Antwort-Kompression
+"""
+import asyncio
+import gzip
+import hashlib
+from collections import OrderedDict
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from server.api.services.tracing import tracer
+from server.api.startup import startup_report
+from server.config.settings import settings
+
+
+class RequestTrackingMiddleware:
+    """
+    Reine ASGI-Middleware statt @app.middleware("http").
+
+    Misst die Dauer mit perf_counter_ns, liest Status und Antwortgröße aus
+    den ASGI-Nachrichten und puffert dabei keinen Body, Streaming-Antworten
+    bleiben also unverändert. Das Route-Template steht nach dem Routing in
+    scope["route"]. X-Process-Time (ms) wird beim Response-Start gesetzt.
+    Jeder Request ist Wurzel-Span eines Traces (ID im Header X-Trace-Id).
+    """
+
+    def __init__(self, app, monitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter_ns()
+        status = 500
+        size = 0
+        self.monitor.record_request()
+
+        with tracer.span("http") as span:
+
+            async def send_wrapper(message):
+                nonlocal status, size
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    elapsed = (perf_counter_ns() - start) / 1_000_000
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"x-process-time", f"{elapsed:.3f}".encode()))
+                    if span:
+                        headers.append((b"x-trace-id", span.trace.trace_id.encode()))
+                    message = {**message, "headers": headers}
+                elif message["type"] == "http.response.body":
+                    size += len(message.get("body", b""))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if startup_report.first_response_ms is None:
+                    startup_report.first_response()
+                route = getattr(scope.get("route"), "path", None)
+                self.monitor.record_response_time(
+                    (perf_counter_ns() - start) / 1_000_000,
+                    method=scope["method"],
+                    route=route,
+                    status=status,
+                    size=size
+                )
+                if span:
+                    # Route-Template erst nach dem Routing bekannt
+                    span.name = f"{scope['method']} {route or scope['path']}"
+                    span.set(path=scope["path"], status=status, size=size)
+
+
+# Inhaltstypen, deren Kompression sich lohnt
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript",
+                      "application/xml", "application/octet-stream")
+
+
+def load_codecs() -> Dict[str, Callable[[bytes], bytes]]:
+    """
+    Verfügbare Kompressionsverfahren in Server-Präferenz (zstd, br, gzip).
+    brotli und zstandard sind optional und werden nur genutzt, wenn installiert.
+    """
+    codecs: Dict[str, Callable[[bytes], bytes]] = {}
+    try:
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=settings.compression_zstd_level)
+        codecs["zstd"] = compressor.compress
+    except ImportError:
+        pass
+    try:
+        import brotli
+        codecs["br"] = lambda data: brotli.compress(data, quality=settings.compression_brotli_quality)
+    except ImportError:
+        pass
+    codecs["gzip"] = lambda data: gzip.compress(data, compresslevel=settings.compression_gzip_level, mtime=0)
+    return codecs
+
+
+def negotiate_encoding(accept_encoding: str, available) -> Optional[str]:
+    """Bestes verfügbares Verfahren laut Accept-Encoding (q=0 schließt aus)"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token.strip().lower()] = quality
+
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+class CompressedCache:
+    """
+    LRU-Cache komprimierter Antworten, Schlüssel (Inhalts-Hash, Verfahren).
+
+    Aufgenommen wird eine Antwort erst, wenn derselbe Inhalt ein zweites
+    Mal ausgeliefert wird - so landen quasi-statische Antworten (Config,
+    Backups, Routes) im Cache, sich ständig ändernde Metriken nicht.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._seen: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: Tuple[str, str], data: bytes):
+        if key not in self._seen:
+            self._seen[key] = None
+            if len(self._seen) > 4 * self.max_entries:
+                self._seen.popitem(last=False)
+            return
+        if len(data) > self.max_bytes:
+            return
+
+        self._entries[key] = data
+        self.size += len(data)
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+def body_digest(body: bytes) -> str:
+    """Inhalts-Hash für ETag und Cache-Schlüssel"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class CompressionMiddleware:
+    """
+    Reine ASGI-Middleware für Kompression und ETags von GET-Antworten.
+
+    Komprimierte Antworten und Anfragen mit If-None-Match bekommen ein ETag
+    aus dem Inhalts-Hash (pro Verfahren eigenes ETag); passt If-None-Match,
+    folgt 304 ohne Body. Alle anderen Antworten werden nicht gehasht.
+    Ab compression_min_size wird nach Accept-Encoding komprimiert, große
+    Bodies (compression_thread_min_size) in einem Thread, damit der
+    Event-Loop nicht blockiert. Streaming-Antworten (more_body) werden
+    unverändert durchgereicht.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.codecs = load_codecs()
+        self.cache = CompressedCache(settings.compression_cache_entries, settings.compression_cache_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), self.codecs)
+        if_none_match = request_headers.get("if-none-match")
+        start_message = None
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                # Header erst senden, wenn der Body bekannt ist
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+
+            if message.get("more_body", False):
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            await self._respond(send, start_message, message.get("body", b""), encoding, if_none_match)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _respond(self, send, start_message, body: bytes, encoding: Optional[str],
+                       if_none_match: Optional[str]):
+        headers = MutableHeaders(raw=list(start_message["headers"]))
+        if start_message["status"] != 200 or "content-encoding" in headers:
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        content_type = headers.get("content-type", "")
+        if len(body) < settings.compression_min_size or not content_type.startswith(COMPRESSIBLE_TYPES):
+            encoding = None
+
+        headers.add_vary_header("Accept-Encoding")
+
+        # Ohne Kompression und ohne If-None-Match wird der Hash nicht gebraucht
+        if encoding is None and not if_none_match:
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        offload = len(body) >= settings.compression_thread_min_size
+        digest = await self._run(body_digest, body, offload)
+        etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+        headers["ETag"] = etag
+
+        if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            del headers["content-length"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if encoding:
+            key = (digest, encoding)
+            compressed = self.cache.get(key)
+            if compressed is None:
+                compressed = await self._run(self.codecs[encoding], body, offload)
+                self.cache.put(key, compressed)
+            if len(compressed) < len(body):
+                body = compressed
+                headers["Content-Encoding"] = encoding
+            else:
+                headers["ETag"] = f'"{digest}"'
+            headers["Content-Length"] = str(len(body))
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _run(func: Callable[[bytes], Any], body: bytes, offload: bool):
+        """func(body) direkt oder, für große Bodies, im Thread-Pool ausführen"""
+        if offload:
+            return await asyncio.to_thread(func, body)
+        return func(body)
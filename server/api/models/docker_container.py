@@ -0,0 +1,24 @@
+"""
+Pydantic Models für Docker-Container
+"""
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
+from enum import Enum
+
+class ContainerAction(str, Enum):
+    START = "start"
+    STOP = "stop"
+    RESTART = "restart"
+
+class BulkActionRequest(BaseModel):
+    """Model für Aktionen auf mehreren Containern"""
+    action: ContainerAction
+    container_ids: Optional[List[str]] = Field(default=None, description="Container-IDs oder -Namen")
+    label: Optional[str] = Field(default=None, description="Label-Selektor (z.B. com.docker.compose.project=web)")
+    parallelism: Optional[int] = Field(default=None, ge=1, description="Maximale Anzahl paralleler Aktionen")
+
+    @model_validator(mode="after")
+    def check_selector(self):
+        if not self.container_ids and not self.label:
+            raise ValueError("container_ids oder label muss angegeben werden")
+        return self
@@ -2,6 +2,7 @@
 Caddy API Routes
 """
 from fastapi import APIRouter, HTTPException, WebSocket
+from fastapi.responses import ORJSONResponse
 from typing import List
 import json
 
@@ -83,8 +84,9 @@ async def restart_caddy():
 @router.get("/routes", response_model=List[RouteResponse])
 async def get_routes():
     """Alle Routes abrufen"""
+    # Interne Dicts direkt serialisieren - response_model dient nur der Doku
     routes = await caddy_service.get_routes()
-    return [RouteResponse(**route) for route in routes]
+    return ORJSONResponse(routes)
 
 @router.post("/routes", response_model=OperationResponse)
 async def add_route(route: RouteRequest):
@@ -0,0 +1,74 @@
+"""
+Debug API Routes
+"""
+import asyncio
+import ipaddress
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from server.api.startup import startup_report
+from server.config.settings import settings
+
+
+async def require_admin(request: Request, x_admin_token: Optional[str] = Header(default=None)):
+    """Mit admin_token nur passender X-Admin-Token-Header, sonst nur Loopback-Clients"""
+    if settings.admin_token:
+        if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+            raise HTTPException(status_code=403, detail="Ungültiger oder fehlender Admin-Token")
+        return
+
+    host = request.client.host if request.client else ""
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise HTTPException(status_code=403, detail="Debug-Endpunkte nur lokal oder mit Admin-Token")
+
+
+router = APIRouter(prefix="/api/debug", tags=["debug"], dependencies=[Depends(require_admin)])
+
+@router.get("/startup")
+async def get_startup_report():
+    """Startzeit pro Phase (Importe, App, Verzeichnisse, Dienste, Docker), Hintergrund-Aufgaben und erste Antwort"""
+    return startup_report.to_dict()
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def run_profiler(
+    seconds: float = Query(default=10.0, gt=0, le=settings.profiler_max_seconds),
+    interval_ms: float = Query(default=settings.profiler_interval_ms, ge=1, le=1000),
+    idle: bool = Query(default=False, description="Wartende Threads mitzählen")
+):
+    """Sampling-Profil aller Threads über `seconds` als Collapsed-Stacks (flamegraph.pl, speedscope)"""
+    from server.api.services.profiler import profiler
+
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Es läuft bereits ein Profiler")
+    try:
+        # Der Sampler läuft im Executor-Thread, der Event-Loop wird mitgemessen
+        result = await asyncio.to_thread(profiler.profile, seconds, interval_ms / 1000, idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return PlainTextResponse(result.collapsed(), headers={
+        **result.headers(),
+        "Content-Disposition": 'attachment; filename="profile.collapsed"'
+    })
+
+@router.get("/traces")
+async def get_traces(
+    min_ms: Optional[float] = Query(default=None, ge=0, description="Mindestdauer (Standard: trace_slow_ms)"),
+    name: Optional[str] = Query(default=None, description="Namensanfang, z.B. 'POST /api/caddy'"),
+    limit: int = Query(default=20, ge=1, le=200)
+):
+    """Jüngste langsame Traces mit allen Spans (Admin-API, Subprozesse, Dateizugriffe, Monitor)"""
+    from server.api.services.tracing import tracer
+
+    return {
+        "enabled": tracer.enabled,
+        "slow_ms": tracer.slow_ms,
+        "traces": tracer.get_traces(min_ms, name, limit)
+    }
@@ -2,11 +2,17 @@
 Monitoring API Routes
 """
 import asyncio
-from fastapi import APIRouter, HTTPException, WebSocket
-from typing import List, Dict, Any
+import math
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Query, Response
+from fastapi.responses import ORJSONResponse
+from typing import List, Dict, Any, Optional
 
 from server.config.settings import settings
-from server.api.services import monitor_service
+from server.api.models.docker_container import BulkActionRequest
+from server.api.services import monitor_service, docker_service, container_stats_service, alert_service, worker_service, loop_monitor_service
+from server.api.services.metrics_store import HISTORY_FIELDS, binary_payload, columnar_payload
+from server.api.services.metrics_stream import MetricsDeltaEncoder, hello_message, load_msgpack, pack
 
 router = APIRouter(prefix="/api/monitoring", tags=["monitoring"])
 
@@ -14,34 +20,306 @@ router = APIRouter(prefix="/api/monitoring", tags=["monitoring"])
 async def get_current_metrics():
     """Aktuelle System-Metriken abrufen"""
     metrics = await monitor_service.get_current_metrics()
-    return metrics
+    return ORJSONResponse(metrics)
+
+# Größter zulässiger Zeitpunkt in ms (passt in die int64-Zeitstempel der Historie)
+MAX_TIME_MS = 2 ** 62
+
+def _parse_time(value: Optional[str], name: str) -> Optional[int]:
+    """Zeitpunkt (Epoch-Sekunden oder ISO 8601) in ms seit Epoch umwandeln"""
+    if value is None:
+        return None
+    invalid = HTTPException(status_code=400, detail=f"Ungültiger Zeitpunkt für '{name}': {value}")
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = None
+    if seconds is not None:
+        # inf, nan und Werte außerhalb von int64 ablehnen
+        if not math.isfinite(seconds) or abs(seconds * 1000) >= MAX_TIME_MS:
+            raise invalid
+        return round(seconds * 1000)
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        # Ohne Zeitzone gilt Ortszeit - wie in den Zeitstempeln der Historie
+        if parsed.tzinfo is None:
+            parsed = parsed.astimezone()
+        return round(parsed.timestamp() * 1000)
+    except (ValueError, OverflowError, OSError):
+        raise invalid
 
 @router.get("/metrics/history")
-async def get_metrics_history():
-    """Metrik-Historie abrufen"""
-    history = monitor_service.get_metrics_history()
-    return history
+async def get_metrics_history(
+    limit: int = Query(default=100, ge=1, description="Anzahl der neuesten Einträge"),
+    from_: Optional[str] = Query(default=None, alias="from", description="Beginn (Epoch-Sekunden oder ISO 8601)"),
+    to: Optional[str] = Query(default=None, description="Ende (Epoch-Sekunden oder ISO 8601)"),
+    fields: Optional[str] = Query(default=None, description="Kommagetrennte Felder, z.B. cpu.percent,memory.percent"),
+    step: Optional[float] = Query(default=None, ge=0.001, le=MAX_TIME_MS / 1000, allow_inf_nan=False,
+                                  description="Auflösung in Sekunden (mindestens 1 ms)"),
+    agg: str = Query(default="avg", pattern="^(avg|min|max|last)$", description="Aggregation je Zeitschritt"),
+    format: Optional[str] = Query(default=None, pattern="^(columnar|binary)$", description="Ausgabeformat")
+):
+    """Metrik-Historie abrufen (Zeitbereich, Felder, Auflösung)"""
+    start = _parse_time(from_, "from")
+    end = _parse_time(to, "to")
+
+    # Ohne neue Parameter bleibt die bisherige Liste verschachtelter Einträge
+    if fields is None and step is None and format is None:
+        return ORJSONResponse(monitor_service.get_metrics_history(start=start, end=end, limit=limit))
+
+    selected = None
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in HISTORY_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unbekannte Felder: {', '.join(unknown)} (verfügbar: {', '.join(HISTORY_FIELDS)})"
+            )
+
+    result = monitor_service.query_metrics(
+        start=start,
+        end=end,
+        fields=selected,
+        agg=agg,
+        step=int(step * 1000) if step else None
+    )
+
+    if format == "binary":
+        body, headers = binary_payload(result)
+        return Response(content=body, media_type="application/octet-stream", headers=headers)
+    return ORJSONResponse(columnar_payload(result))
+
+@router.get("/requests")
+async def get_request_stats(window: str = Query(default="1m", pattern="^(1m|5m)$", description="Auswertungsfenster")):
+    """Latenz-Perzentile (p50/p90/p99/max) und Raten gesamt und pro Methode, Route und Statusklasse"""
+    return ORJSONResponse(monitor_service.get_request_stats(window))
+
+@router.get("/workers")
+async def get_workers():
+    """Worker-Prozesse mit Rolle (Leader/Follower) und Alter des letzten Heartbeats"""
+    return {
+        "workers": worker_service.get_workers(),
+        "multi_worker": worker_service.enabled
+    }
+
+@router.get("/loop")
+async def get_loop_status(limit: int = Query(default=20, ge=1, le=100)):
+    """Event-Loop-Lag (Perzentile 1m/5m/gesamt), Blockaden und deren Verursacher mit Stack"""
+    return ORJSONResponse(loop_monitor_service.get_status(limit))
 
 @router.websocket("/metrics/stream")
-async def metrics_stream(websocket: WebSocket):
-    """WebSocket für Live-Metriken"""
+async def metrics_stream(
+    websocket: WebSocket,
+    v: int = Query(default=1, description="Protokollversion (1 = volles JSON, 2 = Snapshot + Deltas)"),
+    fields: Optional[str] = Query(default=None, description="v2: kommagetrennte Felder oder Feldgruppen"),
+    encoding: str = Query(default="json", description="v2: json oder msgpack")
+):
+    """WebSocket für Live-Metriken (Snapshots des Monitor-Loops)"""
     await websocket.accept()
+    queue = monitor_service.subscribe()
 
     try:
+        if v >= 2:
+            await _metrics_stream_v2(websocket, queue, fields, encoding)
+            return
+
+        # Sofort den letzten Stand senden, danach jeden neuen Snapshot
+        # (subscribe() weckt den Loop, der nächste folgt also umgehend)
+        if monitor_service.latest:
+            await websocket.send_json(monitor_service.latest)
         while True:
-            metrics = await monitor_service.get_current_metrics()
+            metrics = await queue.get()
             await websocket.send_json(metrics)
-            await asyncio.sleep(settings.monitor_interval)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        monitor_service.unsubscribe(queue)
+
+async def _metrics_stream_v2(websocket: WebSocket, queue: asyncio.Queue,
+                             fields: Optional[str], encoding: str):
+    """
+    Protokoll v2: hello, Snapshot der abonnierten Felder, danach Deltas.
+
+    Der Client kann jederzeit {"subscribe": [...]} senden und erhält dann
+    einen neuen Snapshot. Mit encoding=msgpack kommen Binär-Frames, sofern
+    msgpack installiert ist - sonst wird auf JSON zurückgefallen.
+    """
+    msgpack = load_msgpack() if encoding == "msgpack" else None
+    encoder = MetricsDeltaEncoder(fields.split(",") if fields else None)
+    resubscribe = object()
+
+    async def send(message: Dict[str, Any]):
+        frame = pack(message, msgpack)
+        if msgpack is None:
+            await websocket.send_json(frame)
+        else:
+            await websocket.send_bytes(frame)
+
+    async def receive_commands():
+        """Abonnement-Änderungen des Clients lesen"""
+        while True:
+            message = await websocket.receive_json()
+            if isinstance(message, dict) and "subscribe" in message:
+                encoder.set_fields(message["subscribe"] or None)
+                # Sender wecken, damit der neue Snapshot sofort kommt
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(resubscribe)
+
+    reader = asyncio.create_task(receive_commands())
+    try:
+        await send(hello_message("msgpack" if msgpack else "json", encoder.fields))
+        if monitor_service.latest:
+            await send(encoder.encode(monitor_service.latest))
+
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, reader}, return_when=asyncio.FIRST_COMPLETED)
+            if reader in done:
+                getter.cancel()
+                reader.result()  # WebSocketDisconnect weiterreichen
+                return
+
+            metrics = getter.result()
+            if metrics is resubscribe:
+                metrics = monitor_service.latest
+                if metrics is None:
+                    continue
+                await send(hello_message("msgpack" if msgpack else "json", encoder.fields))
+            await send(encoder.encode(metrics))
+    finally:
+        reader.cancel()
+
+@router.get("/alerts")
+async def get_alerts(limit: int = Query(default=100, ge=1, description="Anzahl der neuesten Ereignisse")):
+    """Alarm-Regeln mit Zustand und letzte Ereignisse"""
+    return {
+        "rules": alert_service.get_rules(),
+        "events": alert_service.get_events(limit)
+    }
+
+@router.websocket("/alerts/stream")
+async def alerts_stream(websocket: WebSocket):
+    """WebSocket für Alarm-Ereignisse (Regelzustand, danach firing/resolved)"""
+    await websocket.accept()
+    queue = alert_service.subscribe()
+
+    try:
+        await websocket.send_json({"type": "rules", "rules": alert_service.get_rules()})
+        while True:
+            event = await queue.get()
+            await websocket.send_json({"type": "event", "event": event})
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        await websocket.close()
+        alert_service.unsubscribe(queue)
 
 @router.get("/docker/containers")
 async def get_docker_containers():
     """Docker-Container auflisten"""
-    containers = await monitor_service.get_docker_containers()
-    return containers
+    containers = await docker_service.get_containers()
+    return ORJSONResponse(containers)
+
+@router.get("/docker/containers/stats")
+async def get_docker_container_stats():
+    """Aktuelle Ressourcen-Statistik aller laufenden Container"""
+    return ORJSONResponse(container_stats_service.get_all())
+
+@router.get("/docker/containers/{container_id}/stats")
+async def get_docker_container_stats_history(
+    container_id: str,
+    limit: Optional[int] = Query(default=None, ge=1, description="Anzahl der neuesten Einträge")
+):
+    """Ressourcen-Statistik und Historie eines Containers"""
+    stats = container_stats_service.get_container(container_id, limit)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"Keine Statistik für Container {container_id}")
+    return stats
+
+@router.websocket("/docker/containers/stream")
+async def docker_containers_stream(websocket: WebSocket):
+    """WebSocket für Container-Änderungen (Snapshot, danach Updates; synced = Event-Cache aktiv)"""
+    await websocket.accept()
+    queue = docker_service.subscribe()
+
+    try:
+        containers = await docker_service.get_containers()
+        await websocket.send_json({"type": "snapshot", "synced": docker_service.synced, "containers": containers})
+        while True:
+            message = await queue.get()
+            await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        docker_service.unsubscribe(queue)
+
+@router.post("/docker/containers/bulk")
+async def bulk_control_docker_containers(request: BulkActionRequest):
+    """Aktion auf mehreren Containern parallel ausführen"""
+    result = await docker_service.bulk_action(
+        action=request.action.value,
+        container_ids=request.container_ids,
+        label=request.label,
+        parallelism=request.parallelism
+    )
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result.get("error"))
+
+    return result
+
+@router.websocket("/docker/containers/bulk/progress")
+async def bulk_control_progress(websocket: WebSocket):
+    """WebSocket für Bulk-Aktionen mit Fortschritt pro Container"""
+    await websocket.accept()
+    connected = True
+
+    async def send(message: Dict[str, Any]):
+        # Nach einem Abbruch nichts mehr senden - die Aktion läuft trotzdem zu Ende
+        nonlocal connected
+        if not connected:
+            return
+        try:
+            await websocket.send_json(message)
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            connected = False
+
+    async def progress_callback(entry: Dict[str, Any]):
+        await send(entry)
+
+    try:
+        # Erste Nachricht enthält den Auftrag (wie POST /docker/containers/bulk)
+        request = BulkActionRequest(**await websocket.receive_json())
+        result = await docker_service.bulk_action(
+            action=request.action.value,
+            container_ids=request.container_ids,
+            label=request.label,
+            parallelism=request.parallelism,
+            progress_callback=progress_callback
+        )
+        await send({
+            "complete": True,
+            "result": result
+        })
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+        await send({
+            "error": str(e)
+        })
+
+    if connected:
+        try:
+            await websocket.close()
+        except (RuntimeError, OSError):
+            pass
 
 @router.post("/docker/containers/{container_id}/{action}")
 async def control_docker_container(container_id: str, action: str):
@@ -49,7 +327,7 @@ async def control_docker_container(container_id: str, action: str):
     if action not in ["start", "stop", "restart"]:
         raise HTTPException(status_code=400, detail="Invalid action")
 
-    result = await monitor_service.control_docker_container(container_id, action)
+    result = await docker_service.control_container(container_id, action)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error"))
 
@@ -1,15 +1,94 @@
 """
 Services Module - Initialisierung und Export
+
+Die Singletons werden erst beim ersten Zugriff erzeugt; ein Import wie
+`from server.api.services import monitor_service` lädt weder das
+Service-Modul noch dessen Abhängigkeiten. Die Module heißen bewusst anders
+als die Singletons (monitor.py -> monitor_service), sonst würde ihr Import
+das gleichnamige Paket-Attribut durch das Modul ersetzen.
 """
-from .caddy_service import CaddyService
-from .monitor_service import MonitorService
 
-# Singleton-Instanzen erstellen
-caddy_service = CaddyService()
-monitor_service = MonitorService()
 
-# Zirkuläre Abhängigkeiten auflösen
-monitor_service.set_caddy_service(caddy_service)
+class LazyService:
+    """Platzhalter für einen Singleton, der beim ersten Attributzugriff erzeugt wird"""
+
+    __slots__ = ("_factory", "_instance")
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+
+    def resolve(self):
+        """Instanz erzeugen (einmalig) und zurückgeben"""
+        if self._instance is None:
+            object.__setattr__(self, "_instance", self._factory())
+        return self._instance
+
+    @property
+    def created(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.resolve(), name, value)
+
+
+def _create_alert_service():
+    from .alerts import AlertService
+    return AlertService()
+
+
+def _create_caddy_service():
+    from .caddy import CaddyService
+    return CaddyService()
+
+
+def _create_container_stats_service():
+    from .container_stats import ContainerStatsService
+    service = ContainerStatsService()
+    service.set_docker_service(docker_service)
+    return service
+
+
+def _create_docker_service():
+    from .docker_client import DockerService
+    return DockerService()
+
+
+def _create_loop_monitor_service():
+    from .loop_monitor import LoopMonitorService
+    return LoopMonitorService()
+
+
+def _create_monitor_service():
+    from .monitor import MonitorService
+    service = MonitorService()
+    # Zirkuläre Abhängigkeiten auflösen (Referenzen bleiben selbst lazy)
+    service.set_caddy_service(caddy_service)
+    service.set_docker_service(docker_service)
+    service.set_alert_service(alert_service)
+    return service
+
+
+def _create_worker_service():
+    from .workers import WorkerService
+    service = WorkerService()
+    service.set_monitor_service(monitor_service)
+    service.set_alert_service(alert_service)
+    service.set_container_stats_service(container_stats_service)
+    return service
+
+
+# Singleton-Instanzen (lazy)
+alert_service = LazyService(_create_alert_service)
+caddy_service = LazyService(_create_caddy_service)
+container_stats_service = LazyService(_create_container_stats_service)
+docker_service = LazyService(_create_docker_service)
+loop_monitor_service = LazyService(_create_loop_monitor_service)
+monitor_service = LazyService(_create_monitor_service)
+worker_service = LazyService(_create_worker_service)
 
 # Exportieren
-__all__ = ['caddy_service', 'monitor_service']
\ No newline at end of file
+__all__ = ['alert_service', 'caddy_service', 'container_stats_service', 'docker_service', 'loop_monitor_service', 'monitor_service', 'worker_service']
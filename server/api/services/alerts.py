@@ -0,0 +1,213 @@
+"""
+Alert Service - Schwellwert-Regeln über den Metrik-Snapshots des Monitor-Loops
+"""
+import sys
+from pathlib import Path
+# Projekt-Root zum Python-Path hinzufügen
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+import asyncio
+import operator
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from server.config.settings import settings
+from server.api.services.metrics_store import flatten_metrics
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+# z.B. "cpu.percent > 90 for 60s" oder "services.caddy != running"
+RULE_PATTERN = re.compile(
+    r"^\s*(?P<field>[\w.]+)\s*(?P<op>>=|<=|==|!=|>|<)\s*(?P<value>\S+?)"
+    r"(?:\s+for\s+(?P<duration>\d+(?:\.\d+)?)\s*(?P<unit>ms|s|m|h)?)?\s*$"
+)
+
+
+class AlertRule:
+    """
+    Geparste Regel mit konstantem Zustand: seit wann die Bedingung gilt
+    und ob der Alarm gerade aktiv ist. Ausgewertet wird nur der neue
+    Snapshot, die Historie wird nie erneut gelesen.
+    """
+
+    __slots__ = ("expression", "field", "op", "threshold", "duration",
+                 "pending_since", "firing", "fired_at", "value")
+
+    def __init__(self, expression: str):
+        match = RULE_PATTERN.match(expression)
+        if not match:
+            raise ValueError(f"Ungültige Alarm-Regel: {expression}")
+
+        self.expression = expression.strip()
+        self.field = match["field"]
+        self.op = match["op"]
+        self.threshold = self._parse_value(match["value"])
+        self.duration = float(match["duration"] or 0) * DURATION_UNITS[match["unit"] or "s"]
+
+        if self.op not in ("==", "!=") and not isinstance(self.threshold, float):
+            raise ValueError(f"Vergleich {self.op} braucht einen Zahlenwert: {expression}")
+
+        self.pending_since: Optional[float] = None
+        self.firing = False
+        self.fired_at: Optional[float] = None
+        self.value: Any = None
+
+    @staticmethod
+    def _parse_value(raw: str) -> Any:
+        if raw.lower() in ("true", "false"):
+            return raw.lower() == "true"
+        try:
+            return float(raw)
+        except ValueError:
+            return raw.strip("\"'")
+
+    def matches(self, value: Any) -> bool:
+        """Bedingung für einen Messwert prüfen (fehlende Werte gelten als nicht erfüllt)"""
+        if value is None:
+            return False
+        value = getattr(value, "value", value)
+        try:
+            if isinstance(self.threshold, bool):
+                return OPERATORS[self.op](bool(value), self.threshold)
+            if isinstance(self.threshold, float):
+                return OPERATORS[self.op](float(value), self.threshold)
+            return OPERATORS[self.op](str(value), self.threshold)
+        except (TypeError, ValueError):
+            return False
+
+    def update(self, value: Any, now: float) -> Optional[str]:
+        """Neuen Messwert übernehmen; liefert "firing" / "resolved" bei Zustandswechsel"""
+        self.value = getattr(value, "value", value)
+
+        if not self.matches(value):
+            self.pending_since = None
+            if self.firing:
+                self.firing = False
+                self.fired_at = None
+                return "resolved"
+            return None
+
+        if self.pending_since is None:
+            self.pending_since = now
+        if not self.firing and now - self.pending_since >= self.duration:
+            self.firing = True
+            self.fired_at = now
+            return "firing"
+        return None
+
+    @property
+    def state(self) -> str:
+        if self.firing:
+            return "firing"
+        return "pending" if self.pending_since is not None else "ok"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rule": self.expression,
+            "state": self.state,
+            "value": self.value,
+            "duration": self.duration
+        }
+
+
+class AlertService:
+    def __init__(self):
+        self.rules: List[AlertRule] = []
+        self.events: deque = deque(maxlen=settings.alert_log_size)
+        self._subscribers: List[asyncio.Queue] = []
+        self._next_id = 1
+        # Follower-Worker: Regelzustand des Leaders (None = eigene Regeln)
+        self.shared_rules: Optional[List[Dict[str, Any]]] = None
+
+        for expression in settings.alert_rules:
+            try:
+                self.rules.append(AlertRule(expression))
+            except ValueError as e:
+                print(f"⚠️  {e}")
+
+    def evaluate(self, metrics: Dict[str, Any]):
+        """Snapshot des Monitor-Loops gegen alle Regeln prüfen"""
+        if not self.rules:
+            return
+
+        flat = flatten_metrics(metrics)
+        now = time.monotonic()
+        for rule in self.rules:
+            transition = rule.update(flat.get(rule.field), now)
+            if transition:
+                self._emit(rule, transition)
+
+    def _emit(self, rule: AlertRule, state: str):
+        """Alarm-Ereignis protokollieren und an Abonnenten verteilen"""
+        event = {
+            "id": self._next_id,
+            "rule": rule.expression,
+            "state": state,
+            "value": rule.value,
+            "timestamp": datetime.now().isoformat()
+        }
+        self._next_id += 1
+        self.events.append(event)
+
+        icon = "🚨" if state == "firing" else "✅"
+        print(f"{icon} Alarm {state}: {rule.expression} (Wert: {rule.value})")
+        self._broadcast(event)
+
+    def _broadcast(self, event: Dict[str, Any]):
+        for queue in list(self._subscribers):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    # ============= Mehrere Worker =============
+
+    def export(self) -> Dict[str, Any]:
+        """Regelzustand und Ereignisse für Follower-Worker"""
+        return {"rules": self.get_rules(), "events": list(self.events)}
+
+    def apply_shared(self, state: Dict[str, Any]):
+        """Follower: Zustand des Leaders übernehmen, neue Ereignisse weiterreichen"""
+        self.shared_rules = state["rules"]
+        for event in state["events"]:
+            if event["id"] >= self._next_id:
+                self._next_id = event["id"] + 1
+                self.events.append(event)
+                self._broadcast(event)
+
+    # ============= Subscriber =============
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registriert einen Empfänger für Alarm-Ereignisse"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Entfernt einen Empfänger"""
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    # ============= API =============
+
+    def get_rules(self) -> List[Dict[str, Any]]:
+        """Regeln mit aktuellem Zustand"""
+        if self.shared_rules is not None:
+            return self.shared_rules
+        return [rule.to_dict() for rule in self.rules]
+
+    def get_events(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Neueste Alarm-Ereignisse (älteste zuerst)"""
+        events = list(self.events)
+        return events[-limit:] if limit else events
@@ -14,12 +14,12 @@ import platform
 import subprocess
 import tarfile
 import tempfile
-import psutil
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from enum import Enum
 
 from server.config.settings import settings
+from server.api.services.tracing import tracer, traced
 from shared.utils.paths import CADDY_JSON_CONFIG, CADDY_BINARY, CERTS_DIR, CADDYFILE
 
 class CaddyStatus(str, Enum):
@@ -31,13 +31,27 @@ class CaddyStatus(str, Enum):
 class CaddyService:
     def __init__(self):
         self.process: Optional[subprocess.Popen] = None
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(30.0, connect=10.0, read=30.0),
-            follow_redirects=True
-        )
-
+        # HTTP-Client erst bei Bedarf (das Anlegen des SSL-Kontexts kostet ~100 ms)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_task: Optional[asyncio.Future] = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """HTTP-Client beim ersten Aufruf in einem Thread anlegen, ohne den Event-Loop zu blockieren"""
+        if self._client is None:
+            if self._client_task is None:
+                self._client_task = asyncio.ensure_future(asyncio.to_thread(
+                    httpx.AsyncClient,
+                    timeout=httpx.Timeout(30.0, connect=10.0, read=30.0),
+                    follow_redirects=True
+                ))
+            self._client = await asyncio.shield(self._client_task)
+        return self._client
+
+    @traced("caddy.status")
     async def get_status(self) -> Dict[str, Any]:
         """Caddy-Status abrufen"""
+        import psutil
+
         if not settings.is_caddy_installed:
             return {
                 "status": CaddyStatus.NOT_INSTALLED,
@@ -46,7 +60,9 @@ class CaddyService:
 
         # Prüfe zuerst ob Caddy via Admin API erreichbar ist
         try:
-            response = await self.client.get(f"{settings.caddy_api_url}/config/")
+            client = await self._get_client()
+            with tracer.span("caddy.admin_api", method="GET", path="/config/"):
+                response = await client.get(f"{settings.caddy_api_url}/config/")
             if response.status_code == 200:
                 # Caddy läuft und API ist erreichbar
                 # Versuche PID aus Datei zu lesen
@@ -147,7 +163,8 @@ class CaddyService:
                 await progress_callback("Download startet...", 10)
 
             # Download Caddy
-            async with self.client.stream("GET", url, follow_redirects=True) as response:
+            client = await self._get_client()
+            async with client.stream("GET", url, follow_redirects=True) as response:
                 response.raise_for_status()
                 total_size = int(response.headers.get("content-length", 0))
 
@@ -206,6 +223,7 @@ class CaddyService:
                 "error": f"Installationsfehler: {str(e)}"
             }
 
+    @traced("caddy.install_root_certificate")
     async def install_root_certificate(self, progress_callback=None) -> Dict[str, Any]:
         """Root-Zertifikat für lokale HTTPS-Entwicklung installieren"""
         try:
@@ -213,11 +231,12 @@ class CaddyService:
                 await progress_callback("Installiere Root-Zertifikat...", 95)
 
             # Caddy trust für lokale CA
-            result = subprocess.run(
-                [str(CADDY_BINARY), "trust"],
-                capture_output=True,
-                text=True
-            )
+            with tracer.span("caddy.subprocess", command="trust"):
+                result = subprocess.run(
+                    [str(CADDY_BINARY), "trust"],
+                    capture_output=True,
+                    text=True
+                )
 
             if result.returncode == 0:
                 return {
@@ -236,8 +255,11 @@ class CaddyService:
                 "error": f"Zertifikat-Fehler: {str(e)}"
             }
 
+    @traced("caddy.start")
     async def start(self) -> Dict[str, Any]:
         """Caddy starten"""
+        import psutil
+
         if not settings.is_caddy_installed:
             return {
                 "success": False,
@@ -292,7 +314,7 @@ class CaddyService:
 
                 # Versuche zuerst die einfache Methode
                 try:
-                    with open(log_file, 'a') as log:
+                    with tracer.span("caddy.subprocess", command="run"), open(log_file, 'a') as log:
                         self.process = subprocess.Popen(
                             cmd,
                             stdout=log,
@@ -310,7 +332,7 @@ class CaddyService:
                     try:
                         nohup_cmd = ["/usr/bin/nohup"] + cmd
 
-                        with open(log_file, 'a') as log:
+                        with tracer.span("caddy.subprocess", command="run"), open(log_file, 'a') as log:
                             self.process = subprocess.Popen(
                                 nohup_cmd,
                                 stdout=log,
@@ -324,7 +346,7 @@ class CaddyService:
                         print(f"⚠️ nohup fehlgeschlagen: {e2}, verwende Standard-Methode...")
 
                         # Option 3: Standard-Methode ohne special flags
-                        with open(log_file, 'a') as log:
+                        with tracer.span("caddy.subprocess", command="run"), open(log_file, 'a') as log:
                             self.process = subprocess.Popen(
                                 cmd,
                                 stdout=log,
@@ -339,7 +361,7 @@ class CaddyService:
                 CREATE_NEW_PROCESS_GROUP = 0x00000200
                 DETACHED_PROCESS = 0x00000008
 
-                with open(log_file, 'a') as log:
+                with tracer.span("caddy.subprocess", command="run"), open(log_file, 'a') as log:
                     self.process = subprocess.Popen(
                         [
                             str(CADDY_BINARY),
@@ -357,7 +379,7 @@ class CaddyService:
 
             else:
                 # Linux/Unix: Standard-Methode mit start_new_session
-                with open(log_file, 'a') as log:
+                with tracer.span("caddy.subprocess", command="run"), open(log_file, 'a') as log:
                     self.process = subprocess.Popen(
                         [
                             str(CADDY_BINARY),
@@ -383,7 +405,8 @@ class CaddyService:
             print(f"✅ Caddy gestartet mit PID: {pid}")
 
             # Warte kurz und prüfe Status
-            await asyncio.sleep(2)
+            with tracer.span("caddy.start.wait", seconds=2):
+                await asyncio.sleep(2)
 
             # Prüfe ob Prozess noch läuft
             if self.process.poll() is None:
@@ -443,12 +466,17 @@ class CaddyService:
                 "error": f"Startfehler: {str(e)}"
             }
 
+    @traced("caddy.stop")
     async def stop(self) -> Dict[str, Any]:
         """Caddy stoppen"""
+        import psutil
+
         try:
             # Methode 1: Über Admin API
             try:
-                response = await self.client.post(f"{settings.caddy_api_url}/stop")
+                client = await self._get_client()
+                with tracer.span("caddy.admin_api", method="POST", path="/stop"):
+                    response = await client.post(f"{settings.caddy_api_url}/stop")
                 if response.status_code == 200:
                     # Lösche PID-Datei
                     pid_file = settings.data_dir / "caddy.pid"
@@ -534,6 +562,7 @@ class CaddyService:
                 "error": f"Stoppfehler: {str(e)}"
             }
 
+    @traced("caddy.restart")
     async def restart(self) -> Dict[str, Any]:
         """Caddy neu starten"""
         stop_result = await self.stop()
@@ -544,6 +573,7 @@ class CaddyService:
         await asyncio.sleep(1)
         return await self.start()
 
+    @traced("caddy.create_default_config")
     async def create_default_config(self) -> None:
         """Erstellt eine Standard-Caddy-Konfiguration"""
         # Erstelle Caddyfile mit automatischem HTTPS
@@ -570,11 +600,12 @@ class CaddyService:
 """
 
         CADDYFILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(CADDYFILE, "w") as f:
+        with tracer.span("caddy.file.write", file=CADDYFILE.name), open(CADDYFILE, "w") as f:
             f.write(caddyfile_content)
 
         print(f"✅ Standard Caddyfile mit HTTPS erstellt: {CADDYFILE}")
 
+    @traced("caddy.add_route")
     async def add_route(self, domain: str, upstream: str, path: str = "/") -> Dict[str, Any]:
         """Fügt eine neue Route hinzu"""
         try:
@@ -582,7 +613,7 @@ class CaddyService:
             if not CADDYFILE.exists():
                 await self.create_default_config()
 
-            with open(CADDYFILE, "r") as f:
+            with tracer.span("caddy.file.read", file=CADDYFILE.name), open(CADDYFILE, "r") as f:
                 current_config = f.read()
 
             # Bestimme ob es eine lokale Domain ist
@@ -608,19 +639,20 @@ class CaddyService:
 """
 
             # Schreibe aktualisierte Config
-            with open(CADDYFILE, "w") as f:
+            with tracer.span("caddy.file.write", file=CADDYFILE.name), open(CADDYFILE, "w") as f:
                 f.write(current_config + new_route)
 
             # Reload Caddy wenn es läuft
             status = await self.get_status()
             if status["status"] == CaddyStatus.RUNNING:
                 # Caddy reload
-                result = subprocess.run(
-                    [str(CADDY_BINARY), "reload", "--config", str(CADDYFILE), "--adapter", "caddyfile"],
-                    capture_output=True,
-                    text=True,
-                    cwd=str(settings.project_root)
-                )
+                with tracer.span("caddy.subprocess", command="reload"):
+                    result = subprocess.run(
+                        [str(CADDY_BINARY), "reload", "--config", str(CADDYFILE), "--adapter", "caddyfile"],
+                        capture_output=True,
+                        text=True,
+                        cwd=str(settings.project_root)
+                    )
 
                 if result.returncode != 0:
                     return {
@@ -639,6 +671,7 @@ class CaddyService:
                 "error": f"Fehler beim Hinzufügen der Route: {str(e)}"
             }
 
+    @traced("caddy.remove_route")
     async def remove_route(self, domain: str) -> Dict[str, Any]:
         """Entfernt eine Route"""
         try:
@@ -648,7 +681,7 @@ class CaddyService:
                     "error": f"Caddyfile nicht gefunden"
                 }
 
-            with open(CADDYFILE, "r") as f:
+            with tracer.span("caddy.file.read", file=CADDYFILE.name), open(CADDYFILE, "r") as f:
                 lines = f.readlines()
 
             # Finde und entferne den Domain-Block
@@ -675,18 +708,19 @@ class CaddyService:
                 }
 
             # Schreibe aktualisierte Config
-            with open(CADDYFILE, "w") as f:
+            with tracer.span("caddy.file.write", file=CADDYFILE.name), open(CADDYFILE, "w") as f:
                 f.writelines(new_lines)
 
             # Reload Caddy wenn es läuft
             status = await self.get_status()
             if status["status"] == CaddyStatus.RUNNING:
-                result = subprocess.run(
-                    [str(CADDY_BINARY), "reload", "--config", str(CADDYFILE)],
-                    capture_output=True,
-                    text=True,
-                    cwd=str(settings.project_root)
-                )
+                with tracer.span("caddy.subprocess", command="reload"):
+                    result = subprocess.run(
+                        [str(CADDY_BINARY), "reload", "--config", str(CADDYFILE)],
+                        capture_output=True,
+                        text=True,
+                        cwd=str(settings.project_root)
+                    )
 
                 if result.returncode != 0:
                     return {
@@ -705,6 +739,7 @@ class CaddyService:
                 "error": f"Fehler beim Entfernen der Route: {str(e)}"
             }
 
+    @traced("caddy.get_routes")
     async def get_routes(self) -> List[Dict[str, Any]]:
         """Listet alle konfigurierten Routes auf"""
         routes = []
@@ -713,7 +748,7 @@ class CaddyService:
             return routes
 
         try:
-            with open(CADDYFILE, "r") as f:
+            with tracer.span("caddy.file.read", file=CADDYFILE.name), open(CADDYFILE, "r") as f:
                 lines = f.readlines()
 
             # Parse Caddyfile für Routes (vereinfacht)
@@ -742,6 +777,7 @@ class CaddyService:
         except Exception:
             return []
 
+    @traced("caddy.backup_config")
     async def backup_config(self, name: Optional[str] = None) -> Dict[str, Any]:
         """Sichert die aktuelle Konfiguration"""
         try:
@@ -757,7 +793,8 @@ class CaddyService:
             # Prüfe ob Caddyfile existiert
             if CADDYFILE.exists():
                 import shutil
-                shutil.copy2(CADDYFILE, backup_file)
+                with tracer.span("caddy.file.write", file=backup_file.name):
+                    shutil.copy2(CADDYFILE, backup_file)
 
                 return {
                     "success": True,
@@ -771,7 +808,8 @@ class CaddyService:
 
                 if CADDYFILE.exists():
                     import shutil
-                    shutil.copy2(CADDYFILE, backup_file)
+                    with tracer.span("caddy.file.write", file=backup_file.name):
+                        shutil.copy2(CADDYFILE, backup_file)
 
                     return {
                         "success": True,
@@ -791,6 +829,7 @@ class CaddyService:
                 "error": f"Backup-Fehler: {str(e)}"
             }
 
+    @traced("caddy.restore_config")
     async def restore_config(self, backup_name: str) -> Dict[str, Any]:
         """Stellt eine gesicherte Konfiguration wieder her"""
         try:
@@ -809,27 +848,31 @@ class CaddyService:
             temp_backup = None
             if CADDYFILE.exists():
                 temp_backup = CADDYFILE.with_suffix('.backup.tmp')
-                shutil.copy2(CADDYFILE, temp_backup)
+                with tracer.span("caddy.file.write", file=temp_backup.name):
+                    shutil.copy2(CADDYFILE, temp_backup)
 
             try:
                 # Restore durchführen
-                shutil.copy2(backup_file, CADDYFILE)
+                with tracer.span("caddy.file.write", file=CADDYFILE.name):
+                    shutil.copy2(backup_file, CADDYFILE)
 
                 # Wenn Caddy läuft, Config neu laden
                 status = await self.get_status()
                 if status["status"] == "running":
                     # Caddy reload mit Caddyfile
-                    result = subprocess.run(
-                        [str(CADDY_BINARY), "reload", "--config", str(CADDYFILE), "--adapter", "caddyfile"],
-                        capture_output=True,
-                        text=True,
-                        cwd=str(settings.project_root)
-                    )
+                    with tracer.span("caddy.subprocess", command="reload"):
+                        result = subprocess.run(
+                            [str(CADDY_BINARY), "reload", "--config", str(CADDYFILE), "--adapter", "caddyfile"],
+                            capture_output=True,
+                            text=True,
+                            cwd=str(settings.project_root)
+                        )
 
                     if result.returncode != 0:
                         # Restore der alten Config bei Fehler
                         if temp_backup and temp_backup.exists():
-                            shutil.copy2(temp_backup, CADDYFILE)
+                            with tracer.span("caddy.file.write", file=CADDYFILE.name):
+                                shutil.copy2(temp_backup, CADDYFILE)
                             temp_backup.unlink()
 
                         return {
@@ -849,7 +892,8 @@ class CaddyService:
             except Exception as e:
                 # Restore der alten Config bei Fehler
                 if temp_backup and temp_backup.exists():
-                    shutil.copy2(temp_backup, CADDYFILE)
+                    with tracer.span("caddy.file.write", file=CADDYFILE.name):
+                        shutil.copy2(temp_backup, CADDYFILE)
                     temp_backup.unlink()
 
                 return {
@@ -890,6 +934,7 @@ class CaddyService:
             print(f"Fehler beim Auflisten der Backups: {e}")
             return []
 
+    @traced("caddy.restore_config")
     async def restore_config(self, backup_name: str) -> Dict[str, Any]:
         """Stellt eine gesicherte Konfiguration wieder her"""
         try:
@@ -903,18 +948,20 @@ class CaddyService:
 
             # GEÄNDERT: Restore der Caddyfile statt JSON
             import shutil
-            shutil.copy2(backup_file, CADDYFILE)
+            with tracer.span("caddy.file.write", file=CADDYFILE.name):
+                shutil.copy2(backup_file, CADDYFILE)
 
             # Wenn Caddy läuft, Config neu laden
             status = await self.get_status()
             if status["status"] == CaddyStatus.RUNNING:
                 # Caddy reload mit Caddyfile
-                result = subprocess.run(
-                    [str(CADDY_BINARY), "reload", "--config", str(CADDYFILE), "--adapter", "caddyfile"],
-                    capture_output=True,
-                    text=True,
-                    cwd=str(settings.project_root)
-                )
+                with tracer.span("caddy.subprocess", command="reload"):
+                    result = subprocess.run(
+                        [str(CADDY_BINARY), "reload", "--config", str(CADDYFILE), "--adapter", "caddyfile"],
+                        capture_output=True,
+                        text=True,
+                        cwd=str(settings.project_root)
+                    )
 
                 if result.returncode != 0:
                     return {
@@ -0,0 +1,320 @@
+"""
+Container-Statistik - CPU, Speicher und I/O-Raten pro Container
+"""
+import sys
+from pathlib import Path
+# Projekt-Root zum Python-Path hinzufügen
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from server.config.settings import settings
+from server.api.services.metrics_store import MetricsRingBuffer, NAN, decode_value
+from shared.utils.metrics import unflatten
+
+# Felder der Container-Historie (Punkt-Notation wie im Statistik-JSON)
+CONTAINER_FIELDS = (
+    "cpu.percent",
+    "memory.usage", "memory.limit", "memory.percent",
+    "network.rx_bytes_per_sec", "network.tx_bytes_per_sec",
+    "block.read_bytes_per_sec", "block.write_bytes_per_sec",
+    "pids",
+)
+
+# Längste Pause (s) zwischen Versuchen, solange Docker nicht erreichbar ist
+MAX_BACKOFF = 300.0
+
+# Ab dieser Daemon-API-Version versteht stats() one_shot (ältere: InvalidVersion)
+ONE_SHOT_MIN_API = "1.41"
+
+# Felder, die im JSON als Ganzzahl ausgegeben werden
+CONTAINER_INTEGER_FIELDS = {"memory.usage", "memory.limit", "pids"}
+
+
+def _rate(current: Optional[int], previous: Optional[int], elapsed: float) -> Optional[float]:
+    """Rate pro Sekunde aus zwei Zählerständen (None nach Zähler-Reset)"""
+    if current is None or previous is None or elapsed <= 0 or current < previous:
+        return None
+    return round((current - previous) / elapsed, 2)
+
+
+def parse_stats(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Kumulative Zähler und Momentanwerte aus der Docker-Stats-Antwort lesen"""
+    cpu = raw.get("cpu_stats") or {}
+    usage = cpu.get("cpu_usage") or {}
+    online_cpus = cpu.get("online_cpus") or len(usage.get("percpu_usage") or []) or 1
+
+    memory = raw.get("memory_stats") or {}
+    details = memory.get("stats") or {}
+    # Page-Cache abziehen wie "docker stats" (cgroup v2: inactive_file, v1: total_inactive_file)
+    cache = details.get("inactive_file", details.get("total_inactive_file", 0))
+    memory_usage = memory.get("usage")
+    if memory_usage is not None:
+        memory_usage = max(0, memory_usage - cache)
+
+    networks = raw.get("networks") or {}
+    io = (raw.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+
+    return {
+        "cpu_total": usage.get("total_usage"),
+        "cpu_system": cpu.get("system_cpu_usage"),
+        "online_cpus": online_cpus,
+        "memory_usage": memory_usage,
+        "memory_limit": memory.get("limit"),
+        "rx_bytes": sum(n.get("rx_bytes", 0) for n in networks.values()) if networks else None,
+        "tx_bytes": sum(n.get("tx_bytes", 0) for n in networks.values()) if networks else None,
+        "read_bytes": sum(e.get("value", 0) for e in io if str(e.get("op", "")).lower() == "read"),
+        "write_bytes": sum(e.get("value", 0) for e in io if str(e.get("op", "")).lower() == "write"),
+        "pids": (raw.get("pids_stats") or {}).get("current"),
+    }
+
+
+def compute_sample(current: Dict[str, Any], previous: Optional[Dict[str, Any]],
+                   elapsed: float) -> Dict[str, Any]:
+    """Raten und CPU-Anteil aus zwei aufeinanderfolgenden Messungen berechnen"""
+    previous = previous or {}
+
+    cpu_percent = None
+    cpu_delta = _rate(current["cpu_total"], previous.get("cpu_total"), 1)
+    system_delta = _rate(current["cpu_system"], previous.get("cpu_system"), 1)
+    if cpu_delta is not None and system_delta:
+        cpu_percent = round(cpu_delta / system_delta * current["online_cpus"] * 100, 2)
+
+    memory_percent = None
+    if current["memory_usage"] is not None and current["memory_limit"]:
+        memory_percent = round(current["memory_usage"] / current["memory_limit"] * 100, 2)
+
+    return {
+        "cpu": {"percent": cpu_percent},
+        "memory": {
+            "usage": current["memory_usage"],
+            "limit": current["memory_limit"],
+            "percent": memory_percent
+        },
+        "network": {
+            "rx_bytes_per_sec": _rate(current["rx_bytes"], previous.get("rx_bytes"), elapsed),
+            "tx_bytes_per_sec": _rate(current["tx_bytes"], previous.get("tx_bytes"), elapsed)
+        },
+        "block": {
+            "read_bytes_per_sec": _rate(current["read_bytes"], previous.get("read_bytes"), elapsed),
+            "write_bytes_per_sec": _rate(current["write_bytes"], previous.get("write_bytes"), elapsed)
+        },
+        "pids": current["pids"]
+    }
+
+
+class ContainerStatsService:
+    """
+    Sammelt Ressourcen-Statistiken aller laufenden Container.
+
+    Statt pro Container einen Thread mit stats(stream=True) offen zu halten,
+    wird jeder Container pro Intervall einmal mit stats(stream=False,
+    one_shot=True) abgefragt (Daemon-API < 1.41: ohne one_shot). Die Aufrufe laufen im gemeinsamen
+    Docker-Executor, die Anzahl gleichzeitiger Abfragen ist begrenzt.
+    Raten entstehen aus der Differenz zur vorherigen Messung.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        # Kurze Container-ID -> (Zeitpunkt, Zählerstände der letzten Messung)
+        self._previous: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.current: Dict[str, Dict[str, Any]] = {}
+        self.history: Dict[str, MetricsRingBuffer] = {}
+        self.last_duration_ms: Optional[float] = None
+        # (Client, stats()-Optionen) - einmal pro Client aus der API-Version bestimmt
+        self._stats_options: Optional[Tuple[Any, Dict[str, Any]]] = None
+
+    def set_docker_service(self, service):
+        """Setzt die Docker-Service Referenz"""
+        self._docker_service = service
+
+    async def start(self):
+        """Startet den Sammel-Task"""
+        if not settings.docker_stats_enabled:
+            return
+        if self.task and not self.task.done():
+            return
+        self.task = asyncio.create_task(self._collect_loop())
+
+    async def stop(self):
+        """Stoppt den Sammel-Task"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _collect_loop(self):
+        """
+        Hauptschleife: alle laufenden Container pro Intervall abfragen.
+
+        Abgefragt wird nur bei erreichbarem Daemon (Event-Cache aktiv oder
+        Client verbunden); sonst wird der Verbindungsaufbau mit exponentiell
+        wachsender Pause wiederholt und nur der erste Fehlschlag gemeldet.
+        """
+        failures = 0
+        while True:
+            try:
+                if not self._docker_service.connected:
+                    await self._docker_service.connect()
+                await self.collect()
+                if failures:
+                    print("🐳 Container-Statistik: Docker wieder erreichbar")
+                failures = 0
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                failures += 1
+                if failures == 1:
+                    print(f"Container-Statistik pausiert, Docker nicht erreichbar: {e or type(e).__name__}")
+
+            delay = min(settings.docker_stats_interval * 2 ** failures, MAX_BACKOFF) if failures else settings.docker_stats_interval
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                break
+
+    def _fetch_stats(self, container_id: str) -> Dict[str, Any]:
+        """Eine Statistik-Momentaufnahme laden (blockierend, läuft im Docker-Executor)"""
+        client = self._docker_service._get_client()
+        return client.api.stats(container_id, stream=False, **self._options_for(client))
+
+    def _options_for(self, client) -> Dict[str, Any]:
+        """stats()-Optionen passend zur API-Version des Clients (nach Neuaufbau neu geprüft)"""
+        cached = self._stats_options
+        if cached and cached[0] is client:
+            return cached[1]
+        from docker.utils import version_lt
+        options = {} if version_lt(client.api._version, ONE_SHOT_MIN_API) else {"one_shot": True}
+        if not options:
+            print(f"🐳 Docker-API {client.api._version} < {ONE_SHOT_MIN_API}: Container-Statistik ohne one_shot")
+        self._stats_options = (client, options)
+        return options
+
+    async def collect(self):
+        """Statistiken aller laufenden Container einmal abfragen"""
+        containers = await self._docker_service.get_containers()
+        running = {c["id"]: c for c in containers if c.get("status") == "running"}
+
+        # Gestoppte oder gelöschte Container verwerfen
+        for container_id in list(self.current):
+            if container_id not in running:
+                self.current.pop(container_id, None)
+                self._previous.pop(container_id, None)
+        known = {c["id"] for c in containers}
+        for container_id in list(self.history):
+            if container_id not in known:
+                self.history.pop(container_id, None)
+
+        semaphore = asyncio.Semaphore(min(settings.docker_stats_concurrency, settings.docker_max_workers))
+        started = time.perf_counter()
+
+        async def sample(container_id: str):
+            async with semaphore:
+                try:
+                    raw = await self._docker_service.run(self._fetch_stats, container_id)
+                except Exception as e:
+                    print(f"Container-Statistik für {container_id} fehlgeschlagen: {e}")
+                    return
+            self._record(container_id, raw)
+
+        await asyncio.gather(*(sample(container_id) for container_id in running))
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def _record(self, container_id: str, raw: Dict[str, Any]):
+        """Messung auswerten und in Momentanwert und Historie übernehmen"""
+        now = time.time()
+        current = parse_stats(raw)
+        previous = self._previous.get(container_id)
+        elapsed = now - previous[0] if previous else 0
+        sample = compute_sample(current, previous[1] if previous else None, elapsed)
+        self._previous[container_id] = (now, current)
+
+        sample["timestamp"] = int(now * 1000)
+        self.current[container_id] = sample
+        self._append_history(container_id, sample)
+
+    def _append_history(self, container_id: str, sample: Dict[str, Any]):
+        """Messung in den Ringpuffer des Containers schreiben"""
+        buffer = self.history.get(container_id)
+        if buffer is None:
+            buffer = self.history[container_id] = MetricsRingBuffer(
+                CONTAINER_FIELDS, settings.docker_stats_history_size
+            )
+        values = []
+        for field in CONTAINER_FIELDS:
+            value = sample
+            for part in field.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            values.append(NAN if value is None else float(value))
+        buffer.append(sample["timestamp"], values)
+
+    # ============= Mehrere Worker =============
+
+    def export(self) -> Dict[str, Any]:
+        """Aktuelle Messungen und bekannte Container für Follower-Worker"""
+        return {**self.get_all(), "known": list(self.history)}
+
+    def apply_shared(self, state: Dict[str, Any]):
+        """
+        Follower: Messungen des Leaders übernehmen. Neue Messungen werden
+        in die eigene Historie geschrieben, ohne Docker selbst abzufragen.
+        """
+        containers = state["containers"]
+        for container_id, sample in containers.items():
+            previous = self.current.get(container_id)
+            if previous is None or sample["timestamp"] > previous["timestamp"]:
+                self.current[container_id] = sample
+                self._append_history(container_id, sample)
+
+        for container_id in list(self.current):
+            if container_id not in containers:
+                self.current.pop(container_id, None)
+        known = set(state["known"])
+        for container_id in list(self.history):
+            if container_id not in known:
+                self.history.pop(container_id, None)
+        self.last_duration_ms = state["duration_ms"]
+
+    # ============= Container-API =============
+
+    def get_all(self) -> Dict[str, Any]:
+        """Aktuelle Statistik aller laufenden Container"""
+        return {
+            "containers": self.current,
+            "duration_ms": self.last_duration_ms
+        }
+
+    def get_container(self, container_id: str, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Aktuelle Statistik und Historie eines Containers (None wenn unbekannt)"""
+        key = self._resolve(container_id)
+        if key is None:
+            return None
+
+        history = []
+        buffer = self.history.get(key)
+        if buffer is not None:
+            timestamps, columns = buffer.slice(fields=CONTAINER_FIELDS, limit=limit)
+            for i, timestamp in enumerate(timestamps):
+                flat = {}
+                for field in CONTAINER_FIELDS:
+                    value = decode_value(field, columns[field][i])
+                    flat[field] = int(value) if value is not None and field in CONTAINER_INTEGER_FIELDS else value
+                history.append({"timestamp": timestamp, **unflatten(flat)})
+
+        return {
+            "id": key,
+            "current": self.current.get(key),
+            "history": history
+        }
+
+    def _resolve(self, container_id: str) -> Optional[str]:
+        """Kurze oder volle Container-ID auf den Tabellen-Schlüssel abbilden"""
+        for key in self.history:
+            if key.startswith(container_id[:12]):
+                return key
+        return None
@@ -0,0 +1,533 @@
+"""
+Docker Service - Container-Verwaltung mit Event-basiertem Cache
+"""
+import sys
+from pathlib import Path
+# Projekt-Root zum Python-Path hinzufügen
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable
+
+from server.config.settings import settings
+
+# Container-Events, die den Zustand eines Containers verändern
+STATE_ACTIONS = {
+    "create", "start", "restart", "stop", "die", "kill",
+    "pause", "unpause", "rename", "update", "oom"
+}
+
+_CLIENT_ERRORS: Optional[tuple] = None
+
+
+def _client_errors() -> tuple:
+    """Fehlerklassen, nach denen der Client neu aufgebaut wird (docker/requests lazy importiert)"""
+    global _CLIENT_ERRORS
+    if _CLIENT_ERRORS is None:
+        try:
+            from docker.errors import DockerException
+            from requests.exceptions import ConnectionError, ReadTimeout
+            _CLIENT_ERRORS = (DockerException, ConnectionError, ReadTimeout)
+        except ImportError:
+            _CLIENT_ERRORS = ()
+    return _CLIENT_ERRORS
+
+
+class DockerService:
+    def __init__(self):
+        # Container-Tabelle: volle Container-ID -> formatierter Eintrag
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self.synced = False
+        self.last_sync: Optional[float] = None
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: List[asyncio.Queue] = []
+        self._events_thread: Optional[threading.Thread] = None
+        self._events_stream = None
+        self._stop_event = threading.Event()
+        # Image-ID -> erster Tag (None für ungetaggte Images)
+        self._image_names: Dict[str, Optional[str]] = {}
+        # Begrenzter Thread-Pool für alle synchronen Docker-SDK-Aufrufe (lazy, nach stop() neu)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def _create_client(self):
+        """Docker-Client erzeugen (Docker Desktop Socket bevorzugt)"""
+        import docker
+
+        # Socket-Pfad für Docker Desktop
+        socket_paths = [
+            f"unix:///Users/{os.environ.get('USER', 'alpha')}/.docker/run/docker.sock",
+            "unix:///var/run/docker.sock",
+        ]
+
+        # Ein Pool-Slot pro Executor-Worker, sonst verwirft urllib3 Verbindungen bei parallelen Aufrufen
+        options = {"timeout": int(settings.docker_call_timeout), "max_pool_size": settings.docker_max_workers}
+
+        for socket_path in socket_paths:
+            try:
+                client = docker.DockerClient(base_url=socket_path, **options)
+                client.ping()  # Test ob Verbindung funktioniert
+                return client
+            except:
+                continue
+
+        # Fallback: from_env()
+        return docker.from_env(**options)
+
+    def _refresh_image_cache(self, client):
+        """Image-ID -> Tag-Cache mit einem einzigen /images/json-Aufruf neu laden"""
+        self._image_names = {
+            image["Id"]: (image.get("RepoTags") or [None])[0]
+            for image in client.api.images(all=True)
+        }
+
+    def _image_name(self, summary: Dict[str, Any]) -> str:
+        """Anzeigename des Images aus dem Cache"""
+        image_id = summary.get("ImageID", "")
+        name = self._image_names.get(image_id)
+        if name and name != "<none>:<none>":
+            return name
+        # Kein Tag vorhanden - kurze Image-ID wie docker-py (sha256:xxxxxxxxxx)
+        return image_id[:17] if image_id.startswith("sha256:") else image_id[:10]
+
+    def _format_summary(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Container-Zusammenfassung aus /containers/json in API-Format umwandeln"""
+        # Ports formatieren
+        ports_dict = {}
+        for port in summary.get("Ports") or []:
+            if port.get("PublicPort"):
+                ports_dict.setdefault(f"{port['PrivatePort']}/{port['Type']}", f"{port['PublicPort']}")
+
+        names = summary.get("Names") or [""]
+        created = datetime.fromtimestamp(summary.get("Created", 0), tz=timezone.utc)
+
+        return {
+            "id": summary["Id"][:12],
+            "name": names[0].lstrip("/"),
+            "image": self._image_name(summary),
+            "status": summary.get("State", "unknown"),
+            "created": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "ports": ports_dict
+        }
+
+    def _format_summaries(self, client, summaries: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Zusammenfassungen formatieren, Image-Cache nur bei unbekannten IDs laden"""
+        unknown = {s.get("ImageID") for s in summaries} - self._image_names.keys()
+        if unknown:
+            self._refresh_image_cache(client)
+            # Gelöschte Images merken, damit sie keinen erneuten Refresh auslösen
+            for image_id in unknown - self._image_names.keys():
+                self._image_names[image_id] = None
+        return {summary["Id"]: self._format_summary(summary) for summary in summaries}
+
+    def _fetch_all(self, client) -> Dict[str, Dict[str, Any]]:
+        """Alle Container mit einem einzigen Low-Level-Aufruf laden"""
+        return self._format_summaries(client, client.api.containers(all=True))
+
+    def _fetch_one(self, client, container_id: str) -> Optional[Dict[str, Any]]:
+        """Einzelnen Container laden (None wenn nicht vorhanden)"""
+        summaries = client.api.containers(all=True, filters={"id": container_id})
+        return self._format_summaries(client, summaries).get(container_id)
+
+    # ============= Docker-Executor =============
+
+    def _get_client(self):
+        """Gemeinsamer Client für Executor-Aufrufe (lazy erzeugt)"""
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._create_client()
+            return self._client
+
+    def _reset_client(self):
+        """Gemeinsamen Client verwerfen (z.B. nach Verbindungsfehler)"""
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    @property
+    def connected(self) -> bool:
+        """Event-Cache aktiv oder gemeinsamer Client mit erfolgreichem Verbindungsaufbau vorhanden"""
+        return self.synced or self._client is not None
+
+    async def connect(self):
+        """Gemeinsamen Client aufbauen (wirft, wenn der Daemon nicht erreichbar ist)"""
+        await self.run(self._get_client)
+
+    def _call(self, func: Callable, *args):
+        """Wrapper im Worker-Thread: Client bei Verbindungsfehlern neu aufbauen"""
+        try:
+            return func(*args)
+        except Exception as e:
+            if isinstance(e, _client_errors()):
+                self._reset_client()
+            raise
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Docker-Executor, nach stop() (z.B. zweiter Lifespan im selben Prozess) neu angelegt"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.docker_max_workers,
+                thread_name_prefix="docker"
+            )
+        return self._executor
+
+    async def run(self, func: Callable, *args):
+        """
+        Blockierenden Docker-Aufruf im begrenzten Docker-Executor ausführen.
+
+        Wartende Aufrufe lassen sich abbrechen, bevor sie einen Worker
+        belegen. Eine Frist pro Aufruf gibt es nicht: docker_call_timeout
+        ist das Socket-Timeout des Clients und greift nur, wenn der Daemon
+        so lange nicht antwortet.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self._call, func, *args)
+
+    @staticmethod
+    def _is_timeout(error: Exception) -> bool:
+        """Socket-Timeout des Clients (requests ReadTimeout/ConnectTimeout)"""
+        try:
+            from requests.exceptions import Timeout
+        except ImportError:
+            return False
+        return isinstance(error, Timeout)
+
+    # ============= Event-Stream =============
+
+    async def start(self):
+        """Startet den Event-Consumer im Hintergrund"""
+        if not settings.docker_events_enabled:
+            return
+        if self._events_thread and self._events_thread.is_alive():
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._stop_event.clear()
+        self._events_thread = threading.Thread(
+            target=self._consume_events,
+            name="docker-events",
+            daemon=True
+        )
+        self._events_thread.start()
+
+    async def stop(self):
+        """Stoppt den Event-Consumer"""
+        self._stop_event.set()
+        stream = self._events_stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+        if self._events_thread:
+            await asyncio.to_thread(self._events_thread.join, 2)
+            self._events_thread = None
+
+        # Wartende Aufrufe verwerfen, laufende nicht blockierend beenden lassen
+        executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._reset_client()
+
+    def _consume_events(self):
+        """
+        Liest den Docker-Event-Stream und pflegt die Container-Tabelle.
+
+        Gemeldet wird nur der Zustandswechsel: der erste Fehlschlag und die
+        Wiederverbindung - die Versuche im Backoff dazwischen bleiben still.
+        """
+        backoff = 1
+        failing = False
+        while not self._stop_event.is_set():
+            client = None
+            try:
+                client = self._create_client()
+
+                # Erst abonnieren, dann synchronisieren - so geht kein Event verloren
+                self._events_stream = client.events(
+                    decode=True,
+                    filters={"type": "container"},
+                    since=int(time.time())
+                )
+                self._resync(client)
+                backoff = 1
+                if failing:
+                    print("🐳 Docker Event-Stream wieder verbunden")
+                    failing = False
+
+                for event in self._events_stream:
+                    if self._stop_event.is_set():
+                        break
+                    self._handle_event(client, event)
+
+            except ImportError:
+                print("Docker Python-Bibliothek nicht installiert")
+                return
+            except Exception as e:
+                if not self._stop_event.is_set() and not failing:
+                    print(f"Docker Event-Stream Fehler: {e}")
+                failing = True
+            finally:
+                self._events_stream = None
+                self._set_synced(False)
+                if client:
+                    try:
+                        client.close()
+                    except Exception:
+                        pass
+
+            # Daemon nicht erreichbar - mit Backoff neu verbinden
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _resync(self, client):
+        """Container-Tabelle komplett neu aufbauen"""
+        table = self._fetch_all(client)
+        with self._lock:
+            self.containers = table
+            self.synced = True
+            self.last_sync = time.time()
+        self._notify({"type": "snapshot", "synced": True, "containers": list(table.values())})
+
+    def _set_synced(self, synced: bool):
+        with self._lock:
+            lost = self.synced and not synced
+            self.synced = synced
+        if lost:
+            # Empfänger fallen auf Polling zurück, bis der nächste Snapshot kommt
+            self._notify({"type": "state", "synced": False})
+
+    def _handle_event(self, client, event: Dict[str, Any]):
+        """Einzelnes Container-Event auf die Tabelle anwenden"""
+        action = event.get("Action") or event.get("status") or ""
+        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+        if not container_id:
+            return
+
+        if action == "destroy":
+            with self._lock:
+                entry = self.containers.pop(container_id, None)
+            if entry:
+                self._notify({"type": "remove", "id": entry["id"]})
+            return
+
+        if action not in STATE_ACTIONS:
+            return
+
+        entry = self._fetch_one(client, container_id)
+        if entry is None:
+            # Container existiert nicht mehr
+            with self._lock:
+                entry = self.containers.pop(container_id, None)
+            if entry:
+                self._notify({"type": "remove", "id": entry["id"]})
+            return
+
+        with self._lock:
+            self.containers[container_id] = entry
+        self._notify({"type": "update", "container": entry})
+
+    # ============= Subscriber =============
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registriert einen Empfänger für Container-Änderungen"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Entfernt einen Empfänger"""
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def _notify(self, message: Dict[str, Any]):
+        """Änderung thread-sicher an den Event-Loop übergeben"""
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._publish, message)
+
+    def _publish(self, message: Dict[str, Any]):
+        """Änderung an alle Empfänger verteilen (läuft im Event-Loop)"""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Langsamer Empfänger - Snapshot erzwingt Neuaufbau
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "snapshot", "containers": self.get_cached_containers()})
+
+    # ============= Container-API =============
+
+    def get_cached_containers(self) -> List[Dict[str, Any]]:
+        """Container aus der Tabelle (ohne Daemon-Zugriff)"""
+        with self._lock:
+            return list(self.containers.values())
+
+    async def get_containers(self) -> List[Dict[str, Any]]:
+        """Liste der Docker-Container"""
+        if self.synced:
+            return self.get_cached_containers()
+
+        # Kein Event-Stream aktiv - direkt vom Daemon laden
+        containers = []
+        try:
+            table = await self.run(lambda: self._fetch_all(self._get_client()))
+            containers = list(table.values())
+
+        except ImportError:
+            print("Docker Python-Bibliothek nicht installiert")
+        except Exception as e:
+            if self._is_timeout(e):
+                print("Docker Container Error: Zeitüberschreitung")
+            else:
+                print(f"Docker Container Error: {e}")
+
+        return containers
+
+    def _control_sync(self, container_id: str, action: str) -> str:
+        """Container-Aktion ausführen (blockierend, läuft im Docker-Executor)"""
+        container = self._get_client().containers.get(container_id)
+
+        if action == "start":
+            container.start()
+            return f"Container {container.name} gestartet"
+        if action == "stop":
+            container.stop()
+            return f"Container {container.name} gestoppt"
+        container.restart()
+        return f"Container {container.name} neu gestartet"
+
+    async def control_container(self, container_id: str, action: str) -> Dict[str, Any]:
+        """Steuert Docker-Container (start/stop/restart)"""
+        if action not in ("start", "stop", "restart"):
+            return {
+                "success": False,
+                "error": f"Unbekannte Aktion: {action}"
+            }
+
+        try:
+            message = await self.run(self._control_sync, container_id, action)
+            return {
+                "success": True,
+                "message": message
+            }
+
+        except Exception as e:
+            if self._is_timeout(e):
+                return {
+                    "success": False,
+                    "error": f"Docker-Fehler: Zeitüberschreitung nach {settings.docker_call_timeout}s"
+                }
+            return {
+                "success": False,
+                "error": f"Docker-Fehler: {str(e)}"
+            }
+
+    def _resolve_targets_sync(self, container_ids: Optional[List[str]], label: Optional[str]) -> List[str]:
+        """Ziel-Container über IDs und/oder Label-Selektor ermitteln"""
+        targets = list(container_ids or [])
+        if label:
+            summaries = self._get_client().api.containers(all=True, filters={"label": label})
+            targets.extend(summary["Id"] for summary in summaries)
+        # Duplikate entfernen, Reihenfolge beibehalten
+        return list(dict.fromkeys(targets))
+
+    async def bulk_action(self, action: str, container_ids: Optional[List[str]] = None,
+                          label: Optional[str] = None, parallelism: Optional[int] = None,
+                          progress_callback=None) -> Dict[str, Any]:
+        """Aktion parallel auf mehreren Containern ausführen"""
+        try:
+            targets = await self.run(self._resolve_targets_sync, container_ids, label)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Docker-Fehler: {str(e)}"
+            }
+
+        # Parallelität begrenzen - mehr als der Executor erlaubt bringt nichts
+        limit = min(parallelism or settings.docker_bulk_parallelism, settings.docker_max_workers)
+        semaphore = asyncio.Semaphore(limit)
+
+        async def execute(container_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                if progress_callback:
+                    await progress_callback({"id": container_id[:12], "state": "running"})
+
+                started = time.perf_counter()
+                result = await self.control_container(container_id, action)
+                entry = {
+                    "id": container_id[:12],
+                    "state": "done" if result["success"] else "failed",
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "message": result.get("message") or result.get("error")
+                }
+
+                if progress_callback:
+                    await progress_callback(entry)
+                return entry
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(execute(cid) for cid in targets))
+        succeeded = sum(1 for entry in results if entry["state"] == "done")
+
+        return {
+            "success": succeeded == len(results),
+            "message": f"{succeeded}/{len(results)} Container: {action} erfolgreich",
+            "data": {
+                "results": results,
+                "parallelism": limit,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        }
+
+    def _probe_status(self) -> bool:
+        """Prüft ob Docker läuft (blockierend, läuft im Docker-Executor)"""
+        import psutil
+
+        # Methode 1: Prüfe Docker Desktop Prozess (macOS)
+        for proc in psutil.process_iter(['name', 'cmdline']):
+            try:
+                # Docker Desktop auf macOS
+                if 'Docker Desktop' in proc.info['name']:
+                    return True
+                # Docker Backend Service
+                if 'com.docker.backend' in proc.info['name']:
+                    return True
+                # Prüfe cmdline für Docker Desktop
+                cmdline = proc.info.get('cmdline', [])
+                if cmdline and any('Docker' in str(arg) and 'Desktop' in str(arg) for arg in cmdline):
+                    return True
+            except (psutil.NoSuchProcess, psutil.AccessDenied, TypeError):
+                continue
+
+        # Methode 2: Versuche Docker API zu erreichen
+        try:
+            self._get_client().ping()
+            return True
+        except:
+            self._reset_client()
+
+        return False
+
+    async def check_status(self) -> bool:
+        """Prüft ob Docker läuft"""
+        # Aktiver Event-Stream beweist einen erreichbaren Daemon
+        if self.synced:
+            return True
+
+        try:
+            return await self.run(self._probe_status)
+        except Exception as e:
+            print(f"Docker Status Check Error: {e}")
+            return False
@@ -0,0 +1,93 @@
+"""
+I/O-Raten - Durchsatz aus kumulativen Netzwerk- und Disk-Zählern
+"""
+import time
+from typing import Dict, Any, Optional
+
+# psutil-Zählerfeld -> Name der Rate
+NIC_RATES = {
+    "bytes_sent": "bytes_sent_per_sec",
+    "bytes_recv": "bytes_recv_per_sec",
+    "packets_sent": "packets_sent_per_sec",
+    "packets_recv": "packets_recv_per_sec",
+}
+DISK_RATES = {
+    "read_count": "read_iops",
+    "write_count": "write_iops",
+    "read_bytes": "read_bytes_per_sec",
+    "write_bytes": "write_bytes_per_sec",
+}
+
+
+def counter_delta(current: int, previous: Optional[int]) -> Optional[int]:
+    """
+    Differenz zweier Zählerstände mit Überlauf-Behandlung.
+
+    Ein kleinerer aktueller Wert gilt als Überlauf eines 32- oder 64-Bit-
+    Zählers. Wäre die Differenz dabei größer als der halbe Wertebereich,
+    wurde der Zähler zurückgesetzt (z.B. Interface neu angelegt) - dann
+    gibt es für dieses Intervall keinen Wert.
+    """
+    if previous is None:
+        return None
+    if current >= previous:
+        return current - previous
+    for bits in (32, 64):
+        limit = 1 << bits
+        if previous < limit:
+            delta = current + limit - previous
+            return delta if delta < limit // 2 else None
+    return None
+
+
+class CounterRates:
+    """
+    Raten pro Gerät (NIC oder Disk) aus zwei aufeinanderfolgenden Messungen.
+
+    Aufrufe in kürzerem Abstand als min_interval liefern die zuletzt
+    berechneten Raten, damit zusätzliche Abfragen (z.B. GET /metrics)
+    die Messung des Monitor-Loops nicht verrauschen.
+    """
+
+    def __init__(self, fields: Dict[str, str], min_interval: float = 0.5):
+        self.fields = fields
+        self.min_interval = min_interval
+        self._previous: Dict[str, Dict[str, int]] = {}
+        self._time: Optional[float] = None
+        self._rates: Dict[str, Dict[str, Optional[float]]] = {}
+
+    def update(self, counters: Optional[Dict[str, Any]], now: Optional[float] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """Neue Zählerstände (psutil namedtuples pro Gerät) übernehmen, Raten liefern"""
+        now = now if now is not None else time.monotonic()
+        if not counters:
+            return {}
+        if self._time is not None and now - self._time < self.min_interval:
+            return self._rates
+
+        elapsed = now - self._time if self._time is not None else 0
+        rates: Dict[str, Dict[str, Optional[float]]] = {}
+        current_values: Dict[str, Dict[str, int]] = {}
+
+        for device, counter in counters.items():
+            values = {field: getattr(counter, field) for field in self.fields}
+            current_values[device] = values
+            previous = self._previous.get(device, {})
+
+            device_rates = {}
+            for field, name in self.fields.items():
+                delta = counter_delta(values[field], previous.get(field))
+                device_rates[name] = round(delta / elapsed, 2) if delta is not None and elapsed > 0 else None
+            rates[device] = device_rates
+
+        self._previous = current_values
+        self._time = now
+        self._rates = rates
+        return rates
+
+    def totals(self, rates: Dict[str, Dict[str, Optional[float]]]) -> Dict[str, Optional[float]]:
+        """Summe über alle Geräte (None solange noch keine Rate vorliegt)"""
+        totals: Dict[str, Optional[float]] = {}
+        for name in self.fields.values():
+            values = [device[name] for device in rates.values() if device.get(name) is not None]
+            totals[name] = round(sum(values), 2) if values else None
+        return totals
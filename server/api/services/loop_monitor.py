@@ -0,0 +1,202 @@
+"""
+Event-Loop-Monitor - Scheduling-Verzögerung und blockierende Aufrufe im Event-Loop
+"""
+import sys
+from pathlib import Path
+# Projekt-Root zum Python-Path hinzufügen
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from server.config.settings import settings
+from server.api.services.profiler import collapse_stack, frame_label
+from server.api.services.request_stats import WINDOWS, LatencyHistogram, SlidingHistogram
+
+# Maximale Tiefe gespeicherter Stack-Stichproben
+STACK_DEPTH = 30
+
+
+class LoopMonitorService:
+    """
+    Misst, wie pünktlich der Event-Loop Timer ausführt, und findet die
+    Verursacher von Blockaden.
+
+    Ein Ticker schläft im Takt von loop_monitor_interval und trägt die
+    Verspätung jedes Aufwachens (Lag) in Histogramme ein. Ein Watchdog-
+    Thread prüft parallel, ob der fällige Tick ausbleibt; überschreitet
+    die Verspätung loop_block_threshold_ms, nimmt er den Stack des
+    Loop-Threads und die gerade laufende Task auf. Nach dem Ende der
+    Blockade wird deren Dauer dem Verursacher (Task/Coroutine bzw.
+    Callback und innerste Funktion) zugerechnet.
+
+    Bei mehreren Workern misst jeder Prozess seinen eigenen Loop.
+    """
+
+    def __init__(self):
+        self.interval = settings.loop_monitor_interval
+        self.threshold = settings.loop_block_threshold_ms / 1000
+        self.lag_total = LatencyHistogram()
+        self.lag_window = SlidingHistogram(max(WINDOWS.values()))
+        self.last_lag_ms: Optional[float] = None
+        self.blocked_count = 0
+        self.blocked_ms = 0.0
+        self.offenders: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.recent: deque = deque(maxlen=50)
+
+        self.task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Fälligkeit des nächsten Ticks (perf_counter) und die dazu erfasste Blockade
+        self._due: Optional[float] = None
+        self._sample: Optional[Dict[str, Any]] = None
+
+    async def start(self):
+        """Ticker im laufenden Loop und Watchdog-Thread starten"""
+        if not settings.loop_monitor_enabled or self.task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self.task = asyncio.create_task(self._tick_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        self._stop.set()
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+
+    # ============= Messung =============
+
+    async def _tick_loop(self):
+        while True:
+            due = time.perf_counter() + self.interval
+            self._due = due
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - due) * 1000)
+
+            with self._lock:
+                self._due = None
+                sample, self._sample = self._sample, None
+
+            self.last_lag_ms = round(lag_ms, 3)
+            self.lag_total.record(lag_ms)
+            self.lag_window.record(lag_ms)
+            if sample:
+                self._record_block(sample, lag_ms)
+
+    def _watch(self):
+        """Watchdog-Thread: Stack des Loop-Threads aufnehmen, solange der Tick überfällig ist"""
+        check = max(self.threshold / 2, 0.005)
+        while not self._stop.wait(check):
+            with self._lock:
+                due = self._due
+                if due is None or self._sample is not None:
+                    continue
+                if time.perf_counter() - due < self.threshold:
+                    continue
+                sample = self._capture()
+                if sample:
+                    self._sample = sample
+
+    def _capture(self) -> Optional[Dict[str, Any]]:
+        """Laufende Task und Stack des Loop-Threads (läuft im Watchdog-Thread)"""
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        stack = collapse_stack(frame)[-STACK_DEPTH:]
+
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            coro = task.get_coro()
+            owner = {
+                "kind": "task",
+                "task": task.get_name(),
+                "coroutine": getattr(coro, "__qualname__", repr(coro))
+            }
+        else:
+            owner = {"kind": "callback", "task": None, "coroutine": None}
+            # Callback = erste Funktion über Handle._run (asyncio/events.py)
+            inner = frame
+            while inner is not None and inner.f_back is not None:
+                caller = inner.f_back.f_code
+                if caller.co_name == "_run" and caller.co_filename.endswith("events.py"):
+                    owner["coroutine"] = frame_label(inner.f_code)
+                    break
+                inner = inner.f_back
+        return {**owner, "location": stack[-1] if stack else None, "stack": stack}
+
+    def _record_block(self, sample: Dict[str, Any], lag_ms: float):
+        """Abgeschlossene Blockade dem Verursacher zurechnen"""
+        self.blocked_count += 1
+        self.blocked_ms += lag_ms
+        now = datetime.now().isoformat()
+
+        key = (sample["coroutine"] or "<unbekannt>", sample["location"] or "<unbekannt>")
+        offender = self.offenders.get(key)
+        if offender is None:
+            if len(self.offenders) >= settings.loop_offenders_max:
+                # Geringste Gesamtdauer verdrängen
+                del self.offenders[min(self.offenders, key=lambda k: self.offenders[k]["total_ms"])]
+            offender = self.offenders[key] = {
+                "kind": sample["kind"],
+                "coroutine": sample["coroutine"],
+                "location": sample["location"],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0
+            }
+        offender["count"] += 1
+        offender["total_ms"] += lag_ms
+        if lag_ms >= offender["max_ms"]:
+            offender["max_ms"] = lag_ms
+            offender["stack"] = sample["stack"]
+        offender["task"] = sample["task"]
+        offender["last_seen"] = now
+
+        self.recent.append({
+            "timestamp": now,
+            "duration_ms": round(lag_ms, 2),
+            "kind": sample["kind"],
+            "task": sample["task"],
+            "coroutine": sample["coroutine"],
+            "location": sample["location"]
+        })
+
+    # ============= API =============
+
+    def get_status(self, limit: int = 20) -> Dict[str, Any]:
+        """Lag-Perzentile, Blockaden und die Verursacher mit der größten Gesamtdauer"""
+        lag = {name: self.lag_window.window(seconds).summary() for name, seconds in WINDOWS.items()}
+        lag["total"] = self.lag_total.summary()
+
+        offenders = sorted(self.offenders.values(), key=lambda o: o["total_ms"], reverse=True)[:limit]
+        return {
+            "enabled": self.task is not None,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "current_lag_ms": self.last_lag_ms,
+            "lag": lag,
+            "blocked": {"count": self.blocked_count, "total_ms": round(self.blocked_ms, 2)},
+            "offenders": [
+                {**offender, "total_ms": round(offender["total_ms"], 2), "max_ms": round(offender["max_ms"], 2)}
+                for offender in offenders
+            ],
+            "recent": list(self.recent)[-limit:][::-1]
+        }
@@ -0,0 +1,196 @@
+"""
+Metrik-Persistenz - SQLite-Ablage der Zeitreihen über Neustarts hinweg
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Zeilen pro Transaktion und Anzahl eingefügter Zeilen bis zum Kürzen
+BATCH_SIZE = 500
+TRIM_EVERY = 1000
+
+
+class MetricsPersistence:
+    """
+    Append-only SQLite-Speicher für Raw-Samples und Rollup-Zeilen.
+
+    Der Monitor-Loop übergibt Zeilen nur an eine Queue; ein eigener
+    Writer-Thread schreibt sie gebündelt und kürzt jede Stufe auf ihre
+    maximale Zeilenzahl. Eine Zeile speichert die Werte als gepacktes
+    array('d'), die Feldnamen liegen einmal pro Stufe in der meta-Tabelle.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 5.0):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=50_000)
+        self._thread: Optional[threading.Thread] = None
+        self._fields: Dict[str, Tuple[str, ...]] = {}
+        self._limits: Dict[str, int] = {}
+        self.dropped = 0
+
+    def register(self, tier: str, fields: Sequence[str], max_rows: int):
+        """Stufe mit Feldnamen und maximaler Zeilenzahl anmelden"""
+        self._fields[tier] = tuple(fields)
+        self._limits[tier] = max_rows
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS samples ("
+            "tier TEXT NOT NULL, ts INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS samples_tier_ts ON samples (tier, ts)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return conn
+
+    # ============= Schreiben =============
+
+    def start(self):
+        """Startet den Writer-Thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._writer, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Restliche Zeilen schreiben und Writer beenden (blockierend)"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, tier: str, timestamp: int, values: Sequence[float]):
+        """Zeile zum Schreiben vormerken (blockiert nie)"""
+        try:
+            self._queue.put_nowait((tier, timestamp, array('d', values).tobytes()))
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer(self):
+        """Writer-Thread: Zeilen sammeln, gebündelt einfügen, Stufen kürzen"""
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"Metrik-Persistenz deaktiviert: {e}")
+            return
+
+        for tier, fields in self._fields.items():
+            self._migrate(conn, tier, fields)
+
+        inserted = 0
+        running = True
+        while running:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < BATCH_SIZE:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            if not batch:
+                continue
+
+            try:
+                with conn:
+                    conn.executemany("INSERT INTO samples (tier, ts, data) VALUES (?, ?, ?)", batch)
+                inserted += len(batch)
+                if inserted >= TRIM_EVERY:
+                    self._trim(conn)
+                    inserted = 0
+            except sqlite3.Error as e:
+                print(f"Metrik-Persistenz Fehler: {e}")
+
+        self._trim(conn)
+        conn.close()
+
+    @staticmethod
+    def _remap(data: bytes, mapping: List[Optional[int]]) -> List[float]:
+        """Gepackte Werte über eine Index-Abbildung auf neue Felder umsortieren"""
+        values = array('d')
+        values.frombytes(data)
+        nan = float("nan")
+        return [values[i] if i is not None and i < len(values) else nan for i in mapping]
+
+    @staticmethod
+    def _mapping(stored: Sequence[str], current: Sequence[str]) -> List[Optional[int]]:
+        positions = {name: i for i, name in enumerate(stored)}
+        return [positions.get(name) for name in current]
+
+    def _migrate(self, conn: sqlite3.Connection, tier: str, fields: Tuple[str, ...]):
+        """Feldliste einer Stufe speichern, vorhandene Zeilen bei Änderung umschreiben"""
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"fields:{tier}",)).fetchone()
+        stored = tuple(json.loads(row[0])) if row else None
+
+        with conn:
+            if stored is not None and stored != fields:
+                mapping = self._mapping(stored, fields)
+                rows = conn.execute("SELECT rowid, data FROM samples WHERE tier = ?", (tier,)).fetchall()
+                conn.executemany(
+                    "UPDATE samples SET data = ? WHERE rowid = ?",
+                    [(array('d', self._remap(data, mapping)).tobytes(), rowid) for rowid, data in rows]
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (f"fields:{tier}", json.dumps(fields))
+            )
+
+    def _trim(self, conn: sqlite3.Connection):
+        """Älteste Zeilen jeder Stufe über dem Limit entfernen"""
+        with conn:
+            for tier, limit in self._limits.items():
+                conn.execute(
+                    "DELETE FROM samples WHERE tier = ? AND ts < ("
+                    "SELECT ts FROM samples WHERE tier = ? ORDER BY ts DESC LIMIT 1 OFFSET ?)",
+                    (tier, tier, limit - 1)
+                )
+
+    # ============= Laden =============
+
+    def load(self, tier: str, limit: int, since: Optional[int] = None) -> List[Tuple[int, List[float]]]:
+        """
+        Neueste Zeilen einer Stufe laden (blockierend, aufsteigend sortiert).
+
+        Werte werden über die gespeicherten Feldnamen auf die aktuellen
+        Felder abgebildet; neue Felder sind NaN. Mit since nur Zeilen mit
+        Zeitstempel danach (z.B. für Worker, die die Historie nachladen).
+        """
+        if not self.path.exists():
+            return []
+
+        conn = sqlite3.connect(self.path)
+        try:
+            # Meta und Zeilen aus demselben Snapshot lesen
+            conn.execute("BEGIN")
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"fields:{tier}",)).fetchone()
+            if not row:
+                return []
+            mapping = self._mapping(json.loads(row[0]), self._fields.get(tier, ()))
+
+            rows = conn.execute(
+                "SELECT ts, data FROM samples WHERE tier = ? AND ts > ? ORDER BY ts DESC LIMIT ?",
+                (tier, since if since is not None else -1, limit)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # Datenbank wird gerade erst angelegt
+            return []
+        except sqlite3.Error as e:
+            print(f"Metrik-Historie konnte nicht geladen werden: {e}")
+            return []
+        finally:
+            conn.close()
+
+        return [(timestamp, self._remap(data, mapping)) for timestamp, data in reversed(rows)]
@@ -0,0 +1,480 @@
+"""
+Metrik-Speicher - spaltenbasierter Ringpuffer für Zeitreihen
+"""
+import math
+import sys
+from array import array
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Callable
+
+from shared.utils.metrics import unflatten
+
+# Numerische Felder der Metrik-Historie (Punkt-Notation wie im Metrik-JSON)
+HISTORY_FIELDS = (
+    "cpu.percent", "cpu.cores",
+    "memory.percent", "memory.used", "memory.total", "memory.available",
+    "disk.percent", "disk.used", "disk.total", "disk.free",
+    "disk.io.read_iops", "disk.io.write_iops", "disk.io.read_bytes_per_sec", "disk.io.write_bytes_per_sec",
+    "network.bytes_sent", "network.bytes_recv", "network.packets_sent", "network.packets_recv",
+    "network.rates.bytes_sent_per_sec", "network.rates.bytes_recv_per_sec",
+    "network.rates.packets_sent_per_sec", "network.rates.packets_recv_per_sec",
+    "services.docker", "services.caddy",
+    "caddy_process.cpu_percent", "caddy_process.rss", "caddy_process.fds",
+    "caddy_process.threads", "caddy_process.ctx_switches_per_sec",
+    "requests.count", "requests.per_second", "requests.avg_response_time",
+    "requests.rates.1s", "requests.rates.60s", "requests.bytes_per_second",
+    "requests.latency.p50", "requests.latency.p90", "requests.latency.p99", "requests.latency.max",
+)
+
+# Felder, die im JSON als Ganzzahl ausgegeben werden
+INTEGER_FIELDS = {
+    "cpu.cores",
+    "memory.used", "memory.total", "memory.available",
+    "disk.used", "disk.total", "disk.free",
+    "network.bytes_sent", "network.bytes_recv", "network.packets_sent", "network.packets_recv",
+    "caddy_process.rss", "caddy_process.fds", "caddy_process.threads",
+    "requests.count",
+}
+
+# Caddy-Status wird als Index in diese Tabelle gespeichert
+CADDY_STATES = ("unknown", "running", "stopped", "not_installed", "error")
+
+NAN = float("nan")
+
+
+def flatten_metrics(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Verschachteltes Metrik-Dict in Punkt-Notation umwandeln"""
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def encode_value(field: str, value: Any) -> float:
+    """Einzelnen Metrik-Wert als float kodieren (NaN = fehlt)"""
+    if value is None:
+        return NAN
+    if field == "services.caddy":
+        state = getattr(value, "value", value)
+        return float(CADDY_STATES.index(state)) if state in CADDY_STATES else 0.0
+    return float(value)
+
+
+def decode_value(field: str, value: float) -> Any:
+    """Kodierten Wert zurück in das JSON-Format wandeln"""
+    if math.isnan(value):
+        return None
+    if field == "services.caddy":
+        return CADDY_STATES[int(value)]
+    if field == "services.docker":
+        return value >= 0.5
+    if field in INTEGER_FIELDS:
+        return int(value)
+    return value
+
+
+def encode_metrics(metrics: Dict[str, Any], fields: Sequence[str] = HISTORY_FIELDS) -> Tuple[int, List[float]]:
+    """Metrik-Snapshot in (Zeitstempel in ms, Werte je Feld) umwandeln"""
+    flat = flatten_metrics(metrics)
+    timestamp = datetime.fromisoformat(flat["timestamp"]).timestamp()
+    return int(timestamp * 1000), [encode_value(field, flat.get(field)) for field in fields]
+
+
+class MetricsRingBuffer:
+    """
+    Ringpuffer fester Größe mit einem array('d') pro Metrik-Feld und
+    einer int64-Spalte für Zeitstempel (Millisekunden seit Epoch).
+
+    Zeitstempel sind monoton steigend, daher lassen sich Zeitbereiche
+    per Binärsuche ohne Kopie der Daten finden.
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int):
+        self.fields = tuple(fields)
+        self.capacity = max(1, capacity)
+        self.timestamps = array('q', bytes(8 * self.capacity))
+        self.columns: Dict[str, array] = {
+            field: array('d', bytes(8 * self.capacity)) for field in self.fields
+        }
+        self._start = 0  # physischer Index des ältesten Eintrags
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Speicherbedarf der Spalten in Bytes"""
+        return self.capacity * 8 * (len(self.fields) + 1)
+
+    def _physical(self, index: int) -> int:
+        return (self._start + index) % self.capacity
+
+    def timestamp_at(self, index: int) -> int:
+        """Zeitstempel des index-ten Eintrags (0 = ältester)"""
+        return self.timestamps[self._physical(index)]
+
+    def append(self, timestamp: int, values: Sequence[float]):
+        """Neuen Eintrag anhängen (überschreibt den ältesten wenn voll)"""
+        if self._size:
+            # Zeitsprünge rückwärts abfangen, damit die Binärsuche gültig bleibt
+            timestamp = max(timestamp, self.timestamp_at(self._size - 1))
+
+        if self._size < self.capacity:
+            position = self._physical(self._size)
+            self._size += 1
+        else:
+            position = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        self.timestamps[position] = timestamp
+        for field, value in zip(self.fields, values):
+            self.columns[field][position] = value
+
+    def append_metrics(self, metrics: Dict[str, Any]):
+        """Metrik-Snapshot kodieren und anhängen"""
+        timestamp, values = encode_metrics(metrics, self.fields)
+        self.append(timestamp, values)
+
+    def _bisect(self, timestamp: int, right: bool = False) -> int:
+        """Binärsuche über die logische Reihenfolge"""
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self.timestamp_at(mid)
+            if value < timestamp or (right and value == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def index_range(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Logischer Indexbereich [lo, hi) für Zeitstempel start <= t <= end"""
+        lo = self._bisect(start) if start is not None else 0
+        hi = self._bisect(end, right=True) if end is not None else self._size
+        return lo, max(lo, hi)
+
+    def _slice_column(self, column: array, lo: int, hi: int) -> array:
+        """Logischen Bereich aus einer Spalte kopieren (max. zwei Teilstücke)"""
+        first = self._physical(lo)
+        count = hi - lo
+        if first + count <= self.capacity:
+            return column[first:first + count]
+        return column[first:] + column[:(first + count) - self.capacity]
+
+    def slice(self, start: Optional[int] = None, end: Optional[int] = None,
+              fields: Optional[Sequence[str]] = None,
+              limit: Optional[int] = None) -> Tuple[array, Dict[str, array]]:
+        """
+        Spalten für einen Zeitbereich (Millisekunden) abrufen.
+
+        Gibt die Zeitstempel und pro Feld ein array('d') zurück; mit limit
+        werden nur die neuesten Einträge des Bereichs geliefert.
+        """
+        lo, hi = self.index_range(start, end)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+
+        selected = self.fields if fields is None else [f for f in fields if f in self.columns]
+        return (
+            self._slice_column(self.timestamps, lo, hi),
+            {field: self._slice_column(self.columns[field], lo, hi) for field in selected}
+        )
+
+    def to_dicts(self, start: Optional[int] = None, end: Optional[int] = None,
+                 limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Bereich als Liste verschachtelter Metrik-Dicts (Legacy-Format)"""
+        timestamps, columns = self.slice(start, end, limit=limit)
+        samples = []
+        for i, timestamp in enumerate(timestamps):
+            flat = {"timestamp": datetime.fromtimestamp(timestamp / 1000).isoformat()}
+            for field, column in columns.items():
+                flat[field] = decode_value(field, column[i])
+            samples.append(unflatten(flat))
+        return samples
+
+
+# Aggregate pro Feld in den Rollup-Stufen
+AGGREGATES = ("min", "max", "avg", "last")
+
+
+class RollupTier:
+    """
+    Heruntergetastete Stufe der Historie (z.B. 1 Minute, 1 Stunde).
+
+    Samples werden beim Eintreffen in den laufenden Bucket eingerechnet;
+    sobald ein Sample in einen neuen Bucket fällt, wird der alte als
+    Zeile mit min/max/avg/last pro Feld in den Ringpuffer geschrieben.
+    """
+
+    def __init__(self, name: str, resolution_ms: int, fields: Sequence[str], capacity: int):
+        self.name = name
+        self.resolution = resolution_ms
+        self.fields = tuple(fields)
+        self.buffer = MetricsRingBuffer(
+            [f"{field}:{agg}" for field in self.fields for agg in AGGREGATES],
+            capacity
+        )
+        self._bucket: Optional[int] = None
+        self._reset()
+
+    def _reset(self):
+        count = len(self.fields)
+        self._min = [math.inf] * count
+        self._max = [-math.inf] * count
+        self._sum = [0.0] * count
+        self._count = [0] * count
+        self._last = [NAN] * count
+
+    def add(self, timestamp: int, values: Sequence[float]) -> Optional[Tuple[int, List[float]]]:
+        """Sample einrechnen; gibt die abgeschlossene Zeile zurück, falls ein Bucket endet"""
+        bucket = timestamp - timestamp % self.resolution
+        row = None
+        if self._bucket is not None and bucket > self._bucket:
+            row = self.flush()
+        if self._bucket is None:
+            self._bucket = bucket
+
+        for i, value in enumerate(values):
+            if math.isnan(value):
+                continue
+            if value < self._min[i]:
+                self._min[i] = value
+            if value > self._max[i]:
+                self._max[i] = value
+            self._sum[i] += value
+            self._count[i] += 1
+            self._last[i] = value
+        return row
+
+    def flush(self) -> Optional[Tuple[int, List[float]]]:
+        """Laufenden Bucket abschließen und speichern"""
+        if self._bucket is None:
+            return None
+
+        row = []
+        for i in range(len(self.fields)):
+            if self._count[i]:
+                row += [self._min[i], self._max[i], self._sum[i] / self._count[i], self._last[i]]
+            else:
+                row += [NAN, NAN, NAN, NAN]
+
+        bucket = self._bucket
+        self.buffer.append(bucket, row)
+        self._bucket = None
+        self._reset()
+        return bucket, row
+
+
+class MetricsStore:
+    """
+    Metrik-Historie aus Raw-Ringpuffer und Rollup-Stufen.
+
+    Abfragen wählen die günstigste Stufe, die den angefragten Zeitraum
+    abdeckt - lange Zeiträume werden so aus wenigen Rollup-Zeilen statt
+    aus Raw-Samples bedient.
+    """
+
+    def __init__(self, fields: Sequence[str], raw_capacity: int, raw_resolution_ms: int,
+                 tiers: Sequence[Tuple[str, int, int]] = (), max_points: int = 1500):
+        self.fields = tuple(fields)
+        self.raw = MetricsRingBuffer(self.fields, raw_capacity)
+        self.raw_resolution = raw_resolution_ms
+        self.tiers = [RollupTier(name, resolution, self.fields, capacity)
+                      for name, resolution, capacity in tiers]
+        self.max_points = max_points
+        # Optionaler Empfänger für neue Zeilen: (Stufe, Zeitstempel, Werte)
+        self.listener: Optional[Callable[[str, int, Sequence[float]], None]] = None
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    @property
+    def nbytes(self) -> int:
+        return self.raw.nbytes + sum(tier.buffer.nbytes for tier in self.tiers)
+
+    def append(self, timestamp: int, values: Sequence[float]):
+        """Sample in Raw-Puffer und alle Stufen übernehmen"""
+        self.raw.append(timestamp, values)
+        if self.listener:
+            self.listener("raw", timestamp, values)
+        for tier in self.tiers:
+            row = tier.add(timestamp, values)
+            if row and self.listener:
+                self.listener(tier.name, *row)
+
+    def buffers(self) -> Dict[str, MetricsRingBuffer]:
+        """Alle Puffer nach Stufenname"""
+        buffers = {"raw": self.raw}
+        buffers.update({tier.name: tier.buffer for tier in self.tiers})
+        return buffers
+
+    @staticmethod
+    def build_buffer(template: MetricsRingBuffer, rows: Sequence[Tuple[int, Sequence[float]]]) -> MetricsRingBuffer:
+        """Neuen Puffer mit gleicher Struktur aus geladenen Zeilen aufbauen"""
+        buffer = MetricsRingBuffer(template.fields, template.capacity)
+        for timestamp, values in rows:
+            buffer.append(timestamp, values)
+        return buffer
+
+    def restore(self, name: str, restored: MetricsRingBuffer):
+        """
+        Geladene Historie einsetzen und die seitdem live gesammelten
+        Einträge dahinter anhängen.
+        """
+        current = self.buffers()[name]
+        start = restored.timestamp_at(len(restored) - 1) + 1 if len(restored) else None
+        timestamps, columns = current.slice(start)
+        for i, timestamp in enumerate(timestamps):
+            restored.append(timestamp, [columns[field][i] for field in restored.fields])
+
+        if name == "raw":
+            self.raw = restored
+        else:
+            for tier in self.tiers:
+                if tier.name == name:
+                    tier.buffer = restored
+
+    def append_metrics(self, metrics: Dict[str, Any]):
+        """Metrik-Snapshot kodieren und anhängen"""
+        timestamp, values = encode_metrics(metrics, self.fields)
+        self.append(timestamp, values)
+
+    def to_dicts(self, start: Optional[int] = None, end: Optional[int] = None,
+                 limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Raw-Samples im Legacy-Format"""
+        return self.raw.to_dicts(start, end, limit)
+
+    def _levels(self) -> List[Tuple[str, int, MetricsRingBuffer]]:
+        """Alle Stufen von fein nach grob: (Name, Auflösung in ms, Puffer)"""
+        return [("raw", self.raw_resolution, self.raw)] + [
+            (tier.name, tier.resolution, tier.buffer) for tier in self.tiers
+        ]
+
+    def select_tier(self, start: Optional[int], end: Optional[int],
+                    step: Optional[int] = None) -> Tuple[str, int, MetricsRingBuffer]:
+        """
+        Günstigste Stufe für einen Zeitraum wählen.
+
+        Kandidaten sind Stufen, deren ältester Eintrag den Start abdeckt.
+        Mit step wird die gröbste Stufe genommen, deren Auflösung noch
+        feiner als step ist; ohne step die feinste Stufe, die höchstens
+        max_points Punkte liefert.
+        """
+        levels = [level for level in self._levels() if len(level[2])]
+        if not levels:
+            return self._levels()[0]
+
+        if start is None:
+            covering = levels
+        else:
+            covering = [level for level in levels if level[2].timestamp_at(0) <= start]
+        if not covering:
+            # Zeitraum älter als alle Daten - Stufe mit der längsten Historie
+            return min(levels, key=lambda level: level[2].timestamp_at(0))
+
+        if step:
+            fitting = [level for level in covering if level[1] <= step]
+            return fitting[-1] if fitting else covering[0]
+
+        for level in covering:
+            lo, hi = level[2].index_range(start, end)
+            if hi - lo <= self.max_points:
+                return level
+        return covering[-1]
+
+    def query(self, start: Optional[int] = None, end: Optional[int] = None,
+              fields: Optional[Sequence[str]] = None, agg: str = "avg",
+              step: Optional[int] = None) -> Dict[str, Any]:
+        """Zeitraum aus der günstigsten Stufe lesen (Spalten, Auflösung der Stufe)"""
+        fields = [f for f in (fields or self.fields) if f in self.fields]
+        name, resolution, buffer = self.select_tier(start, end, step)
+
+        if name == "raw":
+            timestamps, columns = buffer.slice(start, end, fields)
+        else:
+            timestamps, tier_columns = buffer.slice(start, end, [f"{f}:{agg}" for f in fields])
+            columns = {field: tier_columns[f"{field}:{agg}"] for field in fields}
+
+        if step and step > resolution:
+            timestamps, columns = resample(timestamps, columns, step, agg)
+            resolution = step
+
+        return {
+            "tier": name,
+            "resolution": resolution,
+            "agg": agg,
+            "timestamps": timestamps,
+            "fields": columns
+        }
+
+
+def resample(timestamps: array, columns: Dict[str, array], step: int,
+             agg: str) -> Tuple[array, Dict[str, array]]:
+    """Spalten auf Buckets der Breite step (ms) verdichten"""
+    # Bucket-Grenzen einmal bestimmen, dann jede Spalte abschnittsweise verdichten
+    bounds = []
+    current = None
+    for i, timestamp in enumerate(timestamps):
+        bucket = timestamp - timestamp % step
+        if bucket != current:
+            bounds.append((bucket, i))
+            current = bucket
+    ends = [start for _, start in bounds[1:]] + [len(timestamps)]
+
+    result = {}
+    for field, column in columns.items():
+        values = array('d')
+        for (_, lo), hi in zip(bounds, ends):
+            chunk = [v for v in column[lo:hi] if not math.isnan(v)]
+            if not chunk:
+                values.append(NAN)
+            elif agg == "min":
+                values.append(min(chunk))
+            elif agg == "max":
+                values.append(max(chunk))
+            elif agg == "last":
+                values.append(chunk[-1])
+            else:
+                values.append(sum(chunk) / len(chunk))
+        result[field] = values
+
+    return array('q', [bucket for bucket, _ in bounds]), result
+
+
+def columnar_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Abfrage-Ergebnis als spaltenbasiertes JSON (NaN -> null)"""
+    return {
+        "tier": result["tier"],
+        "resolution": result["resolution"],
+        "agg": result["agg"],
+        "timestamps": result["timestamps"].tolist(),
+        "fields": {
+            field: [decode_value(field, value) for value in column]
+            for field, column in result["fields"].items()
+        }
+    }
+
+
+def binary_payload(result: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Abfrage-Ergebnis als Binärformat (Little Endian):
+    n x int64 Zeitstempel, danach je Feld n x float64 (NaN = fehlt).
+    """
+    parts = [result["timestamps"]] + list(result["fields"].values())
+    if sys.byteorder == "big":
+        parts = [array(part.typecode, part) for part in parts]
+        for part in parts:
+            part.byteswap()
+
+    headers = {
+        "X-Metrics-Count": str(len(result["timestamps"])),
+        "X-Metrics-Fields": ",".join(result["fields"].keys()),
+        "X-Metrics-Tier": result["tier"],
+        "X-Metrics-Resolution": str(result["resolution"]),
+    }
+    return b"".join(part.tobytes() for part in parts), headers
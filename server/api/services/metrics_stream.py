@@ -0,0 +1,92 @@
+"""
+Metrik-Stream v2 - Feld-Abonnement mit Snapshot und anschließenden Deltas
+"""
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+from server.api.services.metrics_store import flatten_metrics
+
+PROTOCOL_VERSION = 2
+
+_MISSING = object()
+
+
+def load_msgpack():
+    """msgpack ist optional - None wenn nicht installiert"""
+    try:
+        import msgpack
+        return msgpack
+    except ImportError:
+        return None
+
+
+class MetricsDeltaEncoder:
+    """
+    Wandelt Metrik-Snapshots pro Verbindung in v2-Nachrichten um.
+
+    Felder werden in Punkt-Notation abonniert; ein Eintrag wie
+    "network.interfaces" umfasst alle Unterfelder. Die erste Nachricht
+    (und jede nach einem neuen Abonnement) ist ein vollständiger
+    Snapshot, danach enthalten Deltas nur geänderte und entfernte Felder.
+    """
+
+    def __init__(self, fields: Optional[Sequence[str]] = None):
+        self.set_fields(fields)
+
+    def set_fields(self, fields: Optional[Sequence[str]]):
+        """Abonnement ändern; die nächste Nachricht ist wieder ein Snapshot"""
+        self.fields = [field for field in fields if field] if fields else None
+        self._last: Optional[Dict[str, Any]] = None
+        self.seq = 0
+
+    def _selected(self, name: str) -> bool:
+        if self.fields is None:
+            return True
+        return any(name == field or name.startswith(f"{field}.") for field in self.fields)
+
+    def encode(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Nächste Nachricht (snapshot oder delta) für einen Metrik-Snapshot"""
+        flat = flatten_metrics(metrics)
+        timestamp = flat.pop("timestamp", None)
+        current = {
+            name: getattr(value, "value", value)
+            for name, value in flat.items()
+            if self._selected(name)
+        }
+
+        self.seq += 1
+        if self._last is None:
+            message = {"type": "snapshot", "seq": self.seq, "ts": timestamp, "fields": current}
+        else:
+            last = self._last
+            message = {
+                "type": "delta",
+                "seq": self.seq,
+                "ts": timestamp,
+                "changed": {
+                    name: value for name, value in current.items()
+                    if last.get(name, _MISSING) != value
+                }
+            }
+            removed = [name for name in last if name not in current]
+            if removed:
+                message["removed"] = removed
+
+        self._last = current
+        return message
+
+
+def hello_message(encoding: str, fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Erste Nachricht einer v2-Verbindung mit ausgehandelten Parametern"""
+    return {
+        "type": "hello",
+        "version": PROTOCOL_VERSION,
+        "encoding": encoding,
+        "fields": fields
+    }
+
+
+def pack(message: Dict[str, Any], msgpack) -> Union[bytes, Dict[str, Any]]:
+    """Nachricht für den Versand vorbereiten (msgpack-Bytes oder JSON-Dict)"""
+    if msgpack is None:
+        return message
+    return msgpack.packb(message, use_bin_type=True)
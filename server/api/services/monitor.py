@@ -0,0 +1,579 @@
+"""
+Monitoring Service für System-Metriken
+"""
+import sys
+from pathlib import Path
+# Projekt-Root zum Python-Path hinzufügen
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+import asyncio
+import time
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+from server.config.settings import settings
+from server.api.services.metrics_store import MetricsStore, HISTORY_FIELDS
+from server.api.services.metrics_persistence import MetricsPersistence
+from server.api.services.request_stats import RequestStats
+from server.api.services.io_rates import CounterRates, NIC_RATES, DISK_RATES
+from server.api.services.tracing import tracer, traced
+
+# Maximale Wartezeit (s) auf den Snapshot des geweckten Monitor-Loops
+SNAPSHOT_WAIT = 5.0
+
+class MonitorService:
+    def __init__(self):
+        self.metrics_history = MetricsStore(
+            HISTORY_FIELDS,
+            raw_capacity=settings.metrics_history_size,
+            raw_resolution_ms=settings.monitor_interval * 1000,
+            tiers=[
+                ("1m", 60_000, settings.metrics_rollup_minute_size),
+                ("1h", 3_600_000, settings.metrics_rollup_hour_size),
+            ]
+        )
+        self.monitoring_task: Optional[asyncio.Task] = None
+        self.restore_task: Optional[asyncio.Task] = None
+
+        # Persistenz: neue Zeilen gehen an den SQLite-Writer-Thread
+        self.persistence: Optional[MetricsPersistence] = None
+        if settings.metrics_persist:
+            self.persistence = MetricsPersistence(settings.metrics_db_path, settings.metrics_persist_interval)
+            for name, buffer in self.metrics_history.buffers().items():
+                self.persistence.register(name, buffer.fields, buffer.capacity)
+
+        self.request_count = 0
+
+        # Durchsatz aus den kumulativen Netzwerk- und Disk-Zählern
+        self._nic_rates = CounterRates(NIC_RATES)
+        self._disk_rates = CounterRates(DISK_RATES)
+        self._disk_total_rates = CounterRates(DISK_RATES)
+
+        # Caddy-Prozess: gecachter psutil-Handle und letzte Kontextwechsel-Zähler
+        self._caddy_pid: Optional[int] = None
+        self._caddy_process = None  # psutil.Process
+        self._caddy_ctx_switches: Optional[tuple] = None
+        self.request_stats = RequestStats(max_routes=settings.request_stats_max_routes)
+
+        # Mehrere Worker: nur der Leader misst, Follower übernehmen seinen Stand
+        self.leader = True
+        self._remote_requests: List[Dict[str, Any]] = []
+        self._remote_active = False
+
+        # Bedarfsgesteuerter Loop: schnell bei Abonnenten/Lesern, sonst langsam
+        self.latest: Optional[Dict[str, Any]] = None
+        self._latest_at: Optional[float] = None
+        self._subscribers: List[asyncio.Queue] = []
+        self._last_read: Optional[float] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._snapshot_waiter: Optional[asyncio.Future] = None
+
+        # Zuletzt gemessene Dienst-Status mit Zeitpunkt der Prüfung
+        self._docker_running = False
+        self._docker_checked: Optional[float] = None
+        self._caddy_status = "unknown"
+        self._caddy_checked: Optional[float] = None
+
+    async def start_monitoring(self):
+        """Startet den Monitoring-Task"""
+        if self.monitoring_task and not self.monitoring_task.done():
+            return
+
+        if self.persistence:
+            self.metrics_history.listener = self.persistence.enqueue
+            self.persistence.start()
+            self.restore_task = asyncio.create_task(self._restore_history())
+
+        self._wake = asyncio.Event()
+        self.monitoring_task = asyncio.create_task(self._monitor_loop())
+
+    async def start_follower(self):
+        """Follower-Worker: nur persistierte Historie laden, kein eigener Loop"""
+        self._wake = asyncio.Event()
+        if self.persistence:
+            self.restore_task = asyncio.create_task(self._restore_history())
+
+    async def stop_monitoring(self):
+        """Stoppt den Monitoring-Task"""
+        for task in (self.restore_task, self.monitoring_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.restore_task = None
+        self.monitoring_task = None
+        self.metrics_history.listener = None
+        if self._snapshot_waiter and not self._snapshot_waiter.done():
+            self._snapshot_waiter.cancel()
+
+        # Restliche Zeilen auf die Platte schreiben
+        if self.persistence:
+            await asyncio.to_thread(self.persistence.stop)
+
+    def _load_buffer(self, name: str, buffer):
+        """Persistierte Zeilen einer Stufe laden (läuft im Thread)"""
+        rows = self.persistence.load(name, buffer.capacity)
+        return MetricsStore.build_buffer(buffer, rows)
+
+    async def _restore_history(self):
+        """Persistierte Historie nach dem Start im Hintergrund laden"""
+        try:
+            loaded = 0
+            for name, buffer in self.metrics_history.buffers().items():
+                with tracer.span("monitor.restore_history", tier=name):
+                    restored = await asyncio.to_thread(self._load_buffer, name, buffer)
+                loaded += len(restored)
+                self.metrics_history.restore(name, restored)
+            print(f"📈 Metrik-Historie geladen ({loaded} Einträge)")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Metrik-Historie konnte nicht geladen werden: {e}")
+
+    @traced("monitor.tail_history")
+    async def tail_history(self):
+        """Follower: seit dem letzten Eintrag vom Leader persistierte Raw-Samples nachladen"""
+        if not self.persistence or (self.restore_task and not self.restore_task.done()):
+            return
+        raw = self.metrics_history.raw
+        since = raw.timestamp_at(len(raw) - 1) if len(raw) else None
+        rows = await asyncio.to_thread(self.persistence.load, "raw", raw.capacity, since)
+        for timestamp, values in rows:
+            self.metrics_history.append(timestamp, values)
+
+    # ============= Adaptiver Monitor-Loop =============
+
+    def is_active(self) -> bool:
+        """Aktiv solange WebSocket-Abonnenten oder kürzliche API-Leser existieren"""
+        if self._subscribers or self._remote_active:
+            return True
+        return self._last_read is not None and time.monotonic() - self._last_read < settings.monitor_active_window
+
+    def current_interval(self) -> float:
+        """System-Intervall des Loops (schnell wenn aktiv, sonst Leerlauf)"""
+        return settings.monitor_interval if self.is_active() else settings.monitor_idle_interval
+
+    def touch(self):
+        """API-Zugriff vermerken; weckt den Loop, falls er im Leerlauf schläft"""
+        idle = not self.is_active()
+        self._last_read = time.monotonic()
+        if idle and self._wake:
+            self._wake.set()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Empfänger für Snapshots des Monitor-Loops registrieren"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+        self._subscribers.append(queue)
+        if self._wake:
+            self._wake.set()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Empfänger entfernen"""
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def _publish(self, metrics: Dict[str, Any]):
+        """Snapshot an alle Empfänger verteilen (langsame verlieren den ältesten)"""
+        for queue in list(self._subscribers):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(metrics)
+
+    async def _monitor_loop(self):
+        """Hauptschleife für Monitoring"""
+        # psutil erst hier laden (nicht beim Import oder im Lifespan-Start);
+        # Basis für cpu_percent(None) setzen - misst dann seit dem letzten Aufruf
+        import psutil
+        psutil.cpu_percent(interval=None)
+
+        while True:
+            try:
+                metrics = await self.collect_metrics()
+                self.metrics_history.append_metrics(metrics)
+                self.latest = metrics
+                self._latest_at = time.monotonic()
+                self._publish(metrics)
+                if self._snapshot_waiter and not self._snapshot_waiter.done():
+                    self._snapshot_waiter.set_result(metrics)
+
+                # Alarm-Regeln inkrementell auf den neuen Snapshot anwenden
+                if hasattr(self, '_alert_service'):
+                    self._alert_service.evaluate(metrics)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Monitoring error: {e}")
+
+            # Bis zum nächsten Durchlauf schlafen - neue Nachfrage weckt vorzeitig
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.current_interval())
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                break
+
+    # ============= Mehrere Worker =============
+
+    def apply_remote_workers(self, requests: List[Dict[str, Any]], active: bool):
+        """Request-Statistik und Nachfrage der übrigen Worker übernehmen"""
+        self._remote_requests = requests
+        was_active = self.is_active()
+        self._remote_active = active
+        if active and not was_active and self._wake:
+            self._wake.set()
+
+    def export_health(self) -> Dict[str, Any]:
+        """Zuletzt gemessene Dienst-Status für Follower (monotone Zeit ist prozessübergreifend)"""
+        return {
+            "docker": self._docker_running,
+            "docker_checked": self._docker_checked,
+            "caddy": getattr(self._caddy_status, "value", self._caddy_status),
+            "caddy_checked": self._caddy_checked,
+            "caddy_pid": self._caddy_pid
+        }
+
+    def apply_leader_state(self, metrics: Optional[Dict[str, Any]], health: Dict[str, Any]):
+        """Follower: Snapshot und Dienst-Status des Leaders übernehmen"""
+        self._docker_running = health["docker"]
+        self._docker_checked = health["docker_checked"]
+        self._caddy_status = health["caddy"]
+        self._caddy_checked = health["caddy_checked"]
+        self._caddy_pid = health["caddy_pid"]
+
+        if not metrics or (self.latest and self.latest["timestamp"] == metrics["timestamp"]):
+            return
+        self.latest = metrics
+        self._latest_at = time.monotonic()
+        if not self.persistence:
+            # Ohne Persistenz entsteht die Historie aus den übernommenen Snapshots
+            self.metrics_history.append_metrics(metrics)
+        self._publish(metrics)
+
+    def _merged_request_stats(self) -> RequestStats:
+        """Eigene Request-Statistik, zusammengeführt mit der aller anderen Worker"""
+        if not self._remote_requests:
+            return self.request_stats
+        merged = RequestStats(max_routes=settings.request_stats_max_routes)
+        merged.merge_state(self.request_stats.to_state())
+        for state in self._remote_requests:
+            merged.merge_state(state["stats"])
+        return merged
+
+    def _probe_intervals(self) -> tuple:
+        """Aktuelle Intervalle (Docker, Caddy); im Leerlauf mindestens das Leerlauf-Intervall"""
+        docker_interval = settings.monitor_docker_interval
+        caddy_interval = settings.monitor_caddy_interval
+        if not self.is_active():
+            docker_interval = max(docker_interval, settings.monitor_idle_interval)
+            caddy_interval = max(caddy_interval, settings.monitor_idle_interval)
+        return docker_interval, caddy_interval
+
+    @traced("monitor.docker_probe")
+    async def _refresh_docker(self):
+        self._docker_running = await self._check_docker_status()
+        self._docker_checked = time.monotonic()
+
+    @traced("monitor.caddy_probe")
+    async def _refresh_caddy(self):
+        self._caddy_status = await self._check_caddy_status()
+        self._caddy_checked = time.monotonic()
+
+    async def _probe_services(self) -> tuple:
+        """
+        Docker- und Caddy-Status im eigenen Takt prüfen, dazwischen den
+        letzten Wert verwenden.
+        """
+        now = time.monotonic()
+        docker_interval, caddy_interval = self._probe_intervals()
+
+        if self._docker_checked is None or now - self._docker_checked >= docker_interval:
+            await self._refresh_docker()
+
+        if self._caddy_checked is None or now - self._caddy_checked >= caddy_interval:
+            await self._refresh_caddy()
+
+        return self._docker_running, self._caddy_status
+
+    # ============= Health =============
+
+    def get_health(self) -> Dict[str, Any]:
+        """
+        Health-Status aus den zuletzt gemessenen Werten (ohne Probe).
+
+        Pro Dienst werden Zeitpunkt und Alter der letzten Prüfung geliefert;
+        stale ist gesetzt, wenn eine Prüfung länger als drei Intervalle
+        zurückliegt oder noch nie stattgefunden hat.
+        """
+        now = time.monotonic()
+        wall = time.time()
+        docker_interval, caddy_interval = self._probe_intervals()
+
+        checked_at = {}
+        age_seconds = {}
+        stale = False
+        for name, checked, interval in (
+            ("docker", self._docker_checked, docker_interval),
+            ("caddy", self._caddy_checked, caddy_interval),
+        ):
+            if checked is None:
+                checked_at[name] = None
+                age_seconds[name] = None
+                stale = True
+                continue
+            age = now - checked
+            checked_at[name] = datetime.fromtimestamp(wall - age).isoformat()
+            age_seconds[name] = round(age, 3)
+            stale = stale or age > 3 * interval
+
+        return {
+            "status": "healthy",
+            "services": {
+                "api": "running",
+                "caddy": self._caddy_status if self._caddy_checked is not None else "unknown",
+                "docker": self._docker_running
+            },
+            "checked_at": checked_at,
+            "age_seconds": age_seconds,
+            "stale": stale
+        }
+
+    @traced("monitor.check_health")
+    async def check_health(self) -> Dict[str, Any]:
+        """Alle Dienste sofort prüfen (deep), Ergebnis auch für spätere Abfragen merken"""
+        await asyncio.gather(self._refresh_docker(), self._refresh_caddy())
+        return self.get_health()
+
+    @traced("monitor.collect_metrics")
+    async def collect_metrics(self) -> Dict[str, Any]:
+        """Sammelt aktuelle System-Metriken"""
+        import psutil
+
+        with tracer.span("monitor.psutil"):
+            # CPU (seit der letzten Messung, blockiert nicht) und Memory
+            cpu_percent = psutil.cpu_percent(interval=None)
+            memory = psutil.virtual_memory()
+
+            # Disk
+            disk = psutil.disk_usage('/')
+
+            # Network
+            net_io = psutil.net_io_counters()
+            nic_rates = self._nic_rates.update(psutil.net_io_counters(pernic=True))
+
+            # Disk-I/O (Gesamtwert ohne Partitionen, daher eigener Zähler)
+            disk_rates = self._disk_rates.update(psutil.disk_io_counters(perdisk=True))
+            disk_total = psutil.disk_io_counters()
+            disk_total_rates = self._disk_total_rates.update({"total": disk_total} if disk_total else None)
+
+        # Docker- und Caddy-Status (eigener Takt je Probe)
+        docker_running, caddy_status = await self._probe_services()
+
+        # Ressourcen des Caddy-Prozesses (PID aus dem Statuscheck)
+        caddy_process = self._sample_caddy_process()
+
+        # Request-Metriken (gleitende Fenster, per_second über 10s; alle Worker)
+        request_stats = self._merged_request_stats()
+        rates = request_stats.rates()
+        requests_per_sec = rates["10s"]
+
+        # Response Time (Latenz-Histogramm der letzten Minute)
+        latency = request_stats.summary("1m")
+        avg_response_time = latency["avg"] or 0
+
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "cpu": {
+                "percent": cpu_percent,
+                "cores": psutil.cpu_count()
+            },
+            "memory": {
+                "percent": memory.percent,
+                "used": memory.used,
+                "total": memory.total,
+                "available": memory.available
+            },
+            "disk": {
+                "percent": disk.percent,
+                "used": disk.used,
+                "total": disk.total,
+                "free": disk.free,
+                "io": disk_total_rates.get("total") or dict.fromkeys(DISK_RATES.values()),
+                "disks": disk_rates
+            },
+            "network": {
+                "bytes_sent": net_io.bytes_sent,
+                "bytes_recv": net_io.bytes_recv,
+                "packets_sent": net_io.packets_sent,
+                "packets_recv": net_io.packets_recv,
+                "rates": self._nic_rates.totals(nic_rates),
+                "interfaces": nic_rates
+            },
+            "services": {
+                "docker": docker_running,
+                "caddy": caddy_status
+            },
+            "caddy_process": caddy_process,
+            "requests": {
+                "count": self.request_count + sum(state["count"] for state in self._remote_requests),
+                "per_second": round(requests_per_sec, 2),
+                "rates": rates,
+                "bytes_per_second": request_stats.byte_rates()["10s"],
+                "avg_response_time": round(avg_response_time, 2),
+                "latency": {
+                    "p50": latency["p50"],
+                    "p90": latency["p90"],
+                    "p99": latency["p99"],
+                    "max": latency["max"]
+                }
+            }
+        }
+
+    async def _check_docker_status(self) -> bool:
+        """Prüft ob Docker läuft"""
+        if hasattr(self, '_docker_service'):
+            return await self._docker_service.check_status()
+        return False
+
+    def set_docker_service(self, service):
+        """Setzt die Docker-Service Referenz"""
+        self._docker_service = service
+
+    def set_alert_service(self, service):
+        """Setzt die Alert-Service Referenz"""
+        self._alert_service = service
+
+    def set_caddy_service(self, service):
+        """Setzt die Caddy-Service Referenz (vermeidet zirkuläre Imports)"""
+        self._caddy_service = service
+
+    async def _check_caddy_status(self) -> str:
+        """Prüft Caddy-Status"""
+        try:
+            if hasattr(self, '_caddy_service'):
+                status = await self._caddy_service.get_status()
+                self._caddy_pid = status.get("pid")
+                return status.get("status", "unknown")
+            return "unknown"
+        except:
+            return "error"
+
+    @traced("monitor.caddy_process")
+    def _sample_caddy_process(self) -> Dict[str, Any]:
+        """
+        CPU, RSS, Dateideskriptoren, Threads und Kontextwechsel des
+        Caddy-Prozesses. Der psutil.Process-Handle bleibt zwischen den
+        Durchläufen erhalten, damit cpu_percent() die Differenz seit dem
+        letzten Aufruf liefert; oneshot() liest /proc nur einmal.
+        """
+        import psutil
+
+        sample = {
+            "pid": self._caddy_pid,
+            "cpu_percent": None,
+            "rss": None,
+            "fds": None,
+            "threads": None,
+            "ctx_switches_per_sec": None
+        }
+
+        if not self._caddy_pid:
+            self._caddy_process = None
+            return sample
+
+        try:
+            if self._caddy_process is None or self._caddy_process.pid != self._caddy_pid:
+                self._caddy_process = psutil.Process(self._caddy_pid)
+                self._caddy_process.cpu_percent(None)
+                self._caddy_ctx_switches = None
+
+            proc = self._caddy_process
+            with proc.oneshot():
+                cpu_percent = proc.cpu_percent(None)
+                rss = proc.memory_info().rss
+                fds = proc.num_fds() if hasattr(proc, "num_fds") else proc.num_handles()
+                threads = proc.num_threads()
+                ctx = proc.num_ctx_switches()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            self._caddy_process = None
+            return sample
+
+        # Kontextwechsel als Rate seit der letzten Messung
+        now = time.monotonic()
+        switches = ctx.voluntary + ctx.involuntary
+        if self._caddy_ctx_switches:
+            last_time, last_switches = self._caddy_ctx_switches
+            if now > last_time and switches >= last_switches:
+                sample["ctx_switches_per_sec"] = round((switches - last_switches) / (now - last_time), 2)
+        self._caddy_ctx_switches = (now, switches)
+
+        sample.update({
+            "cpu_percent": cpu_percent,
+            "rss": rss,
+            "fds": fds,
+            "threads": threads
+        })
+        return sample
+
+    def record_request(self):
+        """Zählt einen Request"""
+        self.request_count += 1
+
+    def record_response_time(self, time_ms: float, method: str = "GET", route: Optional[str] = None,
+                             status: Optional[int] = None, size: int = 0):
+        """Speichert Response-Zeit, Status und Antwortgröße (pro Methode und Route-Template)"""
+        self.request_stats.record(method, route, time_ms, status, size)
+
+    def get_request_stats(self, window: str = "1m") -> Dict[str, Any]:
+        """Latenz-Perzentile und Raten gesamt und pro Route (über alle Worker)"""
+        return self._merged_request_stats().snapshot(window)
+
+    async def get_current_metrics(self) -> Dict[str, Any]:
+        """
+        Gibt aktuelle Metriken zurück: Snapshot des Loops, falls frisch genug,
+        sonst den nächsten Snapshot des (geweckten) Loops. Gemessen wird nur
+        im Loop - eine zweite Messung daneben verfälscht cpu_percent, das
+        immer seit dem letzten Aufruf misst. Follower liefern den Stand des
+        Leaders.
+        """
+        self.touch()
+        if self.latest and (not self.leader or time.monotonic() - self._latest_at < settings.monitor_interval):
+            return self.latest
+
+        if self.leader and self.monitoring_task and not self.monitoring_task.done():
+            metrics = await self._wait_for_snapshot()
+            if metrics or self.latest:
+                return metrics or self.latest
+
+        # Kein Loop (oder noch kein Snapshot): einmalig messen, ohne Historie und Alarme
+        metrics = await self.collect_metrics()
+        if self.leader:
+            self.latest = metrics
+            self._latest_at = time.monotonic()
+        return metrics
+
+    async def _wait_for_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Loop wecken und auf seinen nächsten Snapshot warten (alle Wartenden teilen sich eine Messung)"""
+        if self._snapshot_waiter is None or self._snapshot_waiter.done():
+            self._snapshot_waiter = asyncio.get_running_loop().create_future()
+            self._wake.set()
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._snapshot_waiter), SNAPSHOT_WAIT)
+        except asyncio.TimeoutError:
+            return None
+
+    def get_metrics_history(self, start: Optional[int] = None, end: Optional[int] = None,
+                            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Gibt Metrik-Historie zurück (Zeitbereich in ms seit Epoch)"""
+        self.touch()
+        return self.metrics_history.to_dicts(start, end, limit)
+
+    def query_metrics(self, start: Optional[int] = None, end: Optional[int] = None,
+                      fields: Optional[List[str]] = None, agg: str = "avg",
+                      step: Optional[int] = None) -> Dict[str, Any]:
+        """Zeitreihen aus der günstigsten Stufe (Raw, 1m, 1h) abfragen"""
+        self.touch()
+        return self.metrics_history.query(start, end, fields, agg, step)
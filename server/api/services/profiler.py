@@ -0,0 +1,144 @@
+"""
+Sampling-Profiler - Stack-Stichproben aller Threads im Collapsed-Format
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+# Wartende Threads (Leerlauf) erkennt man an der innersten Python-Funktion
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+}
+
+_labels: Dict[CodeType, str] = {}
+
+
+def frame_label(code: CodeType) -> str:
+    """Anzeigename einer Funktion: "name (datei.py:zeile)", gecacht pro Code-Objekt"""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        # Pfade ab dem Paket kürzen (site-packages bzw. Projekt-Root)
+        for marker in ("site-packages" + os.sep, os.sep + "server" + os.sep, os.sep + "shared" + os.sep):
+            index = path.rfind(marker)
+            if index >= 0:
+                path = path[index + len(marker):] if marker.startswith("site") else path[index + 1:]
+                break
+        else:
+            path = os.path.basename(path)
+        label = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+        _labels[code] = label
+    return label
+
+
+def collapse_stack(frame: Optional[FrameType]) -> List[str]:
+    """Frames von der Wurzel bis zur innersten Funktion"""
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+class ProfileResult:
+    """Ergebnis eines Profiler-Laufs"""
+
+    def __init__(self, stacks: Counter, samples: int, duration: float, sampling_time: float):
+        self.stacks = stacks
+        self.samples = samples
+        self.duration = duration
+        self.sampling_time = sampling_time
+
+    @property
+    def overhead_percent(self) -> float:
+        """Anteil der Laufzeit, die der Sampler selbst (mit GIL) verbraucht hat"""
+        return round(100 * self.sampling_time / self.duration, 2) if self.duration else 0.0
+
+    def collapsed(self) -> str:
+        """Flame-Graph-Format: eine Zeile "thread;frame;...;frame anzahl" pro Stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-Profile-Samples": str(self.samples),
+            "X-Profile-Duration": f"{self.duration:.3f}",
+            "X-Profile-Overhead-Percent": str(self.overhead_percent),
+        }
+
+
+class SamplingProfiler:
+    """
+    Nimmt in festen Abständen sys._current_frames() aller Threads auf
+    (Event-Loop, Docker-Executor, Metrik-Writer usw.) und zählt gleiche
+    Stacks. Der Sampler läuft im aufrufenden Thread und nur während
+    profile() - außerhalb eines Laufs gibt es weder Thread noch Hook.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float = 0.005, include_idle: bool = False) -> ProfileResult:
+        """Profil über `seconds` aufnehmen (blockierend); RuntimeError wenn bereits einer läuft"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Es läuft bereits ein Profiler")
+
+        try:
+            own = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks: Counter = Counter()
+            samples = 0
+            sampling_time = 0.0
+
+            started = time.perf_counter()
+            deadline = started + seconds
+            next_sample = started
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+
+                for ident, frame in sys._current_frames().items():
+                    if ident == own or (not include_idle and is_idle(frame)):
+                        continue
+                    name = names.get(ident)
+                    if name is None:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                        name = names.get(ident, f"thread-{ident}")
+                    stacks[";".join([name.replace(" ", "_")] + collapse_stack(frame))] += 1
+                samples += 1
+                sampling_time += time.perf_counter() - now
+
+                next_sample += interval
+                delay = next_sample - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Zu langsam für das Intervall - nicht aufholen, sondern neu takten
+                    next_sample = time.perf_counter()
+
+            return ProfileResult(stacks, samples, time.perf_counter() - started, sampling_time)
+        finally:
+            self._lock.release()
+
+
+# Singleton
+profiler = SamplingProfiler()
@@ -0,0 +1,361 @@
+"""
+Request-Statistik - Latenz-Histogramme und Raten pro Methode und Route
+"""
+import math
+import time
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
+
+# Auswertungsfenster in Sekunden
+WINDOWS = {"1m": 60, "5m": 300}
+
+# Fenster der Request-Raten in Sekunden
+RATE_WINDOWS = {"1s": 1, "10s": 10, "60s": 60}
+
+# Schlüssel für Requests ohne passende Route bzw. über dem Routen-Limit
+UNMATCHED = "<unmatched>"
+OTHER = "<other>"
+
+
+class LatencyHistogram:
+    """
+    Logarithmisches Histogramm nach dem DDSketch-Verfahren.
+
+    Bucket i deckt (gamma^(i-1), gamma^i] ab, jedes Quantil hat damit
+    höchstens den relativen Fehler `accuracy`. Die Bucket-Indizes sind auf
+    [min_value, max_value] begrenzt, der Speicher ist also fest nach oben
+    beschränkt. Zwei Histogramme mit gleicher Genauigkeit lassen sich
+    durch Addieren der Zähler verlustfrei zusammenführen.
+    """
+
+    __slots__ = ("gamma", "_log_gamma", "_min_key", "_max_key", "buckets", "count", "total", "max")
+
+    def __init__(self, accuracy: float = 0.01, min_value: float = 0.001, max_value: float = 3_600_000.0):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._min_key = math.ceil(math.log(min_value) / self._log_gamma)
+        self._max_key = math.ceil(math.log(max_value) / self._log_gamma)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _key(self, value: float) -> int:
+        if value <= 0:
+            return self._min_key
+        key = math.ceil(math.log(value) / self._log_gamma)
+        return min(max(key, self._min_key), self._max_key)
+
+    def record(self, value: float):
+        """Messwert (ms) eintragen"""
+        key = self._key(value)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """Zähler eines anderen Histogramms hinzufügen"""
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+    def to_state(self) -> list:
+        """Zähler als JSON-fähige Liste (für den Austausch zwischen Prozessen)"""
+        return [list(self.buckets.items()), self.count, self.total, self.max]
+
+    def merge_state(self, state: list):
+        """Mit to_state() exportierte Zähler hinzufügen"""
+        buckets, count, total, maximum = state
+        for key, bucket_count in buckets:
+            self.buckets[key] = self.buckets.get(key, 0) + bucket_count
+        self.count += count
+        self.total += total
+        if maximum > self.max:
+            self.max = maximum
+
+    def clear(self):
+        self.buckets.clear()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantil (0..1) schätzen, None bei leerem Histogramm"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Mittelpunkt des Buckets mit relativem Fehler <= accuracy
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(value, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Anzahl, Mittelwert und Perzentile in ms"""
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return round(value, 2) if value is not None else None
+
+        return {
+            "count": self.count,
+            "avg": rounded(self.total / self.count if self.count else None),
+            "p50": rounded(self.quantile(0.50)),
+            "p90": rounded(self.quantile(0.90)),
+            "p99": rounded(self.quantile(0.99)),
+            "max": rounded(self.max if self.count else None)
+        }
+
+
+class SlidingHistogram:
+    """
+    Gleitendes Fenster aus einem Ring von Zeitscheiben-Histogrammen.
+
+    Jede Scheibe deckt `slot_seconds` ab; beim Wechsel in eine neue Scheibe
+    wird die älteste geleert. Ein Fenster entsteht durch Zusammenführen
+    der jüngsten Scheiben.
+    """
+
+    __slots__ = ("slot_seconds", "slots", "_epochs")
+
+    def __init__(self, span_seconds: int, slot_seconds: int = 10):
+        self.slot_seconds = slot_seconds
+        count = max(1, math.ceil(span_seconds / slot_seconds))
+        self.slots = [LatencyHistogram() for _ in range(count)]
+        self._epochs = [-1] * count
+
+    def record(self, value: float, now: Optional[float] = None):
+        epoch = int((now if now is not None else time.monotonic()) // self.slot_seconds)
+        index = epoch % len(self.slots)
+        if self._epochs[index] != epoch:
+            self.slots[index].clear()
+            self._epochs[index] = epoch
+        self.slots[index].record(value)
+
+    def to_state(self) -> list:
+        """Belegte Scheiben als [[Epoche, Histogramm], ...]"""
+        return [
+            [epoch, slot.to_state()]
+            for epoch, slot in zip(self._epochs, self.slots)
+            if epoch >= 0 and slot.count
+        ]
+
+    def merge_state(self, state: list):
+        """Scheiben eines anderen Prozesses einrechnen (ältere Epochen werden verdrängt)"""
+        for epoch, slot_state in state:
+            index = epoch % len(self.slots)
+            if self._epochs[index] < epoch:
+                self.slots[index].clear()
+                self._epochs[index] = epoch
+            if self._epochs[index] == epoch:
+                self.slots[index].merge_state(slot_state)
+
+    def window(self, seconds: int, now: Optional[float] = None) -> LatencyHistogram:
+        """Zusammengeführtes Histogramm der letzten `seconds` Sekunden"""
+        epoch = int((now if now is not None else time.monotonic()) // self.slot_seconds)
+        oldest = epoch - max(1, math.ceil(seconds / self.slot_seconds)) + 1
+        merged = LatencyHistogram()
+        for index, slot_epoch in enumerate(self._epochs):
+            if oldest <= slot_epoch <= epoch:
+                merged.merge(self.slots[index])
+        return merged
+
+
+class RateCounter:
+    """
+    Request-Zähler als Ring aus Sekunden-Buckets.
+
+    Zählen ist O(1): der Bucket der aktuellen Sekunde wird erhöht und beim
+    ersten Treffer einer neuen Sekunde zurückgesetzt. Raten werden über die
+    zuletzt abgeschlossenen Sekunden berechnet, die laufende Sekunde zählt
+    noch nicht mit.
+    """
+
+    __slots__ = ("_counts", "_epochs")
+
+    def __init__(self, span_seconds: int = 60):
+        # Eine Sekunde Reserve für den laufenden Bucket
+        size = span_seconds + 1
+        self._counts = array('q', bytes(8 * size))
+        self._epochs = array('q', [-1] * size)
+
+    def add(self, now: Optional[float] = None, amount: int = 1):
+        second = int(now if now is not None else time.monotonic())
+        index = second % len(self._counts)
+        if self._epochs[index] != second:
+            self._epochs[index] = second
+            self._counts[index] = 0
+        self._counts[index] += amount
+
+    def to_state(self) -> list:
+        """Belegte Sekunden als [[Sekunde, Anzahl], ...]"""
+        return [[epoch, count] for epoch, count in zip(self._epochs, self._counts) if epoch >= 0 and count]
+
+    def merge_state(self, state: list):
+        """Sekunden-Buckets eines anderen Prozesses addieren"""
+        size = len(self._counts)
+        for second, count in state:
+            index = second % size
+            if self._epochs[index] < second:
+                self._epochs[index] = second
+                self._counts[index] = 0
+            if self._epochs[index] == second:
+                self._counts[index] += count
+
+    def total(self, seconds: int, now: Optional[float] = None) -> int:
+        """Anzahl in den letzten `seconds` abgeschlossenen Sekunden"""
+        current = int(now if now is not None else time.monotonic())
+        oldest = current - seconds
+        return sum(
+            count for count, epoch in zip(self._counts, self._epochs)
+            if oldest <= epoch < current
+        )
+
+    def rates(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Requests pro Sekunde für alle Fenster"""
+        now = now if now is not None else time.monotonic()
+        return {
+            name: round(self.total(seconds, now) / seconds, 2)
+            for name, seconds in RATE_WINDOWS.items()
+        }
+
+
+def status_class(status: Optional[int]) -> str:
+    """HTTP-Status auf Klasse wie "2xx" abbilden"""
+    if not status:
+        return "unknown"
+    return f"{status // 100}xx"
+
+
+class RequestStats:
+    """
+    Latenzen und Raten aller Requests, gruppiert nach (Methode, Route-Template).
+
+    Die Anzahl der Routen ist begrenzt, damit unbekannte Pfade den
+    Speicher nicht wachsen lassen; weitere Routen landen unter "<other>".
+    """
+
+    def __init__(self, max_routes: int = 200, slot_seconds: int = 10):
+        self.max_routes = max_routes
+        self.slot_seconds = slot_seconds
+        self.span = max(WINDOWS.values())
+        self.overall = SlidingHistogram(self.span, slot_seconds)
+        self.routes: Dict[Tuple[str, str], SlidingHistogram] = {}
+        self.rate = RateCounter(max(RATE_WINDOWS.values()))
+        self.bytes = RateCounter(max(RATE_WINDOWS.values()))
+        self.route_rates: Dict[Tuple[str, str], Dict[str, RateCounter]] = {}
+
+    def _key(self, method: str, route: str) -> Tuple[str, str]:
+        key = (method, route)
+        if key not in self.routes and len(self.routes) >= self.max_routes:
+            key = (method, OTHER)
+        if key not in self.routes:
+            self.routes[key] = SlidingHistogram(self.span, self.slot_seconds)
+            self.route_rates[key] = {}
+        return key
+
+    def record(self, method: str, route: Optional[str], duration_ms: float,
+               status: Optional[int] = None, size: int = 0):
+        """Request-Dauer, Status und Antwortgröße (Bytes) eintragen"""
+        now = time.monotonic()
+        key = self._key(method, route or UNMATCHED)
+        self.overall.record(duration_ms, now)
+        self.routes[key].record(duration_ms, now)
+
+        self.rate.add(now)
+        if size:
+            self.bytes.add(now, size)
+        counters = self.route_rates[key]
+        name = status_class(status)
+        counter = counters.get(name)
+        if counter is None:
+            counter = counters[name] = RateCounter(max(RATE_WINDOWS.values()))
+        counter.add(now)
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        Gesamter Zustand als JSON-fähige Struktur.
+
+        Zeitscheiben sind Sekunden der monotonen Systemuhr, die für alle
+        Prozesse eines Hosts gleich ist - Zustände mehrerer Worker lassen
+        sich so mit merge_state() verlustfrei zusammenführen.
+        """
+        return {
+            "overall": self.overall.to_state(),
+            "rate": self.rate.to_state(),
+            "bytes": self.bytes.to_state(),
+            "routes": [
+                [method, route, self.routes[(method, route)].to_state(),
+                 {name: counter.to_state() for name, counter in self.route_rates[(method, route)].items()}]
+                for method, route in self.routes
+            ]
+        }
+
+    def merge_state(self, state: Dict[str, Any]):
+        """Mit to_state() exportierten Zustand eines anderen Prozesses einrechnen"""
+        self.overall.merge_state(state["overall"])
+        self.rate.merge_state(state["rate"])
+        self.bytes.merge_state(state["bytes"])
+        for method, route, histogram, statuses in state["routes"]:
+            key = self._key(method, route)
+            self.routes[key].merge_state(histogram)
+            counters = self.route_rates[key]
+            for name, counter_state in statuses.items():
+                counter = counters.get(name)
+                if counter is None:
+                    counter = counters[name] = RateCounter(max(RATE_WINDOWS.values()))
+                counter.merge_state(counter_state)
+
+    def rates(self) -> Dict[str, float]:
+        """Gesamt-Requests pro Sekunde über 1s, 10s und 60s"""
+        return self.rate.rates()
+
+    def byte_rates(self) -> Dict[str, float]:
+        """Gesendete Antwort-Bytes pro Sekunde über 1s, 10s und 60s"""
+        return self.bytes.rates()
+
+    def summary(self, window: str = "1m") -> Dict[str, Any]:
+        """Gesamt-Perzentile über ein Fenster"""
+        return self.overall.window(WINDOWS[window]).summary()
+
+    def snapshot(self, window: str = "1m") -> Dict[str, Any]:
+        """Perzentile gesamt und pro Route über ein Fenster"""
+        now = time.monotonic()
+        seconds = WINDOWS[window]
+        routes: List[Dict[str, Any]] = []
+        for key, histogram in self.routes.items():
+            merged = histogram.window(seconds, now)
+            if merged.count:
+                method, route = key
+                status = {
+                    name: counter.rates(now)
+                    for name, counter in sorted(self.route_rates[key].items())
+                }
+                rates = {
+                    name: round(sum(entry[name] for entry in status.values()), 2)
+                    for name in RATE_WINDOWS
+                }
+                routes.append({
+                    "method": method,
+                    "route": route,
+                    **merged.summary(),
+                    "rates": rates,
+                    "status": status
+                })
+        routes.sort(key=lambda entry: entry["count"], reverse=True)
+
+        return {
+            "window": window,
+            "overall": {
+                **self.overall.window(seconds, now).summary(),
+                "rates": self.rate.rates(now),
+                "bytes_per_second": self.bytes.rates(now)
+            },
+            "routes": routes
+        }
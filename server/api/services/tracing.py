@@ -0,0 +1,204 @@
+"""
+Tracing - Spans für Service-Operationen (In-Memory-Puffer, optional JSON-Lines-Datei)
+"""
+import sys
+from pathlib import Path
+# Projekt-Root zum Python-Path hinzufügen
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+import functools
+import inspect
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import orjson
+
+from server.config.settings import settings
+
+# Maximale Anzahl Spans pro Trace (weitere werden nur gezählt)
+MAX_SPANS = 256
+
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    """Eine gemessene Operation innerhalb eines Traces"""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "attributes", "start", "duration_ms", "error")
+
+    def __init__(self, name: str, trace: "Trace", parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = next(_ids)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        """Attribute nachträglich setzen (z.B. Status-Code)"""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "offset_ms": round((self.start - self.trace.start) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class Trace:
+    """Wurzel-Span und alle darunter gestarteten Spans"""
+
+    __slots__ = ("trace_id", "root", "spans", "dropped", "start", "timestamp")
+
+    def __init__(self):
+        self.trace_id = f"{os.getpid():x}-{next(_ids):x}"
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.start = time.perf_counter()
+        self.timestamp = datetime.now().isoformat()
+
+    def to_dict(self) -> Dict[str, Any]:
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "timestamp": self.timestamp,
+            "duration_ms": round(root.duration_ms, 3),
+            "attributes": root.attributes,
+            "error": root.error,
+            "spans": [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start)],
+            "dropped_spans": self.dropped
+        }
+
+
+class Tracer:
+    """
+    Leichtgewichtiges Tracing ohne externen Collector.
+
+    Der aktuelle Span steht in einer ContextVar und wird damit an Tasks
+    und asyncio.to_thread weitergegeben. Ein Span ohne Eltern (HTTP-Request
+    in der Middleware oder Hintergrund-Operation wie der Monitor-Loop)
+    eröffnet einen Trace. Abgeschlossene Traces ab trace_slow_ms kommen in
+    einen Ringpuffer und, falls trace_file gesetzt ist, als JSON-Zeile in
+    die Datei - geschrieben von einem eigenen Thread, nicht im Event-Loop.
+    """
+
+    def __init__(self):
+        self.enabled = settings.tracing_enabled
+        self.slow_ms = settings.trace_slow_ms
+        self.traces: deque = deque(maxlen=settings.trace_buffer_size)
+        self._file_queue: Optional[queue.SimpleQueue] = None
+        self._writer: Optional[threading.Thread] = None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Operation als Span messen (with-Block, auch in Coroutinen)"""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current.get()
+        if parent is None:
+            trace = Trace()
+            span = trace.root = Span(name, trace, None, attributes)
+        else:
+            trace = parent.trace
+            span = Span(name, trace, parent.span_id, attributes)
+            if len(trace.spans) < MAX_SPANS:
+                trace.spans.append(span)
+            else:
+                trace.dropped += 1
+
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - span.start) * 1000
+            _current.reset(token)
+            if parent is None:
+                self._finish(trace)
+
+    def _finish(self, trace: Trace):
+        if trace.root.duration_ms < self.slow_ms:
+            return
+        self.traces.append(trace)
+        if settings.trace_file:
+            self._write(trace.to_dict())
+
+    def _write(self, record: Dict[str, Any]):
+        """Trace an den Schreib-Thread übergeben (Start beim ersten Trace)"""
+        if self._writer is None:
+            self._file_queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+            self._writer.start()
+        self._file_queue.put(record)
+
+    def _write_loop(self):
+        path = Path(settings.trace_file)
+        if not path.is_absolute():
+            path = settings.project_root / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as f:
+            while True:
+                record = self._file_queue.get()
+                try:
+                    f.write(orjson.dumps(record, default=str) + b"\n")
+                    f.flush()
+                except (OSError, TypeError) as e:
+                    print(f"Trace konnte nicht geschrieben werden: {e}")
+
+    def get_traces(self, min_ms: Optional[float] = None, name: Optional[str] = None,
+                   limit: int = 20) -> List[Dict[str, Any]]:
+        """Jüngste Traces ab min_ms (optional nur mit passendem Namensanfang), neueste zuerst"""
+        result = []
+        for trace in reversed(self.traces):
+            if min_ms is not None and trace.root.duration_ms < min_ms:
+                continue
+            if name and not trace.root.name.startswith(name):
+                continue
+            result.append(trace.to_dict())
+            if len(result) >= limit:
+                break
+        return result
+
+
+def traced(name: str):
+    """Decorator: ganze Funktion oder Coroutine als Span messen"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Singleton
+tracer = Tracer()
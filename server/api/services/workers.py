@@ -0,0 +1,327 @@
+"""
+Worker Service - Leader-Wahl und gemeinsamer Zustand mehrerer Uvicorn-Worker
+"""
+import sys
+from pathlib import Path
+# Projekt-Root zum Python-Path hinzufügen
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import orjson
+
+from server.config.settings import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LeaderLock:
+    """
+    Exklusive, nicht blockierende Datei-Sperre. Das Betriebssystem gibt sie
+    frei, sobald der haltende Prozess endet - auch bei einem Absturz.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """Sperre versuchen (blockiert nicht); True wenn dieser Prozess sie hält"""
+        if self._file:
+            return True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            lock_file.seek(0)
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if not self._file:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+
+
+class SharedState:
+    """
+    Schlüssel-Wert-Ablage in SQLite (WAL), die alle Worker eines Hosts
+    lesen und schreiben. Werte werden mit orjson kodiert; jeder Eintrag
+    trägt den Zeitpunkt seiner letzten Aktualisierung.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=2.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "key TEXT PRIMARY KEY, updated REAL NOT NULL, data BLOB NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def exchange(self, outgoing: Dict[str, Any]) -> Dict[str, Tuple[float, Any]]:
+        """Eigene Einträge schreiben, alle übrigen lesen (blockierend)"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO state (key, updated, data) VALUES (?, ?, ?)",
+                    [(key, now, orjson.dumps(value)) for key, value in outgoing.items()]
+                )
+            rows = conn.execute("SELECT key, updated, data FROM state").fetchall()
+        return {
+            key: (updated, orjson.loads(data))
+            for key, updated, data in rows
+            if key not in outgoing
+        }
+
+    def remove(self, keys: Sequence[str]):
+        """Einträge löschen (blockierend)"""
+        if not keys:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("DELETE FROM state WHERE key = ?", [(key,) for key in keys])
+
+    def close(self):
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+
+class WorkerService:
+    """
+    Koordiniert mehrere Uvicorn-Worker.
+
+    Der Worker mit der Leader-Sperre führt als einziger den Monitor-Loop
+    und die Container-Statistik aus. Im Takt von worker_sync_interval
+    schreibt jeder Worker Heartbeat, Nachfrage (aktive Leser/Abonnenten)
+    und seine Request-Statistik in die gemeinsame Datei; der Leader
+    zusätzlich Snapshot, Dienst-Status, Alarme und Container-Statistik.
+    Follower übernehmen diesen Stand und laden die Historie aus der
+    Metrik-Datenbank nach. Endet der Leader, übernimmt der nächste
+    Worker, der die Sperre bekommt.
+
+    Mit workers=1 ist der einzige Prozess ohne Sperre und Abgleich Leader.
+    """
+
+    def __init__(self):
+        self.enabled = settings.workers > 1
+        self.pid = os.getpid()
+        self.is_leader = False
+        self.lock = LeaderLock(settings.leader_lock_path)
+        self.state: Optional[SharedState] = None
+        self.task: Optional[asyncio.Task] = None
+        self.workers: Dict[str, Dict[str, Any]] = {}
+        self._published_count: Optional[int] = None
+
+    def set_monitor_service(self, service):
+        """Setzt die Monitor-Service Referenz"""
+        self._monitor_service = service
+
+    def set_alert_service(self, service):
+        """Setzt die Alert-Service Referenz"""
+        self._alert_service = service
+
+    def set_container_stats_service(self, service):
+        """Setzt die Container-Statistik-Service Referenz"""
+        self._container_stats_service = service
+
+    async def start(self):
+        """Rolle bestimmen und die Hintergrund-Dienste entsprechend starten"""
+        self.pid = os.getpid()
+        if not self.enabled:
+            await self._start_leader()
+            return
+
+        self.state = SharedState(settings.worker_state_path)
+        if await asyncio.to_thread(self.lock.acquire):
+            await self._start_leader()
+        else:
+            self._monitor_service.leader = False
+            await self._monitor_service.start_follower()
+            print(f"👷 Worker {self.pid} läuft als Follower")
+
+        self.task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Abgleich und Hintergrund-Dienste stoppen, Sperre freigeben"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+        await self._monitor_service.stop_monitoring()
+        await self._container_stats_service.stop()
+
+        if self.state:
+            keys = [f"worker:{self.pid}", f"requests:{self.pid}"]
+            if self.is_leader:
+                keys.append("leader")
+            try:
+                await asyncio.to_thread(self.state.remove, keys)
+            except sqlite3.Error as e:
+                print(f"Worker-Zustand konnte nicht entfernt werden: {e}")
+            self.state.close()
+        self.lock.release()
+        self.is_leader = False
+
+    async def _start_leader(self):
+        self.is_leader = True
+        self._monitor_service.leader = True
+        self._alert_service.shared_rules = None
+        await self._monitor_service.start_monitoring()
+        print("📊 Monitoring gestartet")
+
+        # Ressourcen-Statistik der laufenden Container sammeln
+        await self._container_stats_service.start()
+        if self.enabled:
+            print(f"👑 Worker {self.pid} ist Leader")
+
+    # ============= Abgleich =============
+
+    async def _sync_loop(self):
+        """Zustand im festen Takt austauschen, verwaiste Leader-Sperre übernehmen"""
+        while True:
+            try:
+                await asyncio.sleep(settings.worker_sync_interval)
+                if not self.is_leader and await asyncio.to_thread(self.lock.acquire):
+                    await self._monitor_service.stop_monitoring()
+                    await self._start_leader()
+                await self.sync()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Worker-Abgleich fehlgeschlagen: {e}")
+
+    def _outgoing(self) -> Dict[str, Any]:
+        """Eigene Einträge für die gemeinsame Datei (läuft im Event-Loop)"""
+        monitor = self._monitor_service
+        outgoing: Dict[str, Any] = {
+            f"worker:{self.pid}": {
+                "pid": self.pid,
+                "leader": self.is_leader,
+                "active": monitor.is_active(),
+                "requests": monitor.request_count
+            }
+        }
+
+        # Request-Statistik nur nach neuen Requests neu schreiben
+        if monitor.request_count != self._published_count:
+            outgoing[f"requests:{self.pid}"] = {
+                "count": monitor.request_count,
+                "stats": monitor.request_stats.to_state()
+            }
+            self._published_count = monitor.request_count
+
+        if self.is_leader:
+            outgoing["leader"] = {
+                "pid": self.pid,
+                "metrics": monitor.latest,
+                "health": monitor.export_health(),
+                "alerts": self._alert_service.export(),
+                "containers": self._container_stats_service.export()
+            }
+        return outgoing
+
+    async def sync(self):
+        """Einmal schreiben und lesen, danach den Stand der anderen Worker übernehmen"""
+        entries = await asyncio.to_thread(self.state.exchange, self._outgoing())
+        now = time.time()
+
+        workers = {}
+        stale = []
+        for key, (updated, value) in entries.items():
+            kind, _, pid = key.partition(":")
+            if kind != "worker":
+                continue
+            if now - updated > settings.worker_timeout:
+                stale += [key, f"requests:{pid}"]
+                continue
+            workers[pid] = {**value, "age_seconds": round(now - updated, 3)}
+        self.workers = workers
+
+        requests = [
+            value for key, (_, value) in entries.items()
+            if key.startswith("requests:") and key.partition(":")[2] in workers
+        ]
+        active = self.is_leader and any(worker["active"] for worker in workers.values())
+        self._monitor_service.apply_remote_workers(requests, active)
+
+        if self.is_leader:
+            # Einträge beendeter Worker aufräumen
+            if stale:
+                await asyncio.to_thread(self.state.remove, stale)
+            return
+
+        leader = entries.get("leader")
+        if leader:
+            state = leader[1]
+            self._monitor_service.apply_leader_state(state["metrics"], state["health"])
+            self._alert_service.apply_shared(state["alerts"])
+            self._container_stats_service.apply_shared(state["containers"])
+        await self._monitor_service.tail_history()
+
+    # ============= API =============
+
+    def get_workers(self) -> List[Dict[str, Any]]:
+        """Alle bekannten Worker mit Rolle und Alter des letzten Heartbeats"""
+        monitor = self._monitor_service
+        own = {
+            "pid": self.pid,
+            "leader": self.is_leader,
+            "active": monitor.is_active(),
+            "requests": monitor.request_count,
+            "age_seconds": 0.0,
+            "self": True
+        }
+        others = [{**worker, "self": False} for worker in self.workers.values()]
+        return sorted([own] + others, key=lambda worker: worker["pid"])
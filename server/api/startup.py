@@ -0,0 +1,74 @@
+"""
+Startzeit-Messung - Dauer der einzelnen Startphasen des Servers
+"""
+import time
+from typing import Dict, Any, List, Optional
+
+
+class StartupReport:
+    """
+    Misst den Serverstart als Folge von Phasen.
+
+    checkpoint() schließt die laufende Phase ab (Dauer seit dem letzten
+    Checkpoint), ready() markiert das Ende des Lifespan-Starts. Aufgaben,
+    die danach im Hintergrund laufen, werden getrennt erfasst, ebenso die
+    Zeit bis zur ersten ausgelieferten Antwort.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_wall = time.time()
+        self._last = self.started
+        self.phases: List[Dict[str, Any]] = []
+        self.background: List[Dict[str, Any]] = []
+        self.ready_ms: Optional[float] = None
+        self.first_response_ms: Optional[float] = None
+
+    def _elapsed_ms(self, since: float) -> float:
+        return round((time.perf_counter() - since) * 1000, 2)
+
+    def checkpoint(self, name: str):
+        """Laufende Phase unter diesem Namen abschließen"""
+        now = time.perf_counter()
+        self.phases.append({"phase": name, "ms": round((now - self._last) * 1000, 2)})
+        self._last = now
+
+    def ready(self):
+        """Server nimmt Requests an"""
+        self.ready_ms = self._elapsed_ms(self.started)
+        phases = ", ".join(f"{phase['phase']} {phase['ms']:.0f}" for phase in self.phases)
+        print(f"⏱️  Server bereit nach {self.ready_ms:.0f} ms ({phases})")
+
+    def background_done(self, name: str, started: float):
+        """Hintergrund-Aufgabe (gestartet bei perf_counter() = started) abgeschlossen"""
+        self.background.append({
+            "task": name,
+            "ms": self._elapsed_ms(started),
+            "finished_after_ms": self._elapsed_ms(self.started)
+        })
+
+    def first_response(self):
+        """Erste Antwort ausgeliefert (nur der erste Aufruf zählt)"""
+        if self.first_response_ms is None:
+            self.first_response_ms = self._elapsed_ms(self.started)
+
+    def _interpreter_ms(self) -> Optional[float]:
+        """Zeit vom Prozessstart bis zum Import dieses Moduls (Interpreter, frühe Importe)"""
+        try:
+            import psutil
+            return round((self.started_wall - psutil.Process().create_time()) * 1000, 2)
+        except Exception:
+            return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "interpreter_ms": self._interpreter_ms(),
+            "phases": self.phases,
+            "ready_ms": self.ready_ms,
+            "first_response_ms": self.first_response_ms,
+            "background": self.background
+        }
+
+
+# Beim ersten Import von server.main angelegt
+startup_report = StartupReport()
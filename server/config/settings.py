@@ -9,7 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import List, Optional
 from shared.utils.paths import *
 
 
@@ -18,6 +18,18 @@ class Settings(BaseSettings):
     host: str = Field(default="127.0.0.1", description="Server Host", alias="HOST")
     port: int = Field(default=8000, description="Server Port",alias="PORT")
     reload: bool = Field(default=True, description="Auto-Reload bei Änderungen")
+    workers: int = Field(default=1, description="Anzahl Uvicorn-Worker-Prozesse (>1 deaktiviert Auto-Reload)")
+    worker_sync_interval: float = Field(default=1.0, description="Takt des Zustandsabgleichs zwischen Workern in Sekunden")
+    worker_timeout: float = Field(default=5.0, description="Sekunden ohne Heartbeat, bis ein Worker als beendet gilt")
+    ws_per_message_deflate: bool = Field(default=True, description="WebSocket-Kompression (permessage-deflate)")
+    compression_enabled: bool = Field(default=True, description="HTTP-Antworten nach Accept-Encoding komprimieren")
+    compression_min_size: int = Field(default=1024, description="Mindestgröße (Bytes) für komprimierte Antworten")
+    compression_gzip_level: int = Field(default=6, description="gzip-Kompressionsstufe (1-9)")
+    compression_brotli_quality: int = Field(default=5, description="Brotli-Qualität (0-11), falls brotli installiert")
+    compression_zstd_level: int = Field(default=3, description="zstd-Kompressionsstufe, falls zstandard installiert")
+    compression_cache_entries: int = Field(default=128, description="Anzahl zwischengespeicherter komprimierter Antworten")
+    compression_cache_bytes: int = Field(default=16 * 1024 * 1024, description="Maximale Größe des Kompressions-Caches (Bytes)")
+    compression_thread_min_size: int = Field(default=256 * 1024, description="Ab dieser Größe (Bytes) Hash und Kompression im Thread statt im Event-Loop")
     api_server: str = Field(default="http://127.0.0.1:8000", description="API Server URL", alias="SERVER")
     api_websocket: str = Field(default="ws://127.0.0.1:8000", description="WebSocket API URL", alias="WEBSOCKET")
 
@@ -29,10 +41,55 @@ class Settings(BaseSettings):
     # Docker-Einstellungen
     docker_enabled: bool = Field(default=False, description="Docker-Integration aktiviert")
     docker_socket: str = Field(default="unix://var/run/docker.sock", description="Docker Socket")
+    docker_events_enabled: bool = Field(default=True, description="Container-Cache über Docker-Events pflegen")
+    docker_max_workers: int = Field(default=16, description="Maximale parallele Docker-SDK-Aufrufe (auch Größe des HTTP-Verbindungspools)")
+    docker_bulk_parallelism: int = Field(default=8, description="Standard-Parallelität für Bulk-Aktionen")
+    # Kein Gesamt-Timeout pro Aufruf: gilt je Socket-Operation (Verbindungsaufbau, Lesen),
+    # ein Aufruf mit mehreren Anfragen oder stetig eintreffenden Daten kann länger dauern
+    docker_call_timeout: float = Field(default=30.0, description="Socket-Timeout des Docker-Clients in Sekunden")
+    docker_stats_enabled: bool = Field(default=True, description="Ressourcen-Statistik pro Container sammeln")
+    docker_stats_interval: float = Field(default=5.0, description="Abfrageintervall der Container-Statistik in Sekunden")
+    docker_stats_concurrency: int = Field(default=16, description="Maximale gleichzeitige Statistik-Abfragen")
+    docker_stats_history_size: int = Field(default=720, description="Anzahl gespeicherter Statistik-Einträge pro Container")
 
     # Monitoring
     monitor_interval: int = Field(default=2, description="Monitoring-Intervall in Sekunden")
-    metrics_history_size: int = Field(default=100, description="Anzahl gespeicherter Metriken")
+    monitor_idle_interval: float = Field(default=30.0, description="Monitoring-Intervall ohne Abonnenten/Leser in Sekunden")
+    monitor_active_window: float = Field(default=60.0, description="Sekunden nach dem letzten API-Zugriff mit schnellem Intervall")
+    monitor_docker_interval: float = Field(default=10.0, description="Intervall der Docker-Statusprüfung in Sekunden")
+    monitor_caddy_interval: float = Field(default=5.0, description="Intervall der Caddy-Statusprüfung in Sekunden")
+    # Speicherbedarf: Raw-Sample 320 Bytes (39 Felder + Zeitstempel à 8 Bytes),
+    # Rollup-Zeile 1256 Bytes (min/max/avg/last je Feld) - Standard zusammen ca. 4 MB
+    metrics_history_size: int = Field(default=3600, description="Anzahl Raw-Samples im Ringpuffer (2 h, ca. 1,2 MB)")
+    metrics_rollup_minute_size: int = Field(default=1440, description="Anzahl 1-Minuten-Rollups (24 h, ca. 1,8 MB)")
+    metrics_rollup_hour_size: int = Field(default=720, description="Anzahl 1-Stunden-Rollups (30 Tage, ca. 0,9 MB)")
+    metrics_persist: bool = Field(default=True, description="Metrik-Historie in SQLite speichern")
+    metrics_persist_interval: float = Field(default=5.0, description="Schreibintervall der Metrik-Persistenz in Sekunden")
+    alert_rules: List[str] = Field(
+        default=[
+            "cpu.percent > 90 for 60s",
+            "memory.percent > 90 for 60s",
+            "disk.percent > 90",
+            "services.caddy != running for 30s",
+        ],
+        description="Alarm-Regeln (Feld Operator Wert [for Dauer])"
+    )
+    alert_log_size: int = Field(default=500, description="Anzahl gespeicherter Alarm-Ereignisse")
+    request_stats_max_routes: int = Field(default=200, description="Maximale Anzahl getrennt erfasster Routen")
+    # Diagnose-Werkzeug: Ticker (10 Weckungen/s) und Watchdog-Thread laufen in jedem Worker
+    loop_monitor_enabled: bool = Field(default=False, description="Event-Loop-Lag und blockierende Aufrufe messen")
+    loop_monitor_interval: float = Field(default=0.1, description="Takt der Lag-Messung in Sekunden")
+    loop_block_threshold_ms: float = Field(default=100.0, description="Verspätung (ms), ab der der Loop als blockiert gilt")
+    loop_offenders_max: int = Field(default=100, description="Maximale Anzahl erfasster Verursacher von Blockaden")
+
+    # Debug
+    admin_token: Optional[str] = Field(default=None, description="Token für /api/debug (Header X-Admin-Token); ohne Token nur lokale Clients")
+    profiler_max_seconds: float = Field(default=60.0, description="Maximale Dauer eines Profiler-Laufs in Sekunden")
+    profiler_interval_ms: float = Field(default=5.0, description="Standard-Abtastintervall des Profilers in Millisekunden")
+    tracing_enabled: bool = Field(default=True, description="Spans für Requests und Service-Operationen aufzeichnen")
+    trace_slow_ms: float = Field(default=100.0, description="Mindestdauer (ms), ab der ein Trace gespeichert wird")
+    trace_buffer_size: int = Field(default=200, description="Anzahl gespeicherter Traces (Ringpuffer)")
+    trace_file: Optional[str] = Field(default=None, description="JSON-Lines-Datei für gespeicherte Traces (relativ zum Projekt-Root)")
 
     # Pfade (relativ)
     project_root: Path = Field(default=PROJECT_ROOT)
@@ -58,6 +115,21 @@ class Settings(BaseSettings):
         """Pfad zur Caddy-Binary"""
         return CADDY_BINARY
 
+    @property
+    def metrics_db_path(self) -> Path:
+        """Pfad zur Metrik-Datenbank"""
+        return self.data_dir / "metrics.db"
+
+    @property
+    def worker_state_path(self) -> Path:
+        """Pfad zur gemeinsamen Zustandsdatei der Worker"""
+        return self.data_dir / "workers.db"
+
+    @property
+    def leader_lock_path(self) -> Path:
+        """Sperrdatei für die Leader-Wahl der Worker"""
+        return self.data_dir / "leader.lock"
+
     @property
     def is_caddy_installed(self) -> bool:
         """Prüft ob Caddy installiert ist"""
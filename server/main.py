@@ -6,16 +6,24 @@ from pathlib import Path
 # Projekt-Root zum Python-Path hinzufügen
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Zuerst laden: misst die Startphasen ab hier
+from server.api.startup import startup_report
+
+import asyncio
+import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import time
+from fastapi.responses import JSONResponse, ORJSONResponse
 import uvicorn
 from contextlib import asynccontextmanager
 
 from server.config.settings import settings
-from server.api.routes import caddy, monitoring
-from server.api.services import monitor_service
+from server.api.middleware import CompressionMiddleware, RequestTrackingMiddleware
+from server.api.routes import caddy, debug, monitoring
+from server.api.services import monitor_service, docker_service, worker_service, caddy_service, loop_monitor_service
+from shared.utils.paths import ensure_directories
+
+startup_report.checkpoint("imports")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -23,30 +31,55 @@ async def lifespan(app: FastAPI):
     # Startup
     print(f"🚀 Server startet auf {settings.host}:{settings.port}")
     print(f"📁 Projekt-Root: {settings.project_root}")
+    startup_report.checkpoint("app")
+
+    ensure_directories()
+    startup_report.checkpoint("directories")
 
-    # Monitoring starten
-    await monitor_service.start_monitoring()
-    print("📊 Monitoring gestartet")
+    # Event-Loop-Lag messen (vor den Diensten, damit auch deren Start erfasst wird)
+    await loop_monitor_service.start()
 
-    # Prüfe ob Caddy bereits läuft
-    from server.api.services import caddy_service
-    status = await caddy_service.get_status()
-    if status["status"] == "running":
-        print(f"✅ Caddy läuft bereits (PID: {status.get('pid')})")
+    # Monitoring und Container-Statistik starten (bei mehreren Workern nur im Leader)
+    await worker_service.start()
+    startup_report.checkpoint("services")
 
+    # Docker-Events abonnieren (Container-Cache)
+    await docker_service.start()
+    startup_report.checkpoint("docker")
+
+    # Prüfe im Hintergrund ob Caddy bereits läuft (Admin-API-Timeout blockiert den Start nicht)
+    probe_task = asyncio.create_task(probe_caddy())
+
+    startup_report.ready()
     yield
 
+    probe_task.cancel()
+
     # Shutdown
-    await monitor_service.stop_monitoring()
+    await worker_service.stop()
+    await docker_service.stop()
+    await loop_monitor_service.stop()
     print("👋 Server wird heruntergefahren")
     print("ℹ️  Caddy läuft weiter im Hintergrund (nutze UI zum Stoppen)")
 
+async def probe_caddy():
+    """Erste Caddy-Statusprüfung nach dem Start"""
+    started = time.perf_counter()
+    try:
+        status = await caddy_service.get_status()
+        if status["status"] == "running":
+            print(f"✅ Caddy läuft bereits (PID: {status.get('pid')})")
+    except Exception as e:
+        print(f"Caddy-Statusprüfung fehlgeschlagen: {e}")
+    startup_report.background_done("caddy_probe", started)
+
 # FastAPI App erstellen
 app = FastAPI(
     title="Caddy Manager API",
     description="API zur Verwaltung von Caddy Server",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS-Konfiguration für lokale Entwicklung
@@ -58,30 +91,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Request-Tracking Middleware
-@app.middleware("http")
-async def track_requests(request: Request, call_next):
-    """Trackt Requests für Monitoring"""
-    start_time = time.time()
+# Kompression und ETags (innerhalb des Trackings, damit die übertragene Größe zählt)
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
 
-    # Request zählen
-    monitor_service.record_request()
-
-    # Response verarbeiten
-    response = await call_next(request)
-
-    # Response-Zeit speichern
-    process_time = (time.time() - start_time) * 1000  # in ms
-    monitor_service.record_response_time(process_time)
-
-    # Header hinzufügen
-    response.headers["X-Process-Time"] = str(process_time)
-
-    return response
+# Request-Tracking Middleware (reines ASGI, puffert keine Antworten)
+app.add_middleware(RequestTrackingMiddleware, monitor=monitor_service)
 
 # Routen einbinden
 app.include_router(caddy.router)
 app.include_router(monitoring.router)
+app.include_router(debug.router)
 
 # Root-Endpoint
 @app.get("/")
@@ -101,19 +121,11 @@ async def root():
 
 # Health-Check
 @app.get("/health")
-async def health_check():
-    """Health-Check Endpoint"""
-    caddy_status = await monitor_service._check_caddy_status()
-    docker_status = await monitor_service._check_docker_status()
-
-    return {
-        "status": "healthy",
-        "services": {
-            "api": "running",
-            "caddy": caddy_status,
-            "docker": docker_status
-        }
-    }
+async def health_check(deep: bool = False):
+    """Health-Check Endpoint (aus dem Speicher, ?deep=1 prüft sofort)"""
+    if deep:
+        return await monitor_service.check_health()
+    return monitor_service.get_health()
 
 # Error Handler
 @app.exception_handler(Exception)
@@ -129,12 +141,17 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 def run_server():
-    """Server starten"""
+    """Server starten (mit settings.workers > 1 als Multi-Worker ohne Auto-Reload)"""
+    if settings.workers > 1 and settings.reload:
+        print(f"ℹ️  {settings.workers} Worker - Auto-Reload ist deaktiviert")
+
     uvicorn.run(
         "server.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.reload,
+        reload=settings.reload and settings.workers == 1,
+        workers=settings.workers,
+        ws_per_message_deflate=settings.ws_per_message_deflate,
         log_level="info"
     )
 
@@ -0,0 +1,16 @@
+"""
+Metrik-Hilfsfunktionen für Server und Client
+"""
+from typing import Dict, Any
+
+
+def unflatten(flat: Dict[str, Any]) -> Dict[str, Any]:
+    """Punkt-Notation zurück in verschachteltes Dict"""
+    nested: Dict[str, Any] = {}
+    for name, value in flat.items():
+        target = nested
+        *parents, leaf = name.split(".")
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    return nested
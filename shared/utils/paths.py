@@ -51,7 +51,4 @@ def get_relative_path(path: Path) -> str:
     try:
         return str(path.relative_to(PROJECT_ROOT))
     except ValueError:
-        return str(path)
-
-# Verzeichnisse beim Import erstellen
-ensure_directories()
\ No newline at end of file
+        return str(path)
\ No newline at end of file
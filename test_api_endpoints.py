@@ -10,6 +10,7 @@ import time
 import sys
 from typing import Dict, Any, Optional
 from datetime import datetime
+from urllib.parse import quote
 from server.config.settings import settings
 
 from typing_inspection.typing_objects import alias
@@ -133,6 +134,524 @@ def test_endpoint(method: str, endpoint: str, data: Optional[Dict] = None,
         return False
 
 
+def get_json(endpoint: str) -> Optional[Any]:
+    """GET-Request für Verhaltens-Tests, liefert den JSON-Body oder None"""
+    print_test(endpoint)
+    try:
+        response = requests.get(f"{BASE_URL}{endpoint}", timeout=TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        print_error(f"Error: {str(e)}")
+        return None
+    if response.status_code != 200:
+        print_error(f"Unexpected status code: {response.status_code}")
+        return None
+    return response.json()
+
+
+def check_history_step() -> bool:
+    """
+    Historie mit step: Auflösung mindestens step, Zeitstempel im Bereich und
+    auf step ausgerichtet, min <= avg <= max je Zeitschritt
+    """
+    now = int(time.time())
+    start, end, step = now - 3600, now, 60
+    query = f"/api/monitoring/metrics/history?from={start}&to={end}&step={step}&fields=cpu.percent"
+
+    results = {}
+    for agg in ("min", "avg", "max"):
+        body = get_json(f"{query}&agg={agg}")
+        if body is None:
+            return False
+        results[agg] = body
+
+    body = results["avg"]
+    timestamps = body["timestamps"]
+    print_info(f"Tier: {body['tier']}, resolution: {body['resolution']} ms, points: {len(timestamps)}")
+
+    if body["resolution"] < step * 1000:
+        print_error(f"Resolution {body['resolution']} ms is finer than step {step}s")
+        return False
+    if any(ts % (step * 1000) for ts in timestamps):
+        print_error("Timestamps are not aligned to step")
+        return False
+    if any(b <= a for a, b in zip(timestamps, timestamps[1:])):
+        print_error("Timestamps are not strictly increasing")
+        return False
+    if timestamps and (timestamps[0] < (start - step) * 1000 or timestamps[-1] > end * 1000):
+        print_error("Timestamps outside of the requested range")
+        return False
+    if len(timestamps) > (end - start) // step + 1:
+        print_error(f"More points than steps in range: {len(timestamps)}")
+        return False
+
+    if all(result["timestamps"] == timestamps for result in results.values()):
+        columns = [results[agg]["fields"]["cpu.percent"] for agg in ("min", "avg", "max")]
+        for low, mid, high in zip(*columns):
+            if None not in (low, mid, high) and not low - 1e-9 <= mid <= high + 1e-9:
+                print_error(f"Aggregates out of order: min={low} avg={mid} max={high}")
+                return False
+
+    print_success("History query with step is consistent")
+    return True
+
+
+def check_history_time_roundtrip() -> bool:
+    """Zeitstempel aus der Historie als from/to zurückgeben wählt genau diesen Eintrag"""
+    entries = get_json("/api/monitoring/metrics/history?limit=5")
+    if not entries:
+        print_error("No history entries to check")
+        return False
+
+    for entry in (entries[0], entries[-1]):
+        timestamp = quote(entry["timestamp"])
+        selected = get_json(f"/api/monitoring/metrics/history?from={timestamp}&to={timestamp}")
+        if selected is None:
+            return False
+        if [item["timestamp"] for item in selected] != [entry["timestamp"]]:
+            print_error(f"from/to={entry['timestamp']} selected {[item['timestamp'] for item in selected]}")
+            return False
+
+    print_success("History timestamps round-trip as from/to")
+    return True
+
+
+def check_history_persistence() -> Optional[bool]:
+    """
+    Historie übersteht einen Neustart: Einträge älter als der Server-Prozess
+    können nur aus data/metrics.db stammen (None, wenn der Server nicht lokal läuft)
+    """
+    body = get_json("/api/monitoring/workers")
+    if body is None:
+        return False
+    worker = next((w for w in body["workers"] if w.get("self")), None)
+    try:
+        import psutil
+        started = int(psutil.Process(worker["pid"]).create_time())
+    except Exception:
+        print_info("Server process is not local - persistence check skipped")
+        return None
+
+    entries = get_json(f"/api/monitoring/metrics/history?from={started - 3600}&to={started}")
+    if entries is None:
+        return False
+    if not entries:
+        print_error("No history from before the server start - restart the server and run again")
+        return False
+
+    print_info(f"{len(entries)} entries from before the server start, "
+               f"{entries[0]['timestamp']} .. {entries[-1]['timestamp']}")
+    print_success("History survives a restart")
+    return True
+
+
+def check_single_leader(samples: int = 5) -> bool:
+    """Jede Worker-Antwort nennt genau einen Leader, und zwar immer denselben"""
+    leader_pids = set()
+    for _ in range(samples):
+        body = get_json("/api/monitoring/workers")
+        if body is None:
+            return False
+        leaders = [worker["pid"] for worker in body["workers"] if worker.get("leader")]
+        if len(leaders) != 1:
+            print_error(f"Expected exactly one leader, got {leaders}")
+            return False
+        leader_pids.update(leaders)
+
+    if len(leader_pids) != 1:
+        print_error(f"Workers disagree on the leader: {sorted(leader_pids)}")
+        return False
+
+    print_info(f"Workers: {len(body['workers'])}, leader pid: {leader_pids.pop()}")
+    print_success("Exactly one leader")
+    return True
+
+
+def check_profiler() -> Optional[bool]:
+    """
+    Profil über 1 s liefert X-Profile-Header; ein zweiter Aufruf währenddessen
+    wird mit 409 abgelehnt (None, wenn er bei einem anderen Worker landet)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    endpoint = "/api/debug/profile?seconds=1"
+    print_test(endpoint, "POST")
+    url = f"{BASE_URL}{endpoint}"
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            first = executor.submit(requests.post, url, timeout=TIMEOUT)
+            # Zweiter Aufruf, während der erste noch sampelt
+            time.sleep(0.3)
+            second = requests.post(url, timeout=TIMEOUT)
+            response = first.result()
+    except requests.exceptions.RequestException as e:
+        print_error(f"Error: {str(e)}")
+        return False
+
+    if response.status_code != 200:
+        print_error(f"Unexpected status code: {response.status_code}")
+        return False
+    headers = {name: value for name, value in response.headers.items() if name.lower().startswith("x-profile-")}
+    print_info(f"Profile headers: {headers}")
+    if not {"x-profile-samples", "x-profile-duration"} <= {name.lower() for name in headers}:
+        print_error("Profile response lacks X-Profile-Samples/X-Profile-Duration")
+        return False
+
+    if second.status_code != 409:
+        workers = get_json("/api/monitoring/workers") or {}
+        if workers.get("multi_worker") and second.status_code == 200:
+            print_info("Concurrent call reached another worker - 409 check skipped")
+            return None
+        print_error(f"Expected 409 for a concurrent profile, got {second.status_code}")
+        return False
+
+    print_success("Profiler returns X-Profile headers and rejects a concurrent run")
+    return True
+
+
+def check_caddy_trace(timeout: float = 15) -> Optional[bool]:
+    """
+    Caddy-Aufrufe erscheinen als Span in /api/debug/traces: caddy.admin_api
+    bei installiertem Caddy, sonst caddy.status (gespeichert werden nur
+    Traces ab slow_ms, daher wird eine Weile gewartet)
+    """
+    status = get_json("/api/caddy/status")
+    if status is None:
+        return False
+    expected = "caddy.status" if status.get("status") == "not_installed" else "caddy.admin_api"
+    print_info(f"Caddy status: {status.get('status')}, expecting span {expected}")
+
+    deadline = time.time() + timeout
+    while True:
+        body = get_json("/api/debug/traces?limit=200")
+        if body is None:
+            return False
+        if not body["enabled"]:
+            print_info("Tracing is disabled - trace check skipped")
+            return None
+        for trace in body["traces"]:
+            spans = [span for span in trace["spans"] if span["name"] == expected]
+            if spans:
+                print_info(f"Trace '{trace['name']}' ({trace['duration_ms']} ms): {spans[0]}")
+                print_success(f"Trace contains a {expected} span")
+                return True
+        if time.time() > deadline:
+            break
+        time.sleep(2)
+        requests.get(f"{BASE_URL}/api/caddy/status", timeout=TIMEOUT)
+
+    print_error(f"No stored trace with a {expected} span (slow_ms={body['slow_ms']}, "
+                f"start the server with TRACE_SLOW_MS=0 to keep every trace)")
+    return False
+
+
+def find_route(stats: Dict[str, Any], method: str, route: str) -> Optional[Dict[str, Any]]:
+    """Eintrag einer Route aus /api/monitoring/requests"""
+    for entry in stats["routes"]:
+        if entry["method"] == method and entry["route"] == route:
+            return entry
+    return None
+
+
+def check_latency_histograms(samples: int = 20) -> bool:
+    """Latenz-Histogramme: Anzahl pro Route und Perzentile in aufsteigender Reihenfolge"""
+    for _ in range(samples):
+        requests.get(f"{BASE_URL}/health", timeout=TIMEOUT)
+
+    stats_1m = get_json("/api/monitoring/requests")
+    stats_5m = get_json("/api/monitoring/requests?window=5m")
+    if stats_1m is None or stats_5m is None:
+        return False
+
+    entry = find_route(stats_1m, "GET", "/health")
+    if entry is None or entry["count"] < samples:
+        print_error(f"Expected at least {samples} requests for GET /health, got {entry and entry['count']}")
+        return False
+
+    print_info(f"GET /health: p50={entry['p50']} p90={entry['p90']} p99={entry['p99']} max={entry['max']} ms")
+    percentiles = [entry["p50"], entry["p90"], entry["p99"], entry["max"]]
+    if None in percentiles or percentiles != sorted(percentiles):
+        print_error(f"Percentiles not ascending: {percentiles}")
+        return False
+    if not 0 < entry["avg"] <= entry["max"]:
+        print_error(f"Average {entry['avg']} outside of (0, max]")
+        return False
+
+    entry_5m = find_route(stats_5m, "GET", "/health")
+    if entry_5m is None or entry_5m["count"] < entry["count"]:
+        print_error("5m window holds fewer requests than the 1m window")
+        return False
+
+    print_success("Latency histograms are consistent")
+    return True
+
+
+def check_request_rates(samples: int = 20) -> bool:
+    """Gleitende Raten: eine Request-Serie erscheint im 10s- und 60s-Fenster, nicht als Lebenszeit-Mittel"""
+    for _ in range(samples):
+        requests.get(f"{BASE_URL}/health", timeout=TIMEOUT)
+    # Die laufende Sekunde zählt erst nach ihrem Abschluss
+    time.sleep(1.1)
+
+    stats = get_json("/api/monitoring/requests")
+    if stats is None:
+        return False
+    entry = find_route(stats, "GET", "/health")
+    if entry is None:
+        print_error("GET /health missing in request stats")
+        return False
+
+    rates = entry["rates"]
+    print_info(f"GET /health rates: {rates}, status classes: {list(entry['status'])}")
+    if round(rates["10s"] * 10) < samples or round(rates["60s"] * 60) < samples:
+        print_error(f"Expected at least {samples} requests in the 10s and 60s windows")
+        return False
+    if "2xx" not in entry["status"]:
+        print_error("Status class 2xx missing for GET /health")
+        return False
+    overall = stats["overall"]["rates"]
+    if any(overall[name] < rates[name] for name in rates):
+        print_error(f"Overall rates {overall} below route rates {rates}")
+        return False
+
+    print_success("Sliding-window request rates are consistent")
+    return True
+
+
+def check_io_rates(samples: int = 3) -> bool:
+    """
+    Netzwerk- und Disk-Raten über mehrere Snapshots: nie negativ (ein nicht
+    behandelter Zählerüberlauf ergäbe negative Werte), Netzwerk-Summen passen
+    zu den Interfaces, Raten landen in der Historie
+    """
+    # Die Disk-Summe ist ein eigener Zähler ohne Partitionen, keine Summe der Einträge
+    groups = (
+        ("network", "rates", "interfaces", True),
+        ("disk", "io", "disks", False),
+    )
+    for i in range(samples):
+        if i:
+            time.sleep(settings.monitor_interval + 0.2)
+        metrics = get_json("/api/monitoring/metrics")
+        if metrics is None:
+            return False
+
+        for section, totals_key, devices_key, summed in groups:
+            totals = metrics[section][totals_key]
+            devices = metrics[section][devices_key]
+            for device, rates in [("total", totals), *devices.items()]:
+                for name, value in rates.items():
+                    if value is not None and not 0 <= value < float("inf"):
+                        print_error(f"{section}.{device}.{name} = {value}")
+                        return False
+            for name, total in (totals.items() if summed else ()):
+                values = [rates[name] for rates in devices.values() if rates.get(name) is not None]
+                if total is not None and abs(total - sum(values)) > 0.01 * (len(values) + 1):
+                    print_error(f"{section} total {name}={total} differs from sum {sum(values):.2f}")
+                    return False
+
+    print_info(f"Interfaces: {', '.join(metrics['network']['interfaces'])}; "
+               f"disks: {len(metrics['disk']['disks'])}")
+
+    now = int(time.time())
+    history = get_json(f"/api/monitoring/metrics/history?from={now - 60}&to={now + 1}"
+                       f"&fields=network.rates.bytes_recv_per_sec,disk.io.write_iops")
+    if history is None:
+        return False
+    if not any(value is not None for column in history["fields"].values() for value in column):
+        print_error("No I/O rates recorded in history")
+        return False
+
+    print_success("Network and disk I/O rates are consistent")
+    return True
+
+
+def events_alternate(events: list) -> bool:
+    """Pro Regel müssen sich firing und resolved abwechseln"""
+    last_state: Dict[str, str] = {}
+    for event in events:
+        if last_state.get(event["rule"]) == event["state"]:
+            print_error(f"Two consecutive '{event['state']}' events for {event['rule']}")
+            return False
+        last_state[event["rule"]] = event["state"]
+    return True
+
+
+def wait_for_rule(expression: str, state: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """Alarme abfragen, bis die Regel den Zustand erreicht; liefert die Alarm-Antwort oder None"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = requests.get(f"{BASE_URL}/api/monitoring/alerts", timeout=TIMEOUT)
+        alerts = response.json()
+        for rule in alerts["rules"]:
+            if rule["rule"] == expression and rule["state"] == state:
+                return alerts
+        time.sleep(settings.monitor_interval / 2)
+    return None
+
+
+def check_alert_transitions() -> bool:
+    """
+    Alarm-Engine: Ereignis-Log konsistent, die Caddy-Regel feuert nach ihrer
+    Dauer, sobald Caddy nicht läuft, und wird nach dem Start wieder aufgelöst
+    """
+    alerts = get_json("/api/monitoring/alerts")
+    if alerts is None or not events_alternate(alerts["events"]):
+        return False
+
+    rule = next((rule for rule in alerts["rules"] if rule["rule"].startswith("services.caddy")), None)
+    if rule is None:
+        print_info("No services.caddy rule configured, skipping transition check")
+        print_success("Alert event log is consistent")
+        return True
+
+    expression = rule["rule"]
+    timeout = rule["duration"] + 3 * settings.monitor_interval + 2
+
+    # Caddy stoppen, damit die Regel verletzt ist (schlägt fehl, wenn er nicht läuft)
+    if rule["state"] == "ok":
+        requests.post(f"{BASE_URL}/api/caddy/stop", timeout=TIMEOUT)
+
+    print_info(f"Waiting up to {timeout:.0f}s for '{expression}' to fire")
+    alerts = wait_for_rule(expression, "firing", timeout)
+    if alerts is None:
+        print_error(f"Rule '{expression}' did not fire")
+        return False
+    events = [event for event in alerts["events"] if event["rule"] == expression]
+    if not events or events[-1]["state"] != "firing":
+        print_error("Firing rule has no firing event in the log")
+        return False
+    print_success(f"Rule fired: {expression}")
+
+    response = requests.post(f"{BASE_URL}/api/caddy/start", timeout=TIMEOUT)
+    if response.status_code != 200:
+        print_info("Caddy could not be started, skipping resolve check")
+        return events_alternate(alerts["events"])
+
+    alerts = wait_for_rule(expression, "ok", 3 * settings.monitor_interval + 2)
+    if alerts is None:
+        print_error(f"Rule '{expression}' did not resolve after starting Caddy")
+        return False
+    events = [event for event in alerts["events"] if event["rule"] == expression]
+    if events[-1]["state"] != "resolved" or not events_alternate(alerts["events"]):
+        print_error("Resolved rule has no resolved event in the log")
+        return False
+
+    print_success(f"Rule resolved: {expression}")
+    return True
+
+
+def check_stream_v2_deltas(deltas: int = 2) -> bool:
+    """
+    Metrik-Stream v2: hello, Snapshot, Deltas nur mit abonnierten Feldern.
+    Nach dem Abbestellen einer Feldgruppe tauchen deren Felder in keinem
+    Delta mehr auf.
+    """
+    try:
+        from websockets.sync.client import connect
+    except ImportError:
+        print_info("websockets not installed, skipping stream v2 check")
+        return True
+
+    def subscribed(names, groups) -> bool:
+        return all(any(name == group or name.startswith(f"{group}.") for group in groups) for name in names)
+
+    def receive(ws) -> Dict[str, Any]:
+        return json.loads(ws.recv(timeout=3 * settings.monitor_interval + TIMEOUT))
+
+    groups = ["cpu", "network.interfaces"]
+    endpoint = f"/api/monitoring/metrics/stream?v=2&fields={','.join(groups)}"
+    print_test(endpoint, "WS")
+    url = BASE_URL.replace("http", "ws", 1) + endpoint
+
+    try:
+        with connect(url) as ws:
+            hello = receive(ws)
+            if hello.get("type") != "hello" or hello.get("version") != 2:
+                print_error(f"Expected hello for version 2, got {hello}")
+                return False
+
+            snapshot = receive(ws)
+            if snapshot.get("type") != "snapshot" or not subscribed(snapshot["fields"], groups):
+                print_error(f"Expected snapshot of {groups}, got {list(snapshot.get('fields', {}))}")
+                return False
+            state = dict(snapshot["fields"])
+            seq = snapshot["seq"]
+
+            for _ in range(deltas):
+                delta = receive(ws)
+                if delta.get("type") != "delta" or delta["seq"] != seq + 1:
+                    print_error(f"Expected delta with seq {seq + 1}, got {delta.get('type')} {delta.get('seq')}")
+                    return False
+                removed = delta.get("removed", [])
+                if not subscribed([*delta["changed"], *removed], groups):
+                    print_error("Delta contains fields outside of the subscription")
+                    return False
+                if any(name not in state for name in removed):
+                    print_error(f"Delta removes unknown fields: {removed}")
+                    return False
+                state.update(delta["changed"])
+                for name in removed:
+                    del state[name]
+                seq = delta["seq"]
+            print_info(f"{deltas} deltas applied, {len(state)} fields")
+
+            # network.interfaces abbestellen - die Felder fallen weg
+            ws.send(json.dumps({"subscribe": ["cpu"]}))
+            message = receive(ws)
+            while message.get("type") == "delta":
+                message = receive(ws)
+            if message.get("type") != "hello" or message.get("fields") != ["cpu"]:
+                print_error(f"Expected hello after resubscribe, got {message}")
+                return False
+            snapshot = receive(ws)
+            delta = receive(ws)
+            names = [*snapshot.get("fields", {}), *delta.get("changed", {}), *delta.get("removed", [])]
+            if snapshot.get("type") != "snapshot" or delta.get("type") != "delta" or not subscribed(names, ["cpu"]):
+                print_error("Unsubscribed fields still sent after resubscribe")
+                return False
+    except Exception as e:
+        print_error(f"Error: {str(e)}")
+        return False
+
+    print_success("Stream v2 snapshot and deltas are consistent")
+    return True
+
+
+def check_compression_etag() -> bool:
+    """Komprimierte Antwort mit ETag, danach 304 ohne Body bei passendem If-None-Match"""
+    endpoint = "/openapi.json"
+    print_test(endpoint)
+    url = f"{BASE_URL}{endpoint}"
+    try:
+        response = requests.get(url, headers={"Accept-Encoding": "gzip"}, timeout=TIMEOUT)
+        etag = response.headers.get("ETag")
+        print_info(f"Content-Encoding: {response.headers.get('Content-Encoding')}, ETag: {etag}")
+        if response.status_code != 200 or response.headers.get("Content-Encoding") != "gzip":
+            print_error(f"Expected gzip-encoded 200, got {response.status_code} "
+                        f"{response.headers.get('Content-Encoding')}")
+            return False
+        if not etag:
+            print_error("Compressed response has no ETag")
+            return False
+
+        cached = requests.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}, timeout=TIMEOUT)
+        if cached.status_code != 304 or cached.content:
+            print_error(f"Expected empty 304 for If-None-Match, got {cached.status_code}")
+            return False
+
+        # Andere Kodierung, anderes ETag - keine 304
+        plain = requests.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": etag}, timeout=TIMEOUT)
+        if plain.status_code != 200 or "Content-Encoding" in plain.headers:
+            print_error(f"Expected uncompressed 200 for identity, got {plain.status_code}")
+            return False
+    except requests.exceptions.RequestException as e:
+        print_error(f"Error: {str(e)}")
+        return False
+
+    print_success("Compression, ETag and 304 work")
+    return True
+
+
 def main():
     """Hauptfunktion - führt alle Tests aus"""
 
@@ -235,7 +754,8 @@ def main():
     print_info("  POST /api/monitoring/docker/containers/{container_id}/start")
     print_info("  POST /api/monitoring/docker/containers/{container_id}/stop")
     print_info("  POST /api/monitoring/docker/containers/{container_id}/restart")
-    results["skipped"] += 3
+    print_info("  POST /api/monitoring/docker/containers/bulk with {\"action\": \"restart\", \"label\": \"...\"}")
+    results["skipped"] += 4
 
     # System Monitoring
     print_header("7. SYSTEM MONITORING")
@@ -243,7 +763,18 @@ def main():
     # Monitoring Endpoints
     monitoring_endpoints = [
         "/api/monitoring/metrics",
-        "/api/monitoring/metrics/history"
+        "/api/monitoring/metrics/history",
+        "/api/monitoring/metrics/history?limit=10",
+        "/api/monitoring/metrics/history?fields=cpu.percent,memory.percent",
+        f"/api/monitoring/metrics/history?from={int(time.time()) - 3600}&to={int(time.time())}&step=60",
+        "/api/monitoring/metrics/history?fields=cpu.percent&format=columnar",
+        "/api/monitoring/requests",
+        "/api/monitoring/requests?window=5m",
+        "/api/monitoring/alerts",
+        "/api/monitoring/docker/containers/stats",
+        "/api/monitoring/workers",
+        "/api/monitoring/loop",
+        "/health?deep=1"
     ]
 
     for endpoint in monitoring_endpoints:
@@ -296,6 +827,33 @@ def main():
     else:
         results["failed"] += 1
 
+    # Verhalten der Monitoring-Endpoints
+    print_header("11. MONITORING BEHAVIOR")
+
+    behavior_checks = [
+        check_history_step,
+        check_history_time_roundtrip,
+        check_history_persistence,
+        check_single_leader,
+        check_profiler,
+        check_caddy_trace,
+        check_latency_histograms,
+        check_request_rates,
+        check_io_rates,
+        check_alert_transitions,
+        check_stream_v2_deltas,
+        check_compression_etag,
+    ]
+
+    for check in behavior_checks:
+        result = check()
+        if result is None:
+            results["skipped"] += 1
+        elif result:
+            results["passed"] += 1
+        else:
+            results["failed"] += 1
+
     # Test-Zusammenfassung
     print_header("TEST SUMMARY")
 